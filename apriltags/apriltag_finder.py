@@ -1,14 +1,50 @@
 import os
-import math
+import time
 import logging
 from logs.logging_setup import setup_logger
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
 import cv2
+import numpy as np
 import robotpy_apriltag as apriltag
 from robotpy_apriltag import AprilTagDetection
 
-from config import CameraConfig, AprilTagConfig
+from config import AprilTagConfig, LoggingConfig
+from camera_calculations.mono_video import MonoVision
+
+class TagDetection:
+    """An AprilTag detection in full-frame pixel coordinates with its geometry extracted once."""
+    __slots__ = ('id', 'corners', 'center', 'decision_margin', 'hamming')
+
+    def __init__(self, detection: AprilTagDetection, offset_x: int = 0, offset_y: int = 0) -> None:
+        offset = np.array([offset_x, offset_y], dtype=np.float32)
+        center = detection.getCenter()
+
+        self.id: int = detection.getId()
+        self.corners: np.ndarray = np.array(detection.getCorners((0.0,) * 8), dtype=np.float32).reshape(4, 2) + offset
+        self.center: np.ndarray = np.array([center.x, center.y], dtype=np.float32) + offset
+        self.decision_margin: float = detection.getDecisionMargin()
+        self.hamming: int = detection.getHamming()
+
+    # Same accessors as AprilTagDetection so existing consumers keep working
+
+    def getId(self) -> int:
+        return self.id
+
+    def getCenter(self) -> AprilTagDetection.Point:
+        return AprilTagDetection.Point(float(self.center[0]), float(self.center[1]))
+
+    def getCorner(self, index: int) -> AprilTagDetection.Point:
+        return AprilTagDetection.Point(float(self.corners[index, 0]), float(self.corners[index, 1]))
+
+    def getCorners(self, cornersBuf=None) -> Tuple[float, ...]:
+        return tuple(float(value) for value in self.corners.ravel())
+
+    def getDecisionMargin(self) -> float:
+        return self.decision_margin
+
+    def getHamming(self) -> int:
+        return self.hamming
 
 class AprilTagFinder:
     def __init__(self):
@@ -16,21 +52,117 @@ class AprilTagFinder:
         setup_logger(file_name)
         self.logger = logging.getLogger(file_name)
 
-        self.apriltag_detector = apriltag.AprilTagDetector()
-        self.apriltag_detector.addFamily("tag36h11", 3)
-    
+        self.apriltag_detector = self.create_detector(1.0)
+        self.decimated_detector = self.create_detector(AprilTagConfig.FULL_FRAME_DECIMATION)
+
+        self.previous_apriltags: List[TagDetection] = []
+        self.region_scratch: np.ndarray = np.empty(0, dtype=np.uint8)
+        self.frames_since_full_search: int = 0
+
+        self.search_count: Dict[str, int] = {"roi": 0, "full": 0}
+        self.search_time: Dict[str, float] = {"roi": 0.0, "full": 0.0}
+        self.roi_expected: int = 0
+        self.roi_found: int = 0
+
+    @staticmethod
+    def create_detector(quad_decimate: float) -> apriltag.AprilTagDetector:
+        detector = apriltag.AprilTagDetector()
+        detector.addFamily("tag36h11", 3)
+
+        detector_config = detector.getConfig()
+        detector_config.numThreads = AprilTagConfig.NUM_THREADS
+        detector_config.quadDecimate = quad_decimate
+        detector.setConfig(detector_config)
+        return detector
+
     @staticmethod
-    def estimate_distance(apriltag: AprilTagDetection):
-        """Estimate distance to the tag based on its size in the image."""
-        apriltag_width_in_pixels = apriltag.getCorners[0] - apriltag.getCorners[4]
-        return (CameraConfig.FOCAL_LENGTH * AprilTagConfig.APRILTAG_SIZE_IN_CM) / apriltag_width_in_pixels
-    
+    def estimate_distance(apriltag: AprilTagDetection) -> float:
+        """Estimate the distance to a single tag in mm from its height in pixels; PoseEstimator is preferred."""
+        corners = np.array(apriltag.getCorners((0.0,) * 8), dtype=np.float32).reshape(4, 2)
+        # The vertical edges stay the tag's full height when it is turned away from the camera
+        apriltag_height_in_pixels = (np.linalg.norm(corners[3] - corners[0]) + np.linalg.norm(corners[2] - corners[1])) / 2
+        return MonoVision.get_distance_to_object_in_mm(AprilTagConfig.APRILTAG_SIZE_IN_MM, apriltag_height_in_pixels)
+
     @staticmethod
-    def calculate_anglular_diviation(apriltag: AprilTagDetection):
-        """Calculate the angle offset of an apriltag."""
-        return math.degrees(math.atan((apriltag.getCenter().x - (CameraConfig.FRAME_WIDTH / 2)) / CameraConfig.FOCAL_LENGTH))
-
-    def find_apriltags(self, frame) -> List:
-        """Main loop for processing frames and sending drive instructions."""
-        gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-        return self.apriltag_detector.detect(gray_frame)
\ No newline at end of file
+    def calculate_anglular_diviation(apriltag: AprilTagDetection) -> float:
+        """Calculate the angle offset of an apriltag in degrees."""
+        return MonoVision.get_angle_to_object_in_degrees(apriltag.getCenter().x)
+
+    def find_apriltags(self, frame, gray_frame: Optional[np.ndarray] = None) -> List[TagDetection]:
+        """Find the tags in a frame, searching around last frame's tags before falling back to the full frame."""
+        if gray_frame is None:
+            gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        self.frames_since_full_search += 1
+
+        if (not AprilTagConfig.INCREMENTAL_SEARCH
+                or not self.previous_apriltags
+                or self.frames_since_full_search >= AprilTagConfig.FULL_FRAME_INTERVAL):
+            apriltags = self.search_full_frame(gray_frame)
+        else:
+            apriltags = self.search_regions(gray_frame)
+            if len(apriltags) < len(self.previous_apriltags):
+                apriltags = self.search_full_frame(gray_frame)
+
+        self.previous_apriltags = apriltags
+        if sum(self.search_count.values()) >= LoggingConfig.FPS_LOGGING_RATE:
+            self.log_search_stats()
+        return apriltags
+
+    def search_full_frame(self, gray_frame: np.ndarray) -> List[TagDetection]:
+        """Run the decimated detector over the whole frame."""
+        start = time.perf_counter()
+        apriltags = [TagDetection(detection) for detection in self.decimated_detector.detect(gray_frame)]
+
+        self.search_time["full"] += time.perf_counter() - start
+        self.search_count["full"] += 1
+        self.frames_since_full_search = 0
+        return apriltags
+
+    def region_buffer(self, height: int, width: int) -> np.ndarray:
+        """A contiguous height x width view into one reused scratch buffer, grown only when a region is bigger."""
+        if self.region_scratch.size < height * width:
+            self.region_scratch = np.empty(height * width, dtype=np.uint8)
+        return self.region_scratch[:height * width].reshape(height, width)
+
+    def search_regions(self, gray_frame: np.ndarray) -> List[TagDetection]:
+        """Run the full-resolution detector only in padded regions around last frame's tags."""
+        start = time.perf_counter()
+        height, width = gray_frame.shape[:2]
+        found: Dict[int, TagDetection] = {}
+
+        for previous in self.previous_apriltags:
+            x0, y0 = previous.corners.min(axis=0)
+            x1, y1 = previous.corners.max(axis=0)
+            padding = max(AprilTagConfig.ROI_PADDING * max(x1 - x0, y1 - y0), AprilTagConfig.ROI_MIN_PADDING_IN_PIXELS)
+
+            x0, y0 = max(int(x0 - padding), 0), max(int(y0 - padding), 0)
+            x1, y1 = min(int(x1 + padding), width), min(int(y1 + padding), height)
+            if x1 <= x0 or y1 <= y0:
+                continue
+
+            region = self.region_buffer(y1 - y0, x1 - x0)
+            np.copyto(region, gray_frame[y0:y1, x0:x1])
+            for detection in self.apriltag_detector.detect(region):
+                tag = TagDetection(detection, x0, y0)
+                if tag.id not in found or tag.decision_margin > found[tag.id].decision_margin:
+                    found[tag.id] = tag
+
+        self.roi_expected += len({tag.id for tag in self.previous_apriltags})
+        self.roi_found += len(found)
+        self.search_time["roi"] += time.perf_counter() - start
+        self.search_count["roi"] += 1
+        return list(found.values())
+
+    def log_search_stats(self) -> None:
+        """Log the average time per search mode and how many tracked tags the region search recovered."""
+        for mode in ("roi", "full"):
+            if self.search_count[mode]:
+                self.logger.info(
+                    f"AprilTag {mode} search: {self.search_count[mode]} runs, "
+                    f"{self.search_time[mode] / self.search_count[mode] * 1000:.2f} ms average")
+        if self.roi_expected:
+            self.logger.info(f"AprilTag region recall: {self.roi_found / self.roi_expected * 100:.1f}%")
+
+        self.search_count = {"roi": 0, "full": 0}
+        self.search_time = {"roi": 0.0, "full": 0.0}
+        self.roi_expected = self.roi_found = 0
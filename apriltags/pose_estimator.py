@@ -0,0 +1,130 @@
+import os
+import math
+import logging
+from logs.logging_setup import setup_logger
+from logs.instrumentation import instrumentation
+from typing import Dict, FrozenSet, List, Optional, Tuple
+
+import cv2
+import numpy as np
+import robotpy_apriltag as apriltag
+
+from config import CameraConfig, AprilTagConfig, FieldConfig
+from camera_calculations.mono_video import MonoVision
+from apriltags.apriltag_finder import TagDetection
+
+################################################
+
+class FieldLayout:
+    """Tag IDs, field-frame corner positions and alliance roles, indexed once at startup."""
+    def __init__(self, layout_name: str = FieldConfig.LAYOUT, tag_roles: Dict[int, Tuple[str, str]] = FieldConfig.TAG_ROLES) -> None:
+        layout = apriltag.AprilTagFieldLayout.loadField(getattr(apriltag.AprilTagField, layout_name))
+
+        # Tag-frame corners in the detector's order (bottom-left, bottom-right, top-right, top-left as seen
+        # from the front); the tag's +X points out of its face, so the viewer's right is +Y
+        half_size = AprilTagConfig.APRILTAG_SIZE_IN_MM / 2000
+        tag_corners = np.array([[0, -half_size, -half_size, 1], [0, half_size, -half_size, 1],
+                                [0, half_size, half_size, 1], [0, -half_size, half_size, 1]], dtype=np.float64)
+
+        self.corners: Dict[int, np.ndarray] = {}     # tag ID -> (4, 3) field-frame corners in meters
+        self.centers: Dict[int, np.ndarray] = {}     # tag ID -> (3,) field-frame center in meters
+        for tag in layout.getTags():
+            pose = tag.pose
+            transform = np.eye(4)
+            transform[:3, :3] = np.array(pose.rotation().toMatrix())
+            transform[:3, 3] = (pose.X(), pose.Y(), pose.Z())
+            self.corners[tag.ID] = (tag_corners @ transform.T)[:, :3]
+            self.centers[tag.ID] = transform[:3, 3].copy()
+
+        self.roles: Dict[int, Tuple[str, str]] = {tag_id: role for tag_id, role in tag_roles.items() if tag_id in self.corners}
+        self._ids: Dict[Tuple[str, str], FrozenSet[int]] = {}
+        for tag_id, role in self.roles.items():
+            self._ids[role] = self._ids.get(role, frozenset()) | {tag_id}
+
+    def ids(self, alliance: str, role: str) -> FrozenSet[int]:
+        """Tag IDs with a role for an alliance, e.g. ids("red", "reef")."""
+        return self._ids.get((alliance, role), frozenset())
+
+class FieldPose:
+    """Camera pose in the field for one frame, from every visible tag at once."""
+    __slots__ = ('layout', 'rotation', 'translation', 'tag_ids', 'reprojection_error', 'timestamp', '_targets')
+
+    def __init__(self, layout: FieldLayout, rotation: np.ndarray, translation: np.ndarray, tag_ids: List[int],
+                 reprojection_error: float, timestamp: float) -> None:
+        self.layout: FieldLayout = layout
+        self.rotation: np.ndarray = rotation          # field to camera, OpenCV camera axes
+        self.translation: np.ndarray = translation
+        self.tag_ids: List[int] = tag_ids
+        self.reprojection_error: float = reprojection_error
+        self.timestamp: float = timestamp
+        self._targets: Dict[int, Tuple[float, float]] = {}
+
+    @property
+    def position(self) -> np.ndarray:
+        """Camera position in field coordinates, in meters."""
+        return -self.rotation.T @ self.translation
+
+    @property
+    def heading(self) -> float:
+        """Direction of the camera's optical axis on the field, in degrees."""
+        axis = self.rotation[2]
+        return math.degrees(math.atan2(axis[1], axis[0]))
+
+    def relative_position(self, field_point: np.ndarray) -> Tuple[float, float]:
+        """Distance along the floor in mm and bearing in degrees (positive to the right) of a field point."""
+        x, _, z = self.rotation @ field_point + self.translation
+        dx, dy = field_point[:2] - self.position[:2]
+        return math.hypot(dx, dy) * 1000, math.degrees(math.atan2(x, z))
+
+    def target(self, tag_id: int) -> Optional[Tuple[float, float]]:
+        """Distance in mm and bearing in degrees to a tag, visible or not, cached for the frame."""
+        target = self._targets.get(tag_id)
+        if target is None and tag_id in self.layout.centers:
+            target = self._targets[tag_id] = self.relative_position(self.layout.centers[tag_id])
+        return target
+
+class PoseEstimator:
+    """Solves the camera pose once per frame from all visible tags with calibrated intrinsics."""
+    def __init__(self, layout: Optional[FieldLayout] = None) -> None:
+        file_name = os.path.splitext(os.path.basename(__file__))[0]
+        setup_logger(file_name)
+        self.logger = logging.getLogger(file_name)
+
+        self.layout: FieldLayout = layout or FieldLayout()
+        if CameraConfig.CAMERA_MATRIX is not None:
+            self.camera_matrix: np.ndarray = np.array(CameraConfig.CAMERA_MATRIX, dtype=np.float64)
+        else:
+            focal_length = MonoVision.FOCAL_LENGTH_IN_PIXELS
+            self.camera_matrix = np.array([[focal_length, 0, CameraConfig.FRAME_WIDTH / 2],
+                                           [0, focal_length, CameraConfig.FRAME_HEIGHT / 2],
+                                           [0, 0, 1]], dtype=np.float64)
+        self.distortion: np.ndarray = np.array(CameraConfig.DISTORTION_COEFFICIENTS, dtype=np.float64)
+
+    def estimate(self, apriltags: List[TagDetection], timestamp: float) -> Optional[FieldPose]:
+        """Fuse the corners of every known tag into one solvePnP, or return None if no trustworthy pose exists."""
+        known = [tag for tag in apriltags if tag.id in self.layout.corners]
+        if not known:
+            return None
+
+        object_points = np.concatenate([self.layout.corners[tag.id] for tag in known])
+        image_points = np.concatenate([tag.corners for tag in known]).astype(np.float64)
+
+        # One tag is a planar square with two plausible solutions; more tags pin the pose down
+        flags = cv2.SOLVEPNP_IPPE if len(known) == 1 else cv2.SOLVEPNP_SQPNP
+        solutions, rvecs, tvecs, errors = cv2.solvePnPGeneric(object_points, image_points, self.camera_matrix,
+                                                              self.distortion, flags=flags)
+        if not solutions:
+            instrumentation.count("pose.rejected")
+            return None
+
+        errors = np.ravel(errors)
+        best = int(np.argmin(errors))
+        ambiguous = len(errors) > 1 and errors[best] > FieldConfig.MAX_AMBIGUITY * np.delete(errors, best).min()
+        if errors[best] > FieldConfig.MAX_REPROJECTION_ERROR_IN_PIXELS or ambiguous:
+            instrumentation.count("pose.rejected")
+            self.logger.debug(f"Discarded pose from tags {[tag.id for tag in known]}: error {errors[best]:.2f} px")
+            return None
+
+        instrumentation.count("pose.solved")
+        rotation, _ = cv2.Rodrigues(rvecs[best])
+        return FieldPose(self.layout, rotation, np.ravel(tvecs[best]), [tag.id for tag in known], float(errors[best]), timestamp)
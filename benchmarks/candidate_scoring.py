@@ -0,0 +1,57 @@
+import timeit
+from typing import List
+
+import numpy as np
+
+from config import CameraConfig, AutoAlgaeConfig
+from vision_tracking.detection_batch import DetectionBatch, DetectionView
+from decision_engine.autoalgae import AlgaePickupCommand
+from decision_engine.trackable_objects import Algae
+
+###############################################################
+
+DETECTION_COUNTS: List[int] = [1, 10, 50, 100, 300]
+REPEATS: int = 500
+
+def loop_score(algae: Algae) -> float:
+    return (AutoAlgaeConfig.ALGAE_CONFIDENCE_WEIGHT * algae.confidence +
+            AutoAlgaeConfig.ALGAE_DISTANCE_WEIGHT * ((AutoAlgaeConfig.ALGAE_MAX_DISTANCE_IN_MM - algae.distance) / AutoAlgaeConfig.ALGAE_MAX_DISTANCE_IN_MM) +
+            AutoAlgaeConfig.ALGAE_ANGULAR_WEIGHT * (1 - abs(algae.angle) / 180))
+
+def loop_path(algaes: DetectionView) -> Algae:
+    """Build every object and compare scores pairwise, as compute_best_algae(*algaes) did."""
+    best_piece = None
+    for piece in algaes:
+        if all(getattr(piece, attr, None) is not None for attr in ('confidence', 'distance', 'angle')):
+            if best_piece is None or loop_score(piece) > loop_score(best_piece):
+                best_piece = piece
+    return best_piece
+
+def make_view(rng: np.random.Generator, count: int) -> DetectionView:
+    x1 = rng.integers(0, CameraConfig.FRAME_WIDTH - 200, count)
+    y1 = rng.integers(0, CameraConfig.FRAME_HEIGHT - 200, count)
+    size = rng.integers(5, 200, count)
+    boxes = np.stack((x1, y1, x1 + size, y1 + size), axis=1)
+    batch = DetectionBatch(boxes, rng.uniform(0.25, 1.0, count), np.zeros(count, dtype=np.int32), 0.0)
+    return batch.of(Algae)
+
+def make_view_copy(view: DetectionView) -> DetectionView:
+    return DetectionView(view.batch, view.indices, view.object_type)
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    autoalgae = AlgaePickupCommand()
+    print(f"{'detections':>10} {'loop (us)':>12} {'vector (us)':>12} {'speedup':>8}")
+
+    for count in DETECTION_COUNTS:
+        view = make_view(rng, count)
+        positions, _ = autoalgae.rank_algaes(view, 1)
+        assert loop_path(make_view_copy(view)).x == view[int(positions[0])].x
+
+        # A fresh view each call, since the loop path would otherwise reuse the objects it built last time
+        loop = timeit.timeit(lambda: loop_path(make_view_copy(view)), number=REPEATS) / REPEATS
+        vector = timeit.timeit(lambda: autoalgae.rank_algaes(make_view_copy(view), 1), number=REPEATS) / REPEATS
+        print(f"{count:>10} {loop * 1e6:>12.1f} {vector * 1e6:>12.1f} {loop / vector:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+import json
+import time
+import argparse
+from typing import List, Tuple
+
+import numpy as np
+from networktables import NetworkTables
+
+from config import NetworkingConfig
+from networking.rio_communication import CommandThrottle, RoboRio
+
+###############################################################
+
+MATCH_FRAMES: int = 150 * 60        # a 2:30 match at 60 fps
+
+def make_commands(frames: int, seed: int = 0) -> List[Tuple[float, float, float, bool, float]]:
+    """A drive command per frame: smooth approaches to targets with detector jitter and occasional losses."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(frames) / 60
+    x = 60 * np.abs(np.sin(t / 3)) + rng.normal(0, 0.3, frames)
+    y = 20 * np.sin(t / 2) + rng.normal(0, 0.3, frames)
+    rot = 30 * np.sin(t / 5) + rng.normal(0, 0.2, frames)
+    success = rng.random(frames) > 0.05
+    capture_time = time.time() + t
+    return [(float(x[i]), float(y[i]), float(rot[i]), bool(success[i]), float(capture_time[i])) for i in range(frames)]
+
+def time_json(table, commands) -> Tuple[float, int]:
+    """The previous path: a dict serialized to JSON in a string entry, every frame."""
+    payload_bytes = 0
+    start = time.perf_counter()
+    for x, y, rot, success, _ in commands:
+        json_data = json.dumps({"x": x, "y": y, "rot": rot, "success": success})
+        table.putString(NetworkingConfig.DATA_ENTRY_NAME, json_data)
+        payload_bytes += len(json_data)
+    return time.perf_counter() - start, payload_bytes
+
+def time_packed(table, commands, throttled: bool) -> Tuple[float, int, int]:
+    throttle = CommandThrottle()
+    published = 0
+    start = time.perf_counter()
+    for index, (x, y, rot, success, capture_time) in enumerate(commands):
+        # replay at the camera rate without sleeping so the rate cap sees real frame spacing
+        if throttled and not throttle.accept(x, y, rot, success, index / 60):
+            continue
+        published += 1
+        table.putNumberArray(NetworkingConfig.COMMAND_ENTRY_NAME,
+                             (x, y, rot, float(success), capture_time, float(published), time.time() - capture_time))
+    return time.perf_counter() - start, published * len(RoboRio.COMMAND_SCHEMA) * 8, published
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare the JSON string and packed number array command channels.")
+    parser.add_argument("--frames", type=int, default=MATCH_FRAMES)
+    args = parser.parse_args()
+
+    NetworkTables.startTestMode(server=True)
+    table = NetworkTables.getTable(NetworkingConfig.NETWORK_TABLE_NAME)
+    commands = make_commands(args.frames)
+
+    json_time, json_bytes = time_json(table, commands)
+    packed_time, packed_bytes, _ = time_packed(table, commands, throttled=False)
+    throttled_time, throttled_bytes, published = time_packed(table, commands, throttled=True)
+
+    print(f"{len(commands)} commands ({len(commands) / 60:.0f} s at 60 fps)")
+    print(f"{'channel':<18} {'us/command':>10} {'published':>10} {'payload kB':>11}")
+    print(f"{'json string':<18} {json_time / len(commands) * 1e6:>10.2f} {len(commands):>10} {json_bytes / 1000:>11.1f}")
+    print(f"{'packed array':<18} {packed_time / len(commands) * 1e6:>10.2f} {len(commands):>10} {packed_bytes / 1000:>11.1f}")
+    print(f"{'packed, throttled':<18} {throttled_time / len(commands) * 1e6:>10.2f} {published:>10} {throttled_bytes / 1000:>11.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+import timeit
+from typing import List, Tuple
+
+import torch
+import numpy as np
+from ultralytics.engine.results import Boxes
+
+from config import CameraConfig, YOLOConfig
+from vision_tracking.video_analyser import YOLODetector
+
+###############################################################
+
+DETECTION_COUNTS: List[int] = [0, 1, 10, 50, 100, 200, 300]
+REPEATS: int = 200
+
+def make_boxes(count: int) -> Boxes:
+    """Build an ultralytics Boxes object holding random xyxy/conf/cls rows."""
+    generator = torch.Generator().manual_seed(count)
+    top_left = torch.rand((count, 2), generator=generator) * (CameraConfig.FRAME_WIDTH - 50)
+    size = torch.rand((count, 2), generator=generator) * 50 + 1
+    confidence = torch.rand((count, 1), generator=generator)
+    class_id = torch.randint(0, 4, (count, 1), generator=generator).float()
+    data = torch.cat([top_left, top_left + size, confidence, class_id], dim=1)
+    return Boxes(data, (CameraConfig.FRAME_HEIGHT, CameraConfig.FRAME_WIDTH))
+
+def extract_per_box(boxes: Boxes, confidence_threshold: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """The previous per-box extraction loop, kept as the reference implementation."""
+    boxes_out, confidences, class_ids = [], [], []
+    for box in boxes:
+        x1, y1, x2, y2 = map(int, box.xyxy[0].cpu().numpy())
+        confidence = float(box.conf[0])
+        if confidence >= confidence_threshold:
+            boxes_out.append([x1, y1, x2, y2])
+            confidences.append(confidence)
+            class_ids.append(int(box.cls[0]))
+    return np.array(boxes_out), np.array(confidences), np.array(class_ids)
+
+def extract_batched(boxes: Boxes, confidence_threshold: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    return YOLODetector.filter_detections(boxes.data.cpu().numpy(), confidence_threshold)
+
+def main() -> None:
+    threshold = YOLOConfig.CONFIDENCE_THRESHOLD
+    print(f"{'detections':>10} {'per-box (us)':>14} {'batched (us)':>14} {'speedup':>8}")
+
+    for count in DETECTION_COUNTS:
+        boxes = make_boxes(count)
+
+        expected = extract_per_box(boxes, threshold)
+        actual = extract_batched(boxes, threshold)
+        assert np.array_equal(expected[0].reshape(-1, 4), actual[0])
+        assert np.array_equal(expected[2], actual[2])
+
+        per_box = timeit.timeit(lambda: extract_per_box(boxes, threshold), number=REPEATS) / REPEATS
+        batched = timeit.timeit(lambda: extract_batched(boxes, threshold), number=REPEATS) / REPEATS
+        print(f"{count:>10} {per_box * 1e6:>14.1f} {batched * 1e6:>14.1f} {per_box / batched:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import time
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+
+from config import DisplayConfig, YOLOConfig
+from vision_tracking.video_analyser import YOLODetector
+from vision_tracking.onnx_detector import ONNXDetector
+from vision_tracking.object_tracker import ObjectTracker
+
+###############################################################
+
+MAX_FRAMES: int = 300
+WARMUP_FRAMES: int = 5
+MATCH_IOU: float = 0.9
+
+def read_frames(path: str, limit: int) -> List[np.ndarray]:
+    cap = cv2.VideoCapture(path)
+    frames = []
+    while cap.isOpened() and len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+def time_detector(detector, frames: List[np.ndarray]) -> Tuple[List, np.ndarray]:
+    """Run the detector on every frame, returning its detections and per-frame latency in seconds."""
+    for frame in frames[:WARMUP_FRAMES]:
+        detector.detect(frame)
+
+    results, latencies = [], []
+    for frame in frames:
+        start = time.perf_counter()
+        results.append(detector.detect(frame))
+        latencies.append(time.perf_counter() - start)
+    return results, np.array(latencies)
+
+def count_matches(expected, actual) -> Tuple[int, int, int]:
+    """Count same-class detections whose boxes overlap by at least MATCH_IOU."""
+    expected_boxes, _, expected_classes = expected
+    actual_boxes, _, actual_classes = actual
+    if len(expected_boxes) == 0 or len(actual_boxes) == 0:
+        return 0, len(expected_boxes), len(actual_boxes)
+
+    iou = ObjectTracker.iou_matrix(expected_boxes.astype(np.float32), actual_boxes.astype(np.float32))
+    iou[expected_classes[:, None] != actual_classes[None, :]] = 0
+    return int((iou.max(axis=1) >= MATCH_IOU).sum()), len(expected_boxes), len(actual_boxes)
+
+def main() -> None:
+    frames = read_frames(DisplayConfig.INPUT_VIDEO_PATH, MAX_FRAMES)
+    print(f"{len(frames)} frames from {DisplayConfig.INPUT_VIDEO_PATH}")
+
+    ultralytics_results, ultralytics_latency = time_detector(
+        YOLODetector(YOLOConfig.WEIGHTS_LOCATION, YOLOConfig.CONFIDENCE_THRESHOLD, YOLOConfig.NUM_THREADS), frames)
+    onnx_results, onnx_latency = time_detector(
+        ONNXDetector(YOLOConfig.WEIGHTS_LOCATION, YOLOConfig.CONFIDENCE_THRESHOLD, YOLOConfig.NUM_THREADS), frames)
+
+    matched = expected = actual = 0
+    for ultralytics_result, onnx_result in zip(ultralytics_results, onnx_results):
+        frame_matched, frame_expected, frame_actual = count_matches(ultralytics_result, onnx_result)
+        matched += frame_matched
+        expected += frame_expected
+        actual += frame_actual
+
+    for name, latency in (("ultralytics", ultralytics_latency), ("onnxruntime", onnx_latency)):
+        print(f"{name:<12} mean {latency.mean() * 1000:7.2f} ms   p95 {np.percentile(latency, 95) * 1000:7.2f} ms")
+    print(f"speedup      {ultralytics_latency.mean() / onnx_latency.mean():.2f}x")
+    print(f"agreement    {matched}/{expected} ultralytics detections matched, {actual} onnxruntime detections")
+
+if __name__ == "__main__":
+    main()
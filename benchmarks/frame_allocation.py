@@ -0,0 +1,81 @@
+import time
+import argparse
+import tracemalloc
+from typing import Callable, List
+
+import cv2
+import numpy as np
+
+from config import CameraConfig, PipelineConfig
+from apriltags.apriltag_finder import AprilTagFinder
+from vision_tracking.frame_buffers import FrameTransform, FrameBufferRing
+
+###############################################################
+
+def legacy_path(frame: np.ndarray, finder: AprilTagFinder) -> None:
+    """Rotate and flip as separate allocating calls, then one grayscale for optical flow and another for the tags."""
+    frame = cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
+    frame = cv2.flip(frame, 1)
+    gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+    finder.find_apriltags(frame)
+
+def buffered_path(frame: np.ndarray, finder: AprilTagFinder, transform: FrameTransform, ring: FrameBufferRing) -> None:
+    """The fused transform and a shared grayscale plane, both written into a ring slot."""
+    buffers = ring.next(transform.output_shape(frame.shape))
+    frame = transform.apply(frame, buffers.color)
+    gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=buffers.gray)
+    finder.find_apriltags(frame, gray_frame)
+
+def measure(name: str, frames: List[np.ndarray], step: Callable[[np.ndarray], None]) -> None:
+    for frame in frames[:5]:
+        step(frame)
+
+    peaks = []
+    tracemalloc.start()
+    for frame in frames:
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        step(frame)
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    for frame in frames:
+        step(frame)
+    elapsed = (time.perf_counter() - start) / len(frames)
+
+    print(f"{name:<10} {np.mean(peaks) / 1024:>10.1f} KiB/frame {np.max(peaks) / 1024:>10.1f} KiB max {elapsed * 1000:>8.2f} ms/frame")
+
+def load_frames(video_path: str, count: int) -> List[np.ndarray]:
+    if not video_path:
+        rng = np.random.default_rng(0)
+        return [rng.integers(0, 256, (CameraConfig.FRAME_HEIGHT, CameraConfig.FRAME_WIDTH, 3), dtype=np.uint8)
+                for _ in range(count)]
+
+    cap = cv2.VideoCapture(video_path)
+    frames = []
+    while len(frames) < count:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Bytes allocated per frame by the transform and grayscale stages, before and after the frame buffer ring.")
+    parser.add_argument("--video", default="", help="read frames from a video instead of generating noise")
+    parser.add_argument("--frames", type=int, default=200)
+    args = parser.parse_args()
+
+    frames = load_frames(args.video, args.frames)
+    transform = FrameTransform(rotate=True, flip_horizontally=True, flip_vertically=False)
+    ring = FrameBufferRing(PipelineConfig.FRAME_BUFFER_SLOTS, transform.output_shape(frames[0].shape))
+    print(f"{len(frames)} frames of {frames[0].shape}, rotated and flipped, fused into {transform.steps}")
+
+    legacy_finder, buffered_finder = AprilTagFinder(), AprilTagFinder()
+    measure("legacy", frames, lambda frame: legacy_path(frame, legacy_finder))
+    measure("buffered", frames, lambda frame: buffered_path(frame, buffered_finder, transform, ring))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import os
+import time
+import logging
+import tempfile
+import argparse
+from typing import Callable, Dict, List
+
+import numpy as np
+
+from config import LoggingConfig
+from logs.logging_setup import LOG_FORMAT, AsyncLogWriter, DroppingQueueHandler, RateLimitFilter
+
+###############################################################
+
+def log_frame(logger: logging.Logger, frame_index: int) -> None:
+    """The messages the frame loop emits for one frame while driving to an algae."""
+    x, y, rot = np.sin(frame_index / 30), np.cos(frame_index / 30), frame_index % 90
+    logger.info(f'[TEST] Algae Nav → X: {x:.2f}, Y: {y:.2f}, ROT: {rot:.2f}')
+    logger.info(f"Algae navigation command: x={x}, y={y}, rot={rot}")
+    logger.info("Data successfully posted to NetworkTables")
+    logger.debug("Tracker update: 6 detections, 5 tracks, 0.41 ms")
+
+def sync_logger(name: str, log_dir: str) -> Callable[[], None]:
+    """The previous setup: a FileHandler that writes and flushes on the calling thread."""
+    handler = logging.FileHandler(os.path.join(log_dir, f"{name}.log"))
+    handler.setFormatter(logging.Formatter(LOG_FORMAT))
+    logging.getLogger(name).addHandler(handler)
+    return handler.close
+
+def async_logger(name: str, log_dir: str, rate_limited: bool) -> Callable[[], None]:
+    writer = AsyncLogWriter()
+    writer.add_file(name, os.path.join(log_dir, f"{name}.log"))
+    logger = logging.getLogger(name)
+    logger.addHandler(DroppingQueueHandler(writer))
+    if rate_limited:
+        logger.addFilter(RateLimitFilter())
+    return writer.stop
+
+def run(name: str, frames: int, fps: float, log_dir: str) -> np.ndarray:
+    """Time the logging calls of each frame, pacing frames at the camera rate so the writer can keep up."""
+    logger = logging.getLogger(name)
+    logger.setLevel(LoggingConfig.LOG_LEVEL)
+    logger.propagate = False
+    close = {
+        "sync": lambda: sync_logger(name, log_dir),
+        "async": lambda: async_logger(name, log_dir, rate_limited=False),
+        "async_rate_limited": lambda: async_logger(name, log_dir, rate_limited=True),
+    }[name]()
+
+    samples = np.empty(frames)
+    frame_period = 1 / fps if fps > 0 else 0.0
+    next_frame = time.perf_counter()
+    for frame_index in range(frames):
+        start = time.perf_counter()
+        log_frame(logger, frame_index)
+        samples[frame_index] = time.perf_counter() - start
+
+        next_frame += frame_period
+        delay = next_frame - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+    close()
+    return samples * 1000
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure how much per-frame logging adds to frame latency.")
+    parser.add_argument("--frames", type=int, default=600)
+    parser.add_argument("--fps", type=float, default=60.0, help="frame pacing, 0 runs flat out")
+    args = parser.parse_args()
+
+    log_dir = tempfile.mkdtemp()
+    results: Dict[str, np.ndarray] = {}
+    for name in ("sync", "async", "async_rate_limited"):
+        results[name] = run(name, args.frames, args.fps, log_dir)
+
+    print(f"{args.frames} frames at {args.fps:.0f} fps, logging time per frame (ms)")
+    print(f"{'backend':<20} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for name, samples in results.items():
+        print(f"{name:<20} {samples.mean():>8.3f} {np.percentile(samples, 50):>8.3f} "
+              f"{np.percentile(samples, 95):>8.3f} {np.percentile(samples, 99):>8.3f} {samples.max():>8.3f}")
+
+    lines: List[str] = [f"{name}: {sum(1 for _ in open(os.path.join(log_dir, f'{name}.log')))} lines written"
+                        for name in results]
+    print(", ".join(lines))
+
+if __name__ == "__main__":
+    main()
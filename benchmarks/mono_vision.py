@@ -0,0 +1,41 @@
+import timeit
+from typing import List
+
+import numpy as np
+
+from config import CameraConfig, AutoAlgaeConfig
+from camera_calculations.mono_video import MonoVision
+
+###############################################################
+
+DETECTION_COUNTS: List[int] = [1, 10, 50, 100, 300]
+REPEATS: int = 500
+
+def scalar_path(xs: np.ndarray, widths_in_pixels: np.ndarray) -> List:
+    """One get_distance/get_angle call per detection, as the per-object code did."""
+    return [(MonoVision.get_distance_to_object_in_mm(AutoAlgaeConfig.ALGAE_SIZE_IN_MM, width),
+             MonoVision.get_angle_to_object_in_degrees(x))
+            for x, width in zip(xs.tolist(), widths_in_pixels.tolist())]
+
+def batch_path(xs: np.ndarray, widths_in_pixels: np.ndarray):
+    return MonoVision.find_distance_and_angle(xs, AutoAlgaeConfig.ALGAE_SIZE_IN_MM, widths_in_pixels)
+
+def main() -> None:
+    rng = np.random.default_rng(0)
+    print(f"{'detections':>10} {'scalar (us)':>12} {'batch (us)':>12} {'speedup':>8}")
+
+    for count in DETECTION_COUNTS:
+        xs = rng.integers(0, CameraConfig.FRAME_WIDTH, count).astype(np.int32)
+        widths_in_pixels = rng.uniform(5, 200, count).astype(np.float32)
+
+        expected = np.array(scalar_path(xs, widths_in_pixels))
+        distances, angles = batch_path(xs, widths_in_pixels)
+        assert np.allclose(expected[:, 0], distances, rtol=1e-5)
+        assert np.allclose(expected[:, 1], angles, atol=1e-4)
+
+        scalar = timeit.timeit(lambda: scalar_path(xs, widths_in_pixels), number=REPEATS) / REPEATS
+        batch = timeit.timeit(lambda: batch_path(xs, widths_in_pixels), number=REPEATS) / REPEATS
+        print(f"{count:>10} {scalar * 1e6:>12.1f} {batch * 1e6:>12.1f} {scalar / batch:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+import gc
+import time
+import tracemalloc
+from typing import Dict, List, Optional, Type
+
+import numpy as np
+
+from config import CameraConfig
+from decision_engine.trackable_objects import Object, ObjectPool
+from vision_tracking.detection_batch import DetectionBatch, DetectionView
+
+###############################################################
+
+MATCH_FRAMES: int = 150 * 60        # a 2:30 match at 60 fps
+MAX_DETECTIONS_PER_FRAME: int = 24
+SIZE_SAMPLE: int = 1000
+
+class LegacyObject:
+    """The previous dict-backed trackable object, kept as the reference implementation."""
+    def __init__(self):
+        self.x = None
+        self.y = None
+        self.scale = None
+        self.ratio = None
+        self.confidence = None
+        self.distance = None
+        self.angle = None
+        self.timestamp = None
+
+    def update_frame_location(self, x, y, s, r, timestamp):
+        self.x, self.y, self.scale, self.ratio, self.timestamp = x, y, s, r, timestamp
+
+    def update_confidence(self, conf):
+        self.confidence = conf
+
+    def update_relative_location(self, distance, angle):
+        self.distance = distance
+        self.angle = angle
+
+def make_match(seed: int = 0) -> List[DetectionBatch]:
+    """Generate a match worth of detection batches with a varying number of pieces per frame."""
+    rng = np.random.default_rng(seed)
+    batches = []
+    for frame_index in range(MATCH_FRAMES):
+        count = int(rng.integers(0, MAX_DETECTIONS_PER_FRAME))
+        top_left = rng.integers(0, CameraConfig.FRAME_WIDTH - 60, (count, 2))
+        boxes = np.hstack([top_left, top_left + rng.integers(5, 60, (count, 2))]).astype(np.int32)
+        confidences = rng.random(count).astype(np.float32)
+        class_ids = rng.integers(0, len(DetectionBatch.OBJECT_TYPES), count).astype(np.int32)
+        batches.append(DetectionBatch(boxes, confidences, class_ids, frame_index / 60))
+    return batches
+
+def replay(batches: List[DetectionBatch], object_types: Dict[Type[Object], type], pools: Optional[Dict[Type[Object], ObjectPool]]) -> None:
+    """Materialize every detection of every frame, as the decision engine would."""
+    for batch in batches:
+        if pools is not None:
+            for pool in pools.values():
+                pool.release_all()
+        batch.pools = pools
+
+        for object_type in DetectionBatch.OBJECT_TYPES:
+            view = batch.of(object_type)
+            view = DetectionView(batch, view.indices, object_types[object_type])
+            for _ in view:
+                pass
+
+def measure(name: str, batches: List[DetectionBatch], object_types: Dict[Type[Object], type], pools: Optional[Dict[Type[Object], ObjectPool]]) -> None:
+    gc.collect()
+    collections_before = sum(stats['collections'] for stats in gc.get_stats())
+    start = time.perf_counter()
+    replay(batches, object_types, pools)
+    elapsed = time.perf_counter() - start
+    collections = sum(stats['collections'] for stats in gc.get_stats()) - collections_before
+
+    tracemalloc.start()
+    sample = [object_types[DetectionBatch.OBJECT_TYPES[0]]() for _ in range(SIZE_SAMPLE)]
+    bytes_per_object = tracemalloc.get_traced_memory()[0] / SIZE_SAMPLE
+    tracemalloc.stop()
+    del sample
+
+    print(f"{name:<18} {elapsed * 1000:>10.1f} ms {collections:>8} GC runs {bytes_per_object:>8.0f} B/object")
+
+def main() -> None:
+    batches = make_match()
+    detections = sum(len(batch) for batch in batches)
+    print(f"{MATCH_FRAMES} frames, {detections} detections")
+
+    legacy_types = {object_type: LegacyObject for object_type in DetectionBatch.OBJECT_TYPES}
+    slotted_types = {object_type: object_type for object_type in DetectionBatch.OBJECT_TYPES}
+    pools = {object_type: ObjectPool(object_type) for object_type in DetectionBatch.OBJECT_TYPES}
+
+    measure("dict objects", batches, legacy_types, None)
+    measure("slotted objects", batches, slotted_types, None)
+    measure("slotted + pool", batches, slotted_types, pools)
+
+if __name__ == "__main__":
+    main()
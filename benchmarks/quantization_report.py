@@ -0,0 +1,74 @@
+import os
+from typing import Dict, List
+
+import numpy as np
+
+from config import DisplayConfig, YOLOConfig
+from vision_tracking.onnx_detector import ONNXDetector
+from vision_tracking.object_tracker import ObjectTracker
+from vision_tracking.detection_batch import DetectionBatch
+from benchmarks.detector_backends import read_frames, time_detector
+
+###############################################################
+
+MAX_FRAMES: int = 300
+MATCH_IOU: float = 0.5
+
+def class_matches(reference, candidate, class_id: int) -> List[int]:
+    """True positives, reference count and candidate count for one class."""
+    reference_boxes = reference[0][reference[2] == class_id].astype(np.float32)
+    candidate_boxes = candidate[0][candidate[2] == class_id].astype(np.float32)
+    if len(reference_boxes) == 0 or len(candidate_boxes) == 0:
+        return [0, len(reference_boxes), len(candidate_boxes)]
+
+    iou = ObjectTracker.iou_matrix(reference_boxes, candidate_boxes)
+    true_positives = 0
+    while iou.size and iou.max() >= MATCH_IOU:
+        row, col = np.unravel_index(iou.argmax(), iou.shape)
+        iou[row, :] = iou[:, col] = 0
+        true_positives += 1
+    return [true_positives, len(reference_boxes), len(candidate_boxes)]
+
+def main() -> None:
+    """Compare each precision against FP32, which stands in for ground truth on unlabelled footage."""
+    frames = read_frames(DisplayConfig.INPUT_VIDEO_PATH, MAX_FRAMES)
+    print(f"{len(frames)} frames from {DisplayConfig.INPUT_VIDEO_PATH}, "
+          f"confidence threshold {YOLOConfig.CONFIDENCE_THRESHOLD}, match IoU {MATCH_IOU}")
+
+    results: Dict[str, List] = {}
+    latencies: Dict[str, np.ndarray] = {}
+    for precision, weights_location in YOLOConfig.WEIGHTS_BY_PRECISION.items():
+        if not os.path.exists(weights_location):
+            print(f"{precision}: {weights_location} not found, run python -m vision_tracking.model_quantizer")
+            continue
+        detector = ONNXDetector(weights_location, YOLOConfig.CONFIDENCE_THRESHOLD, YOLOConfig.NUM_THREADS)
+        results[precision], latencies[precision] = time_detector(detector, frames)
+
+    if "fp32" not in results:
+        # FP32 is the reference for both the speedup and precision / recall, so only latency can be reported
+        print(f"\nNo fp32 reference at {YOLOConfig.WEIGHTS_BY_PRECISION['fp32']}, reporting latency only")
+        print(f"{'precision':<10} {'mean ms':>8} {'p95 ms':>8}")
+        for precision, latency in latencies.items():
+            print(f"{precision:<10} {latency.mean() * 1000:>8.2f} {np.percentile(latency, 95) * 1000:>8.2f}")
+        return
+
+    reference_latency = latencies["fp32"].mean()
+    print(f"\n{'precision':<10} {'mean ms':>8} {'p95 ms':>8} {'speedup':>8}  " +
+          "  ".join(f"{object_type.__name__ + ' P/R':>14}" for object_type in DetectionBatch.OBJECT_TYPES))
+
+    for precision in results:
+        cells = []
+        for class_id in range(len(DetectionBatch.OBJECT_TYPES)):
+            totals = np.sum([class_matches(reference, candidate, class_id)
+                             for reference, candidate in zip(results["fp32"], results[precision])], axis=0)
+            true_positives, reference_count, candidate_count = totals
+            precision_score = true_positives / candidate_count if candidate_count else float('nan')
+            recall_score = true_positives / reference_count if reference_count else float('nan')
+            cells.append(f"{precision_score:>6.2f}/{recall_score:<6.2f} ")
+
+        latency = latencies[precision]
+        print(f"{precision:<10} {latency.mean() * 1000:>8.2f} {np.percentile(latency, 95) * 1000:>8.2f} "
+              f"{reference_latency / latency.mean():>7.2f}x  " + "  ".join(cells))
+
+if __name__ == "__main__":
+    main()
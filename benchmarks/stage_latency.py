@@ -0,0 +1,141 @@
+import os
+import sys
+import json
+import time
+import tempfile
+import argparse
+from typing import Dict, List, Optional
+
+import cv2
+import numpy as np
+
+from config import DisplayConfig
+from vision_tracking.video_display import VideoDisplay
+from vision_tracking.video_processor import FrameProcessor
+from decision_engine.autoalgae import AlgaePickupCommand
+from decision_engine.trackable_objects import Algae
+
+###############################################################
+
+STAGES: List[str] = [
+    "decode", "transform_frame", "detect", "apply_nms", "find_apriltags",
+    "update_game_pieces", "decision", "annotate", "encode",
+]
+DEFAULT_OUTPUT: str = "benchmarks/results/stage_latency.json"
+DEFAULT_TOLERANCE: float = 0.10
+
+def replay(video_path: str, max_frames: int) -> Dict[str, List[float]]:
+    """Run every pipeline stage on each frame of the video, timing them separately."""
+    frame_processor = FrameProcessor()
+    autoalgae = AlgaePickupCommand()
+    timings: Dict[str, List[float]] = {stage: [] for stage in STAGES}
+
+    cap = cv2.VideoCapture(video_path)
+    encoded_path = os.path.join(tempfile.mkdtemp(), "encoded.mp4")
+    out: Optional[cv2.VideoWriter] = None
+
+    def timed(stage: str, function, *args):
+        start = time.perf_counter()
+        result = function(*args)
+        timings[stage].append(time.perf_counter() - start)
+        return result
+
+    try:
+        while cap.isOpened() and len(timings["decode"]) < max_frames:
+            ret, frame = timed("decode", cap.read)
+            if not ret:
+                timings["decode"].pop()
+                break
+
+            buffers = frame_processor.next_buffers(frame)
+            frame = timed("transform_frame", frame_processor.transform_frame, frame, buffers.color)
+            boxes, confidences, class_ids = timed("detect", frame_processor.yolo_detector.detect, frame)
+            indices = timed("apply_nms", frame_processor.apply_nms, boxes, confidences)
+            boxes, confidences, class_ids = boxes[indices], confidences[indices], class_ids[indices]
+            apriltags = timed("find_apriltags", frame_processor.apriltag_detector.find_apriltags, frame)
+            timed("update_game_pieces", frame_processor.update_game_pieces, boxes, confidences, class_ids, time.time())
+
+            def decide():
+                best_algae = autoalgae.compute_best_algae(frame_processor.game_pieces.of(Algae))
+                return autoalgae.get_algae_navigation_command(best_algae)
+            timed("decision", decide)
+
+            annotated = timed("annotate", VideoDisplay.annotate_frame, frame.copy(), boxes, class_ids, apriltags)
+            # Sized from the transformed frame, since a writer silently drops frames of any other size
+            if out is None:
+                height, width = annotated.shape[:2]
+                out = cv2.VideoWriter(encoded_path, cv2.VideoWriter_fourcc(*'mp4v'), 60.0, (width, height), True)
+            timed("encode", out.write, annotated)
+    finally:
+        cap.release()
+        if out:
+            out.release()
+        frame_processor.close()
+
+    return timings
+
+def summarize(timings: Dict[str, List[float]], wall_time: float) -> Dict:
+    stages = {}
+    for stage, samples in timings.items():
+        samples_ms = np.array(samples) * 1000
+        if len(samples_ms) == 0:
+            continue
+        stages[stage] = {
+            "mean_ms": float(samples_ms.mean()),
+            "p50_ms": float(np.percentile(samples_ms, 50)),
+            "p95_ms": float(np.percentile(samples_ms, 95)),
+            "p99_ms": float(np.percentile(samples_ms, 99)),
+        }
+
+    frames = len(timings["decode"])
+    return {
+        "frames": frames,
+        "throughput_fps": frames / wall_time if wall_time else 0.0,
+        "frame_mean_ms": sum(stage["mean_ms"] for stage in stages.values()),
+        "stages": stages,
+    }
+
+def find_regressions(results: Dict, baseline: Dict, tolerance: float) -> List[str]:
+    """List every stage whose p95 grew by more than the tolerance over the baseline."""
+    regressions = []
+    for stage, stats in results["stages"].items():
+        baseline_stats = baseline["stages"].get(stage)
+        if baseline_stats and stats["p95_ms"] > baseline_stats["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{stage}: p95 {baseline_stats['p95_ms']:.2f} ms -> {stats['p95_ms']:.2f} ms")
+    return regressions
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay recorded footage headlessly and time every pipeline stage.")
+    parser.add_argument("--video", default=DisplayConfig.INPUT_VIDEO_PATH)
+    parser.add_argument("--frames", type=int, default=1000)
+    parser.add_argument("--output", default=DEFAULT_OUTPUT)
+    parser.add_argument("--baseline", help="results file to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE, help="allowed p95 growth, e.g. 0.1 for 10%%")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    timings = replay(args.video, args.frames)
+    results = summarize(timings, time.perf_counter() - start)
+    results["video"] = args.video
+
+    print(f"{results['frames']} frames, {results['throughput_fps']:.1f} fps, {results['frame_mean_ms']:.2f} ms per frame")
+    print(f"{'stage':<20} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8}  (ms)")
+    for stage, stats in results["stages"].items():
+        print(f"{stage:<20} {stats['mean_ms']:>8.2f} {stats['p50_ms']:>8.2f} {stats['p95_ms']:>8.2f} {stats['p99_ms']:>8.2f}")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as results_file:
+        json.dump(results, results_file, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            regressions = find_regressions(results, json.load(baseline_file), args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"No stage regressed by more than {args.tolerance * 100:.0f}% against {args.baseline}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import time
+import argparse
+from typing import List
+
+import cv2
+import numpy as np
+
+from vision_tracking.stream_grabber import StreamGrabber
+from tests.mjpeg_server import MJPEGServer
+
+###############################################################
+
+def measure(capture, server: MJPEGServer, frames: int, inference_seconds: float) -> np.ndarray:
+    """Read frames like a pipeline whose inference is slower than the stream, recording each frame's age."""
+    ages: List[float] = []
+    deadline = time.time() + frames * max(inference_seconds, 1 / server.fps) * 4 + 10
+    while len(ages) < frames and time.time() < deadline:
+        ret, frame = capture.read()
+        if not ret:
+            continue
+        sent_at = server.sent_at.get(MJPEGServer.decode_number(frame))
+        if sent_at is not None:
+            ages.append(time.time() - sent_at)
+        time.sleep(inference_seconds)
+    return np.array(ages) * 1000
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare frame age from cv2.VideoCapture and StreamGrabber on a local MJPEG stream.")
+    parser.add_argument("--port", type=int, default=5899)
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--frames", type=int, default=100)
+    parser.add_argument("--inference-ms", type=float, default=60.0, help="simulated per-frame processing time")
+    parser.add_argument("--outage-after", type=int, default=0, help="drop the stream after this many frames to test reconnects")
+    parser.add_argument("--outage-seconds", type=float, default=1.0)
+    args = parser.parse_args()
+
+    for name in ("cv2.VideoCapture", "StreamGrabber"):
+        server = MJPEGServer(args.port, args.fps, args.outage_after, args.outage_seconds)
+        server.start()
+        capture = cv2.VideoCapture(server.url) if name == "cv2.VideoCapture" else StreamGrabber(server.url)
+        ages = measure(capture, server, args.frames, args.inference_ms / 1000)
+        capture.release()
+        server.stop()
+
+        line = f"{name:<18} frames={len(ages):>4} age p50={np.percentile(ages, 50):7.1f} ms p95={np.percentile(ages, 95):7.1f} ms"
+        if isinstance(capture, StreamGrabber):
+            line += f"  dropped={capture.dropped} late={capture.late} reconnects={capture.reconnects}"
+        print(line)
+
+if __name__ == "__main__":
+    main()
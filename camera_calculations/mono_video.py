@@ -1,14 +1,53 @@
 import math
+from typing import Tuple
+
+import numpy as np
 
 from config import CameraConfig
 
 class MonoVision:
+    # Calibration constants, computed once from CameraConfig
+    FOCAL_LENGTH_IN_PIXELS: float = CameraConfig.FRAME_WIDTH / (2 * math.tan(math.radians(CameraConfig.HORIZONTAL_FOV) / 2))
+    CENTER_X: float = CameraConfig.FRAME_WIDTH / 2
+    ANGLE_TABLE: np.ndarray = np.degrees(np.arctan(
+        (np.arange(CameraConfig.FRAME_WIDTH, dtype=np.float64) - CENTER_X) / FOCAL_LENGTH_IN_PIXELS)).astype(np.float32)
+
     @staticmethod
     def get_distance_to_object_in_mm(object_width_in_mm, object_width_in_pixels) -> float:
         """Calculate the distance and angle offset of an object."""
-        return (object_width_in_mm * (CameraConfig.FRAME_WIDTH / (2 * math.tan(math.radians(CameraConfig.HORIZONTAL_FOV) / 2)))) / object_width_in_pixels
+        return (object_width_in_mm * MonoVision.FOCAL_LENGTH_IN_PIXELS) / object_width_in_pixels
     
     @staticmethod
     def get_angle_to_object_in_degrees(object_x) -> float:
         """Calculate the distance and angle offset of an object."""
-        return math.degrees(math.atan((object_x - (CameraConfig.FRAME_WIDTH / 2)) / (CameraConfig.FRAME_WIDTH / (2 * math.tan(math.radians(CameraConfig.HORIZONTAL_FOV) / 2)))))
\ No newline at end of file
+        return math.degrees(math.atan((object_x - MonoVision.CENTER_X) / MonoVision.FOCAL_LENGTH_IN_PIXELS))
+
+    @staticmethod
+    def angles(xs: np.ndarray) -> np.ndarray:
+        """Angle offsets in degrees for an array of x positions, read from the per-column table for whole pixels."""
+        xs = np.asarray(xs)
+        if xs.dtype.kind not in 'iu':
+            return MonoVision.arctan_angles(xs)
+
+        # Boxes running past the frame edge fall outside the table and are extrapolated like the scalar path
+        inside = (xs >= 0) & (xs < len(MonoVision.ANGLE_TABLE))
+        if inside.all():
+            return MonoVision.ANGLE_TABLE[xs]
+        angles = MonoVision.arctan_angles(xs)
+        angles[inside] = MonoVision.ANGLE_TABLE[xs[inside]]
+        return angles
+
+    @staticmethod
+    def arctan_angles(xs: np.ndarray) -> np.ndarray:
+        return np.degrees(np.arctan((xs.astype(np.float32) - MonoVision.CENTER_X) / MonoVision.FOCAL_LENGTH_IN_PIXELS))
+
+    @staticmethod
+    def distances(widths_in_mm: np.ndarray, widths_in_pixels: np.ndarray) -> np.ndarray:
+        """Distances in mm for arrays of real and apparent object widths."""
+        with np.errstate(divide='ignore'):
+            return (np.asarray(widths_in_mm, dtype=np.float32) * np.float32(MonoVision.FOCAL_LENGTH_IN_PIXELS)) / np.asarray(widths_in_pixels, dtype=np.float32)
+
+    @staticmethod
+    def find_distance_and_angle(object_x, object_width_in_mm, object_width_in_pixels) -> Tuple[np.ndarray, np.ndarray]:
+        """Calculate the distance and angle offset of every object in a batch at once."""
+        return MonoVision.distances(object_width_in_mm, object_width_in_pixels), MonoVision.angles(object_x)
@@ -1,5 +1,5 @@
 import logging
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 
 ###################################################################
 
@@ -16,6 +16,21 @@ class CameraConfig:     # Logitech C920
     FRAME_HEIGHT: int = 640
     DIAGONAL_SENSOR_WIDTH: float = 6              # in mm
     INCHES_BETWEEN_STEREO_CAMERAS: float = 0.0   # in inches
+    # Intrinsics of the transformed frame from a calibration, as [[fx, 0, cx], [0, fy, cy], [0, 0, 1]];
+    # None derives a pinhole model from HORIZONTAL_FOV
+    CAMERA_MATRIX: Optional[List[List[float]]] = None
+    DISTORTION_COEFFICIENTS: List[float] = [0.0, 0.0, 0.0, 0.0, 0.0]
+    # Lens position from the robot's rotation centre, forward and to the right; the camera is assumed to face forward
+    POSITION_ON_ROBOT_IN_MM: Tuple[float, float] = (0.0, 0.0)
+
+class StreamConfig:
+    """Background grabber for live camera streams."""
+    READ_TIMEOUT_IN_SECONDS: float = 0.1            # how long read() waits for a new frame before returning nothing
+    LATE_FRAME_THRESHOLD_IN_SECONDS: float = 0.05   # frames older than this when read are counted as late
+    MIN_RECONNECT_DELAY_IN_SECONDS: float = 0.25
+    MAX_RECONNECT_DELAY_IN_SECONDS: float = 5.0
+    MAX_RECONNECT_ATTEMPTS: int = 0                 # 0 keeps trying forever
+    CONNECTION_TIMEOUT_IN_SECONDS: float = 2.0      # open and read timeout before a stream counts as lost
 
 class DisplayConfig:
     """Configuration settings for video output."""
@@ -27,6 +42,9 @@ class DisplayConfig:
     FLIP_IMAGE_VERTICALLY: bool = False
     INPUT_VIDEO_PATH: Any = "video.mp4" #"test/input/video3.mp4" #"http://limelight.local:5800" #
     OUTPUT_VIDEO_PATH: str = 'test/output/output.mp4'
+    OUTPUT_FPS: float = 30.0                        # frames are repeated or skipped to this rate by capture time
+    VIDEO_WRITER_QUEUE_SIZE: int = 8                # frames waiting for the encoder process
+    VIDEO_WRITER_DROP_POLICY: str = "drop_newest"   # drop_newest never delays the output stage, block keeps every frame
     APRILTAG_CROSSHAIR_LINE_LENGTH = 10
     LABEL_COLOURS: Dict[str, List[int]] = {
         "0": [85, 186, 151],    # Algae
@@ -35,26 +53,113 @@ class DisplayConfig:
         "5": [255, 0, 0],       # Robot
     }
 
+class PipelineConfig:
+    """Configuration settings for the capture / inference / output stages."""
+    # Drop policies for live streams: drop_oldest keeps only the newest frame. Video files and replays always block,
+    # so every frame of a recording is processed
+    INFERENCE_QUEUE_SIZE: int = 1
+    INFERENCE_DROP_POLICY: str = "drop_oldest"
+    OUTPUT_QUEUE_SIZE: int = 2
+    OUTPUT_DROP_POLICY: str = "drop_oldest"
+    QUEUE_TIMEOUT: float = 0.05     # in seconds
+    CONCURRENT_DETECTORS: bool = True   # run AprilTag detection alongside YOLO
+    # Frames alive at once: one in inference, its predecessor's grayscale for optical flow, the output queue and the one on screen
+    FRAME_BUFFER_SLOTS: int = OUTPUT_QUEUE_SIZE + 3
+
+class RecordingConfig:
+    """Raw frame ring recorder and replay settings."""
+    RECORD: bool = False
+    RECORDING_PATH: str = "test/recordings/match.ring"   # a start timestamp is added to the name
+    CAPACITY_IN_FRAMES: int = 1800      # keeps the last 30 s at 60 fps, about 2.2 GB at 640x640
+    REPLAY_PATH: Optional[str] = None   # replay this ring file instead of opening INPUT_VIDEO_PATH
+    REPLAY_IN_REAL_TIME: bool = False   # pace replay by the recorded timestamps instead of running flat out
+
+class BatchConfig:
+    """Offline batch processing of recorded match video."""
+    CHUNK_FRAMES: int = 600             # frames per process pool task
+    BATCH_SIZE: int = 8                 # frames per YOLO forward pass
+    OUTPUT_DIRECTORY: str = "test/output/batch"
+
 class YOLOConfig:
+    BACKEND: str = "ultralytics"    # "ultralytics" or "onnxruntime"
     IOU_THRESHOLD: float = 0.4
     CONFIDENCE_THRESHOLD: float = 0.7
     WEIGHTS_LOCATION: str = 'vision_tracking/weights/best.onnx'
+    PRECISION: str = "fp32"         # "fp32", "fp16" or "int8", onnxruntime backend only
+    WEIGHTS_BY_PRECISION: Dict[str, str] = {
+        "fp32": WEIGHTS_LOCATION,
+        "fp16": 'vision_tracking/weights/best_fp16.onnx',
+        "int8": 'vision_tracking/weights/best_int8.onnx',
+    }
+    NUM_THREADS: int = 3            # torch intra-op threads, 0 keeps the torch default
+
+class QuantizationConfig:
+    CALIBRATION_VIDEO_PATHS: List[str] = ["video.mp4"]
+    CALIBRATION_FRAMES: int = 200
+    CALIBRATION_FRAME_STRIDE: int = 15      # sample every Nth frame so calibration covers the whole match
+    CALIBRATION_METHOD: str = "MinMax"      # "MinMax", "Entropy" or "Percentile"
+
+class TrackerConfig:
+    IOU_GATE: float = 0.2
+    CENTROID_GATE_IN_PIXELS: float = 80.0
+    MAX_MISSED_FRAMES: int = 10
+    VELOCITY_SMOOTHING: float = 0.2                 # EMA weight of each new finite-difference velocity
+    MAX_SPEED_IN_MM_PER_SECOND: float = 8000.0      # relative speeds above this are box jitter, clamped to it
+    TARGET_SWITCH_MARGIN: float = 0.5               # score another game piece needs over the locked target to take over
+
+class SchedulerConfig:
+    ENABLED: bool = True            # False runs YOLO on every frame
+    TARGET_FPS: float = 60.0
+    MIN_DETECTION_INTERVAL: int = 1
+    MAX_DETECTION_INTERVAL: int = 8
+    LATENCY_SMOOTHING: float = 0.2
+    MIN_TRACKING_QUALITY: float = 0.5
+    EMPTY_SCENE_DETECTION_INTERVAL: int = 2     # cap while nothing is tracked, so new game pieces are picked up quickly
+    PROPAGATED_CONFIDENCE_DECAY: float = 0.9    # per propagated frame, so stale boxes rank below fresh detections
+    FLOW_POINTS_PER_SIDE: int = 3
+    FLOW_WINDOW_SIZE: int = 15
+    FLOW_PYRAMID_LEVELS: int = 2
 
 class AprilTagConfig:
-    APRILTAG_SIZE_IN_INCHES = 9
+    APRILTAG_SIZE_IN_INCHES = 6.5
     APRILTAG_SIZE_IN_CM = APRILTAG_SIZE_IN_INCHES * 2.54
+    APRILTAG_SIZE_IN_MM = APRILTAG_SIZE_IN_CM * 10
+    NUM_THREADS: int = 1
+    INCREMENTAL_SEARCH: bool = True     # search around last frame's tags before the full frame
+    FULL_FRAME_INTERVAL: int = 10       # in frames
+    FULL_FRAME_DECIMATION: float = 2.0
+    ROI_PADDING: float = 0.5            # fraction of the tag's size in pixels
+    ROI_MIN_PADDING_IN_PIXELS: int = 16
+
+class FieldConfig:
+    """Field layout used to solve the camera pose from AprilTags."""
+    LAYOUT: str = "k2025ReefscapeWelded"             # a robotpy_apriltag.AprilTagField name
+    TAG_ROLES: Dict[int, Tuple[str, str]] = {         # tag ID -> (alliance, role)
+        3: ("red", "processor"), 16: ("blue", "processor"),
+        **{tag_id: ("red", "reef") for tag_id in range(6, 12)},
+        **{tag_id: ("blue", "reef") for tag_id in range(17, 23)},
+    }
+    MAX_REPROJECTION_ERROR_IN_PIXELS: float = 4.0   # mean per corner; worse solutions are discarded
+    MAX_AMBIGUITY: float = 0.2                      # single-tag best/second-best error ratio above which the pose is discarded
 
 class SelfDrivingConfig:
     MAX_SELF_DRIVING_SPEED = 1.0
     MAX_SELF_DRIVING_ROTATIONAL_RATE = 1 / 180.0
 
+class LatencyConfig:
+    """Extrapolation of targets from their capture time to when the command reaches the robot."""
+    COMPENSATE: bool = True
+    TRANSMIT_DELAY_IN_SECONDS: float = 0.005        # added to the measured latency for the NetworkTables hop
+    MAX_EXTRAPOLATION_IN_SECONDS: float = 0.3       # older frames, e.g. from a replay, are not extrapolated
+
 class AutoProcessorConfig:
-    PROCESSOR_DESIRED_DISTANCE_IN_MM = 5.0 
-    PROCESSOR_MAX_DISTANCE_IN_MM = 120.0
+    # Floor distances from the camera to the tag; speed ramps from 0 at the stand-off to full at the maximum
+    PROCESSOR_DESIRED_DISTANCE_IN_MM = 500.0
+    PROCESSOR_MAX_DISTANCE_IN_MM = 2000.0
 
 class AutoReefConfig:
-    REEF_DESIRED_DISTANCE_IN_MM = 5.0 
-    REEF_MAX_DISTANCE_IN_MM = 120.0
+    REEF_DESIRED_DISTANCE_IN_MM = 450.0
+    REEF_MAX_DISTANCE_IN_MM = 2000.0
 
 class AutoAlgaeConfig:
     ALGAE_SIZE_IN_MM: float = 413
@@ -63,12 +168,19 @@ class AutoAlgaeConfig:
     ALGAE_DISTANCE_WEIGHT: float = 1.0
     ALGAE_ANGULAR_WEIGHT: float = 1.0
 
-    ALGAE_DESIRED_DISTANCE_IN_MM = 10.0 
-    ALGAE_MAX_DISTANCE_IN_MM = 120.0
+    ALGAE_DESIRED_DISTANCE_IN_MM = 300.0
+    ALGAE_MAX_DISTANCE_IN_MM = 3000.0
 
 class AutoCoralConfig:
     CORAL_SIZE_IN_MM: float = 11
 
+    CORAL_CONFIDENCE_WEIGHT: float = 1.0
+    CORAL_DISTANCE_WEIGHT: float = 1.0
+    CORAL_ANGULAR_WEIGHT: float = 1.0
+
+    CORAL_DESIRED_DISTANCE_IN_MM = 300.0
+    CORAL_MAX_DISTANCE_IN_MM = 3000.0
+
 class AutoRobotConfig:
     AVERAGE_ROBOT_SIZE_IN_MM: float = 711
 
@@ -88,8 +200,26 @@ class AutoHangConfig:
 class LoggingConfig:
     FPS_LOGGING_RATE: int = 200
     LOG_LEVEL: int = logging.DEBUG
+    ASYNC_LOGGING: bool = True                  # write log files from a background thread
+    LOG_QUEUE_SIZE: int = 10000                 # records past this are dropped rather than blocking the frame loop
+    FLUSH_INTERVAL_IN_SECONDS: float = 0.25     # how often the writer thread wakes to write and flush
+    RATE_LIMIT_WINDOW_IN_SECONDS: float = 1.0
+    RATE_LIMIT_MESSAGES_PER_WINDOW: int = 5     # per call site, 0 disables rate limiting
+    RATE_LIMIT_MAX_LEVEL: int = logging.INFO    # warnings and errors are never rate limited
+
+class InstrumentationConfig:
+    ENABLED: bool = True
+    HTTP_PORT: int = 5805                   # GET http://127.0.0.1:5805/stats, 0 disables the endpoint
+    DUMP_INTERVAL_IN_SECONDS: float = 30.0  # periodic JSON dump to the log, 0 disables
+    BUCKET_EDGES_IN_MS: List[float] = [0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 33, 66, 133, 266, 533]
 
 class NetworkingConfig:
     ROBOT_IP_ADDRESS: str = "10.37.56.2"
     NETWORK_TABLE_NAME: str = "AIPipeline"
-    DATA_ENTRY_NAME: str = "data"
\ No newline at end of file
+    DATA_ENTRY_NAME: str = "data"
+    # entries cached by RoboRio listeners; chassis_speeds is a number array of vx, vy (m/s) and omega (rad/s) as in WPILib
+    STATE_FIELDS: Dict[str, type] = {"task": str, "team_colour": str, "has_algae": bool, "chassis_speeds": tuple}
+    COMMAND_ENTRY_NAME: str = "command"         # number array: x, y, rot, success, capture_time, sequence, latency
+    MAX_COMMAND_RATE_IN_HZ: float = 50.0
+    COMMAND_DEADBAND: float = 0.5               # percent; smaller changes in x, y and rot are not republished
+    COMMAND_HEARTBEAT_IN_SECONDS: float = 0.1   # republish an unchanged command at least this often
@@ -1,20 +1,25 @@
 import os
 import logging
-from typing import Tuple
+from typing import Optional, Tuple
 from logs.logging_setup import setup_logger
 
+import numpy as np
+
 from config import AutoAlgaeConfig
+from vision_tracking.detection_batch import DetectionView
+from decision_engine.candidate_scorer import CandidateScorer, TargetLock
 from decision_engine.trackable_objects import *
 
 ################################################
 
 class AlgaePickupCommand:
-    REQUIRED_ATTRIBUTES = ['confidence', 'distance', 'angle']
-
     def __init__(self) -> None:
         file_name = os.path.splitext(os.path.basename(__file__))[0]
         setup_logger(file_name)
         self.logger = logging.getLogger(file_name)
+        self.scorer: CandidateScorer = CandidateScorer(AutoAlgaeConfig.ALGAE_CONFIDENCE_WEIGHT, AutoAlgaeConfig.ALGAE_DISTANCE_WEIGHT,
+                                                       AutoAlgaeConfig.ALGAE_ANGULAR_WEIGHT, AutoAlgaeConfig.ALGAE_MAX_DISTANCE_IN_MM)
+        self.target: TargetLock = TargetLock(self.scorer)
 
     def get_algae_navigation_command(self, algae: Algae) -> Tuple[float, float, float, bool]:
         if not algae:
@@ -35,34 +40,11 @@ class AlgaePickupCommand:
         self.logger.info(f"Algae navigation command: x={x:.1f}%, y={y:.1f}%, rot={rot:.1f}%")
         return [x, y, rot, True]
 
-    def compute_best_algae(self, *algaes: Algae) -> Algae:
-        """Compute the best game piece based on weighted attributes."""
-        if not algaes:
-            return
-
-        best_piece = None
-
-        for piece in algaes:
-            if self.validate_algae(piece):
-                if best_piece is None or self.compute_score(piece) > self.compute_score(best_piece):
-                    best_piece = piece
-
-        return best_piece
-
-    def validate_algae(self, algae: Algae) -> Algae:
-        """Check if a game piece has all required attributes."""
-        missing_attributes = [attr for attr in self.REQUIRED_ATTRIBUTES if getattr(
-            algae, attr, None) is None]
-        if missing_attributes:
-            self.logger.error(
-                f"Game piece {algae} is missing attributes: {', '.join(missing_attributes)}")
-            return False
-        return True
+    def compute_best_algae(self, algaes: DetectionView) -> Optional[Algae]:
+        """The locked algae while it is tracked, otherwise the highest scoring one; None if there is no valid candidate."""
+        position = self.target.select(algaes)
+        return algaes[position] if position is not None else None
 
-    def compute_score(self, algae):
-        """Calculate the weighted score for a game piece."""
-        return (
-            AutoAlgaeConfig.ALGAE_CONFIDENCE_WEIGHT * algae.confidence +
-            AutoAlgaeConfig.ALGAE_DISTANCE_WEIGHT * ((120 - algae.distance) / 120) +
-            AutoAlgaeConfig.ALGAE_ANGULAR_WEIGHT * (1 - abs(algae.angle) / 180)
-        )
\ No newline at end of file
+    def rank_algaes(self, algaes: DetectionView, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """Positions in the view of the top k algaes, best first, with their scores."""
+        return self.scorer.rank(algaes, k)
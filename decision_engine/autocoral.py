@@ -1,19 +1,24 @@
 import os
 import logging
-from typing import Tuple
+from typing import Optional, Tuple
 from logs.logging_setup import setup_logger
 
+import numpy as np
+
 from config import AutoCoralConfig
+from vision_tracking.detection_batch import DetectionView
+from decision_engine.candidate_scorer import CandidateScorer, TargetLock
 from decision_engine.trackable_objects import *
 
 ################################################
 
 class CoralPickupCommand:
-    REQUIRED_ATTRIBUTES = ['confidence', 'distance', 'angle']
-
     def __init__(self) -> None:
         file_name = os.path.splitext(os.path.basename(__file__))[0]
         self.logger = setup_logger(file_name)
+        self.scorer: CandidateScorer = CandidateScorer(AutoCoralConfig.CORAL_CONFIDENCE_WEIGHT, AutoCoralConfig.CORAL_DISTANCE_WEIGHT,
+                                                       AutoCoralConfig.CORAL_ANGULAR_WEIGHT, AutoCoralConfig.CORAL_MAX_DISTANCE_IN_MM)
+        self.target: TargetLock = TargetLock(self.scorer)
 
     def get_coral_navigation_command(self, coral: Coral) -> Tuple[float, float, float, bool]:
         if not coral:
@@ -34,34 +39,11 @@ class CoralPickupCommand:
         self.logger.info(f"Coral navigation command: x={x:.1f}%, y={y:.1f}%, rot={rot:.1f}%")
         return [x, y, rot, True]
 
-    def compute_best_coral(self, *corals: Coral) -> Coral:
-        """Compute the best game piece based on weighted attributes."""
-        if not corals:
-            return
-
-        best_piece = None
-
-        for piece in corals:
-            if self.validate_coral(piece):
-                if best_piece is None or self.compute_score(piece) > self.compute_score(best_piece):
-                    best_piece = piece
-
-        return best_piece
-
-    def validate_coral(self, coral: Coral) -> Coral:
-        """Check if a game piece has all required attributes."""
-        missing_attributes = [attr for attr in self.REQUIRED_ATTRIBUTES if getattr(
-            coral, attr, None) is None]
-        if missing_attributes:
-            self.logger.error(
-                f"Game piece {coral} is missing attributes: {', '.join(missing_attributes)}")
-            return False
-        return True
+    def compute_best_coral(self, corals: DetectionView) -> Optional[Coral]:
+        """The locked coral while it is tracked, otherwise the highest scoring one; None if there is no valid candidate."""
+        position = self.target.select(corals)
+        return corals[position] if position is not None else None
 
-    def compute_score(self, coral):
-        """Calculate the weighted score for a game piece."""
-        return (
-            AutoCoralConfig.CORAL_CONFIDENCE_WEIGHT * coral.confidence +
-            AutoCoralConfig.CORAL_DISTANCE_WEIGHT * ((120 - coral.distance) / 120) +
-            AutoCoralConfig.CORAL_ANGULAR_WEIGHT * (1 - abs(coral.angle) / 180)
-        )
\ No newline at end of file
+    def rank_corals(self, corals: DetectionView, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """Positions in the view of the top k corals, best first, with their scores."""
+        return self.scorer.rank(corals, k)
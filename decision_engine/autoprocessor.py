@@ -1,12 +1,10 @@
 import os
 import math
 import logging
-from typing import Tuple
+from typing import Optional, Tuple
 from logs.logging_setup import setup_logger
 
-from robotpy_apriltag import AprilTagDetection
-
-from apriltags.apriltag_finder import AprilTagFinder
+from apriltags.pose_estimator import FieldPose
 from config import AutoProcessorConfig
 
 ################################################
@@ -17,14 +15,14 @@ class ProcessorScoringCommand:
         setup_logger(file_name)
         self.logger = logging.getLogger(file_name)
 
-    def get_processor_navigation_command(self, processor_apriltag: AprilTagDetection) -> Tuple[float, float, float, bool]:
-        if not processor_apriltag:
+    def get_processor_navigation_command(self, pose: Optional[FieldPose], tag_id: Optional[int]) -> Tuple[float, float, float, bool]:
+        target = pose.target(tag_id) if pose and tag_id is not None else None
+        if not target:
             self.logger.warning("Processor not found")
             return [0.0, 0.0, 0.0, False]
         
-        distance_to_apriltag = AprilTagFinder.estimate_distance(processor_apriltag)
-        angular_diviation = AprilTagFinder.calculate_anglular_diviation(processor_apriltag)
-        
+        distance_to_apriltag, angular_diviation = target
+
         if distance_to_apriltag > AutoProcessorConfig.PROCESSOR_DESIRED_DISTANCE_IN_MM:
             speed_percent = min((distance_to_apriltag - AutoProcessorConfig.PROCESSOR_DESIRED_DISTANCE_IN_MM) / (AutoProcessorConfig.PROCESSOR_MAX_DISTANCE_IN_MM - AutoProcessorConfig.PROCESSOR_DESIRED_DISTANCE_IN_MM) * 100, 100)
         else:
@@ -34,7 +32,7 @@ class ProcessorScoringCommand:
         x = speed_percent * math.cos(angle_in_radians)
         y = speed_percent * math.sin(angle_in_radians)
 
-        rot = max(min(processor_apriltag.angle / 180 * 100, 100), -100)
+        rot = max(min(angular_diviation / 180 * 100, 100), -100)
 
         self.logger.info(f"Processor navigation command: x={x:.1f}%, y={y:.1f}%, rot={rot:.1f}%")
         return [x, y, rot, True]
\ No newline at end of file
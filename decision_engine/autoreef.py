@@ -1,12 +1,10 @@
 import os
 import math
 import logging
-from typing import Tuple
+from typing import FrozenSet, Optional, Tuple
 from logs.logging_setup import setup_logger
 
-from robotpy_apriltag import AprilTagDetection
-
-from apriltags.apriltag_finder import AprilTagFinder
+from apriltags.pose_estimator import FieldPose
 from config import AutoReefConfig
 
 ################################################
@@ -17,14 +15,14 @@ class ReefScoringCommand:
         setup_logger(file_name)
         self.logger = logging.getLogger(file_name)
 
-    def get_reef_navigation_command(self, reef_apriltag: AprilTagDetection) -> Tuple[float, float, float, bool]:
-        if not reef_apriltag:
+    def get_reef_navigation_command(self, pose: Optional[FieldPose], tag_id: Optional[int]) -> Tuple[float, float, float, bool]:
+        target = pose.target(tag_id) if pose and tag_id is not None else None
+        if not target:
             self.logger.warning("Reef not found")
             return [0.0, 0.0, 0.0, False]
         
-        distance_to_apriltag = AprilTagFinder.estimate_distance(reef_apriltag)
-        angular_diviation = AprilTagFinder.calculate_anglular_diviation(reef_apriltag)
-        
+        distance_to_apriltag, angular_diviation = target
+
         if distance_to_apriltag > AutoReefConfig.REEF_DESIRED_DISTANCE_IN_MM:
             speed_percent = min((distance_to_apriltag - AutoReefConfig.REEF_DESIRED_DISTANCE_IN_MM) / (AutoReefConfig.REEF_MAX_DISTANCE_IN_MM - AutoReefConfig.REEF_DESIRED_DISTANCE_IN_MM) * 100, 100)
         else:
@@ -34,7 +32,12 @@ class ReefScoringCommand:
         x = speed_percent * math.cos(angle_in_radians)
         y = speed_percent * math.sin(angle_in_radians)
 
-        rot = max(min(reef_apriltag.angle / 180 * 100, 100), -100)
+        rot = max(min(angular_diviation / 180 * 100, 100), -100)
 
         self.logger.info(f"Reef navigation command: x={x:.1f}%, y={y:.1f}%, rot={rot:.1f}%")
-        return [x, y, rot, True]
\ No newline at end of file
+        return [x, y, rot, True]
+
+    def compute_best_apriltag(self, pose: Optional[FieldPose], reef_ids: FrozenSet[int]) -> Optional[int]:
+        """Pick the nearest of the given reef faces, which main limits to tags in view, by the frame's pose."""
+        targets = [(pose.target(tag_id)[0], tag_id) for tag_id in reef_ids] if pose else []
+        return min(targets)[1] if targets else None
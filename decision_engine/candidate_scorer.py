@@ -0,0 +1,76 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+from config import TrackerConfig
+from vision_tracking.detection_batch import DetectionView
+
+################################################
+
+class CandidateScorer:
+    """Ranks every detection of a class in one vectorized pass over the DetectionBatch columns."""
+    __slots__ = ('confidence_weight', 'distance_weight', 'angular_weight', 'max_distance')
+
+    def __init__(self, confidence_weight: float, distance_weight: float, angular_weight: float, max_distance: float) -> None:
+        self.confidence_weight: float = confidence_weight
+        self.distance_weight: float = distance_weight
+        self.angular_weight: float = angular_weight
+        self.max_distance: float = max_distance
+
+    def score(self, candidates: DetectionView) -> np.ndarray:
+        """Weighted score per candidate; candidates with a non-finite attribute score -inf."""
+        confidence = candidates.confidence
+        distance = candidates.distance
+        angle = candidates.angle
+
+        scores = (self.confidence_weight * confidence +
+                  self.distance_weight * ((self.max_distance - distance) / self.max_distance) +
+                  self.angular_weight * (1 - np.abs(angle) / 180))
+        scores[~np.isfinite(scores)] = -np.inf
+        return scores
+
+    def rank(self, candidates: DetectionView, k: int = 1) -> Tuple[np.ndarray, np.ndarray]:
+        """Positions in the view of the k best valid candidates, best first, and their scores."""
+        scores = self.score(candidates)
+        valid = np.flatnonzero(scores > -np.inf)
+        if k < len(valid):
+            valid = valid[np.argpartition(-scores[valid], k - 1)[:k]]
+        order = valid[np.argsort(-scores[valid], kind='stable')]
+        return order, scores[order]
+
+class TargetLock:
+    """Keeps one tracked game piece as the target across frames, re-ranking only when it is lost or clearly beaten."""
+    __slots__ = ('scorer', 'switch_margin', 'max_missed_frames', 'track_id', 'misses')
+
+    def __init__(self, scorer: CandidateScorer, switch_margin: float = TrackerConfig.TARGET_SWITCH_MARGIN,
+                 max_missed_frames: int = TrackerConfig.MAX_MISSED_FRAMES) -> None:
+        self.scorer: CandidateScorer = scorer
+        self.switch_margin: float = switch_margin
+        self.max_missed_frames: int = max_missed_frames
+        self.track_id: Optional[int] = None
+        self.misses: int = 0
+
+    def select(self, candidates: DetectionView) -> Optional[int]:
+        """Position in the view of this frame's target, or None if there is no valid candidate."""
+        scores = self.scorer.score(candidates)
+        track_ids = candidates.track_id
+        best = int(np.argmax(scores)) if len(scores) and np.isfinite(scores.max()) else None
+
+        if self.track_id is not None:
+            locked = np.flatnonzero((track_ids == self.track_id) & np.isfinite(scores))
+            if len(locked):
+                self.misses = 0
+                position = int(locked[0])
+                if scores[best] <= scores[position] + self.switch_margin:
+                    return position
+            else:
+                # The tracker keeps a track alive this long, so hold the lock for when the same piece comes back
+                # under its ID, and drive to the best other candidate meanwhile
+                self.misses += 1
+                if self.misses <= self.max_missed_frames:
+                    return best
+
+        # Untracked detections (track ID -1) are picked for the frame but never locked onto
+        self.track_id = int(track_ids[best]) if best is not None and track_ids[best] >= 0 else None
+        self.misses = 0
+        return best
@@ -0,0 +1,87 @@
+import os
+import math
+import time
+import logging
+from typing import Optional, Tuple
+from logs.logging_setup import setup_logger
+from logs.instrumentation import instrumentation
+
+import cv2
+import numpy as np
+
+from config import CameraConfig, LatencyConfig
+from apriltags.pose_estimator import FieldPose
+from networking.rio_communication import RobotState
+from decision_engine.trackable_objects import Object
+
+################################################
+
+class LatencyCompensator:
+    """Moves targets from where they were when the frame was captured to where they will be when the command arrives."""
+    def __init__(self) -> None:
+        file_name = os.path.splitext(os.path.basename(__file__))[0]
+        setup_logger(file_name)
+        self.logger = logging.getLogger(file_name)
+
+    @staticmethod
+    def chassis_speeds(state: Optional[RobotState]) -> Tuple[float, float, float]:
+        """Robot-relative vx, vy in mm/s and omega in rad/s, or zeros if the robot has not published them."""
+        speeds = state.chassis_speeds if state else None
+        if not speeds or len(speeds) != 3:
+            return 0.0, 0.0, 0.0
+        return speeds[0] * 1000, speeds[1] * 1000, speeds[2]
+
+    def time_step(self, capture_time: float, now: Optional[float] = None) -> float:
+        """Seconds from capture until the command reaches the robot, or 0 when it is too old to extrapolate."""
+        time_step = (now if now is not None else time.time()) - capture_time + LatencyConfig.TRANSMIT_DELAY_IN_SECONDS
+        if not LatencyConfig.COMPENSATE or not 0 <= time_step <= LatencyConfig.MAX_EXTRAPOLATION_IN_SECONDS:
+            if LatencyConfig.COMPENSATE:
+                instrumentation.count("latency.not_extrapolated")
+            return 0.0
+        instrumentation.record("latency.extrapolated", time_step)
+        return time_step
+
+    def advance_object(self, target: Object, capture_state: Optional[RobotState], state: Optional[RobotState],
+                       time_step: float) -> Object:
+        """Move a frame's target forward by time_step in place, using its own motion and the robot's."""
+        if not time_step or target.position_x is None:
+            return target
+
+        velocity_x, velocity_y, angular_velocity = self.chassis_speeds(state)
+        if target.velocity_x is not None:
+            # The measured relative velocity already includes the robot's motion at capture, so only the change applies
+            position_x, position_y = target.predict_position(time_step)
+            capture_x, capture_y, capture_angular = self.chassis_speeds(capture_state)
+            velocity_x, velocity_y, angular_velocity = velocity_x - capture_x, velocity_y - capture_y, angular_velocity - capture_angular
+        else:
+            position_x, position_y = target.position_x, target.position_y
+
+        # Move into the robot frame, about whose centre the robot turns; WPILib's vy and omega are to the left,
+        # the trackable's y and angle to the right
+        camera_forward, camera_right = CameraConfig.POSITION_ON_ROBOT_IN_MM
+        forward = position_x + camera_forward - velocity_x * time_step
+        left = -(position_y + camera_right) - velocity_y * time_step
+        turn = angular_velocity * time_step
+        forward, left = forward * math.cos(turn) + left * math.sin(turn), -forward * math.sin(turn) + left * math.cos(turn)
+        forward, left = forward - camera_forward, left + camera_right
+
+        target.update_relative_location(math.hypot(forward, left), math.degrees(math.atan2(-left, forward)))
+        return target
+
+    def advance_pose(self, pose: Optional[FieldPose], state: Optional[RobotState], time_step: float) -> Optional[FieldPose]:
+        """A copy of the frame's pose with the camera moved by the robot's own motion over time_step."""
+        if pose is None or not time_step:
+            return pose
+
+        velocity_x, velocity_y, angular_velocity = self.chassis_speeds(state)
+        # The camera swings around the robot's centre as it turns, on top of the robot's own translation
+        angle = angular_velocity * time_step
+        camera_forward, camera_left = CameraConfig.POSITION_ON_ROBOT_IN_MM[0], -CameraConfig.POSITION_ON_ROBOT_IN_MM[1]
+        forward = velocity_x * time_step + camera_forward * (math.cos(angle) - 1) - camera_left * math.sin(angle)
+        left = velocity_y * time_step + camera_forward * math.sin(angle) + camera_left * (math.cos(angle) - 1)
+
+        # Robot forward, left and counter-clockwise are +z, -x and a turn about -y in OpenCV camera axes
+        movement = np.array([-left, 0.0, forward]) / 1000
+        turn, _ = cv2.Rodrigues(np.array([0.0, -angle, 0.0]))
+        return FieldPose(pose.layout, turn.T @ pose.rotation, turn.T @ (pose.translation - movement),
+                         pose.tag_ids, pose.reprojection_error, pose.timestamp + time_step)
@@ -1,8 +1,17 @@
 import math
+from typing import List, Type
+
+from config import TrackerConfig
 
 class Object:
     """The abstract class for all vision tracked objects"""
+    __slots__ = ('x', 'y', 'scale', 'ratio', 'confidence', 'distance', 'angle', 'timestamp',
+                 'position_x', 'position_y', 'travel_angle', 'travel_speed', 'velocity_x', 'velocity_y', 'acceleration_x', 'acceleration_y')
+
     def __init__(self):
+        self.reset()
+
+    def reset(self):
         self.x = None
         self.y = None
         self.scale = None
@@ -11,6 +20,14 @@ class Object:
         self.distance = None
         self.angle = None
         self.timestamp = None
+        self.position_x = None      # robot-relative floor position in mm: x forward, y to the right
+        self.position_y = None
+        self.travel_angle = None
+        self.travel_speed = None
+        self.velocity_x = None      # in mm/s, relative to the robot
+        self.velocity_y = None
+        self.acceleration_x = None
+        self.acceleration_y = None
     
     def update_frame_location(self, x, y, s, r, timestamp):
         self.x, self.y, self.scale, self.ratio, self.timestamp = x, y, s, r, timestamp
@@ -21,42 +38,42 @@ class Object:
     def update_relative_location(self, distance, angle):
         self.distance = distance
         self.angle = angle
+        self.position_x, self.position_y = self.floor_position(distance, angle)
 
-class Algae(Object):
-    """The class that holds all the characteristics of an Algae"""
-    def __init__(self):
-        super().__init__()
+    def update_velocity(self, velocity_x, velocity_y):
+        self.velocity_x, self.velocity_y = velocity_x, velocity_y
 
-class Cage(Object):
-    """The class that holds all the characteristics of a Cage"""
-    def __init__(self):
-        super().__init__()
-
-class Coral(Object):
-    """The class that holds all the characteristics of a Coral"""
-    def __init__(self):
-        super().__init__()
+    def update_acceleration(self, acceleration_x, acceleration_y):
+        self.acceleration_x, self.acceleration_y = acceleration_x, acceleration_y
 
-class Robot(Object):
-    """The class that holds all the characteristics of a Robot"""
-    def __init__(self):
-        super().__init__()
-        self.travel_angle = None
-        self.travel_speed = None
-        self.velocity_x = None
-        self.velocity_y = None
-        self.acceleration_x = None
-        self.acceleration_y = None
+    @staticmethod
+    def floor_position(distance, angle):
+        """Robot-relative floor position for a distance and angle, or None, None if the distance is unknown."""
+        if distance is None or not math.isfinite(distance):
+            return None, None
+        angle_rad = math.radians(angle)
+        return distance * math.cos(angle_rad), distance * math.sin(angle_rad)
     
     def set_velocity(self, x, y, timestamp):
-        if self.timestamp is not None and self.is_data_recent(timestamp):
+        """Update the smoothed, clamped velocity and acceleration from a new floor position; call before the location updates."""
+        if self.position_x is not None and self.is_data_recent(timestamp) and timestamp > self.timestamp:
             time_diff = timestamp - self.timestamp
-            new_velocity_x = (x - self.x) / time_diff
-            new_velocity_y = (y - self.y) / time_diff
+            new_velocity_x = (x - self.position_x) / time_diff
+            new_velocity_y = (y - self.position_y) / time_diff
+            if self.velocity_x is not None and self.velocity_y is not None:
+                # A few pixels of box-width jitter is metres per second in a one-frame difference, so smooth it
+                new_velocity_x = self.velocity_x + TrackerConfig.VELOCITY_SMOOTHING * (new_velocity_x - self.velocity_x)
+                new_velocity_y = self.velocity_y + TrackerConfig.VELOCITY_SMOOTHING * (new_velocity_y - self.velocity_y)
+            speed = math.hypot(new_velocity_x, new_velocity_y)
+            if speed > TrackerConfig.MAX_SPEED_IN_MM_PER_SECOND:
+                new_velocity_x *= TrackerConfig.MAX_SPEED_IN_MM_PER_SECOND / speed
+                new_velocity_y *= TrackerConfig.MAX_SPEED_IN_MM_PER_SECOND / speed
             if self.velocity_x is not None and self.velocity_y is not None:
                 self.acceleration_x = (new_velocity_x - self.velocity_x) / time_diff
                 self.acceleration_y = (new_velocity_y - self.velocity_y) / time_diff
             self.velocity_x, self.velocity_y = new_velocity_x, new_velocity_y
+        elif not self.is_data_recent(timestamp):
+            self.velocity_x = self.velocity_y = self.acceleration_x = self.acceleration_y = None
     
     def calculate_speed(self):
         if self.velocity_x is not None and self.velocity_y is not None:
@@ -64,17 +81,54 @@ class Robot(Object):
         return None
     
     def predict_position(self, time_step):
-        """Predicts future position based on current velocity and travel angle."""
+        """Predicts future floor position based on current velocity and travel angle."""
+        if self.position_x is None:
+            return None, None
         if self.velocity_x is not None and self.velocity_y is not None:
-            pred_x = self.x + self.velocity_x * time_step
-            pred_y = self.y + self.velocity_y * time_step
+            pred_x = self.position_x + self.velocity_x * time_step
+            pred_y = self.position_y + self.velocity_y * time_step
             return pred_x, pred_y
         elif self.travel_angle is not None and self.travel_speed is not None:
             angle_rad = math.radians(self.travel_angle)
-            pred_x = self.x + self.travel_speed * math.cos(angle_rad) * time_step
-            pred_y = self.y + self.travel_speed * math.sin(angle_rad) * time_step
+            pred_x = self.position_x + self.travel_speed * math.cos(angle_rad) * time_step
+            pred_y = self.position_y + self.travel_speed * math.sin(angle_rad) * time_step
             return pred_x, pred_y
         return None, None
     
     def is_data_recent(self, current_time):
-        return (current_time - self.timestamp) <= 1 if self.timestamp is not None else False
\ No newline at end of file
+        return (current_time - self.timestamp) <= 1 if self.timestamp is not None else False
+
+class Algae(Object):
+    """The class that holds all the characteristics of an Algae"""
+    __slots__ = ()
+
+class Cage(Object):
+    """The class that holds all the characteristics of a Cage"""
+    __slots__ = ()
+
+class Coral(Object):
+    """The class that holds all the characteristics of a Coral"""
+    __slots__ = ()
+
+class Robot(Object):
+    """The class that holds all the characteristics of a Robot"""
+    __slots__ = ()
+
+class ObjectPool:
+    """Reuses trackable objects of one class across frames instead of allocating new ones"""
+    def __init__(self, object_type: Type[Object]):
+        self.object_type = object_type
+        self.free: List[Object] = []
+        self.in_use: List[Object] = []
+
+    def acquire(self) -> Object:
+        trackable = self.free.pop() if self.free else self.object_type()
+        self.in_use.append(trackable)
+        return trackable
+
+    def release_all(self):
+        """Return every object handed out this frame; they must not be used after this call."""
+        for trackable in self.in_use:
+            trackable.reset()
+        self.free.extend(self.in_use)
+        self.in_use.clear()
@@ -0,0 +1,172 @@
+import os
+import json
+import time
+import bisect
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+
+from config import InstrumentationConfig
+from logs.logging_setup import setup_logger
+
+###############################################################
+
+class Histogram:
+    """Latency histogram with fixed millisecond buckets; the last bucket catches everything slower."""
+    __slots__ = ('counts', 'count', 'total', 'maximum')
+
+    def __init__(self) -> None:
+        self.counts: List[int] = [0] * (len(InstrumentationConfig.BUCKET_EDGES_IN_MS) + 1)
+        self.count: int = 0
+        self.total: float = 0.0
+        self.maximum: float = 0.0
+
+    def observe(self, milliseconds: float) -> None:
+        self.counts[bisect.bisect_left(InstrumentationConfig.BUCKET_EDGES_IN_MS, milliseconds)] += 1
+        self.count += 1
+        self.total += milliseconds
+        if milliseconds > self.maximum:
+            self.maximum = milliseconds
+
+    def percentile(self, fraction: float) -> float:
+        """Upper edge of the bucket holding the given fraction of samples."""
+        target = fraction * self.count
+        running = 0
+        for edge, bucket_count in zip(InstrumentationConfig.BUCKET_EDGES_IN_MS, self.counts):
+            running += bucket_count
+            if running >= target:
+                return edge
+        return self.maximum
+
+    def to_dict(self) -> Dict:
+        return {
+            "count": self.count,
+            "mean_ms": self.total / self.count if self.count else 0.0,
+            "p50_ms": self.percentile(0.5),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": self.maximum,
+            "buckets": dict(zip([str(edge) for edge in InstrumentationConfig.BUCKET_EDGES_IN_MS] + ["inf"], self.counts)),
+        }
+
+class _Span:
+    """Times a with-block on the monotonic clock and records it under a stage name."""
+    __slots__ = ('instrumentation', 'name', 'start')
+
+    def __init__(self, instrumentation: "Instrumentation", name: str) -> None:
+        self.instrumentation = instrumentation
+        self.name = name
+
+    def __enter__(self) -> "_Span":
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.instrumentation.record(self.name, time.perf_counter() - self.start)
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullSpan":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        pass
+
+_NULL_SPAN = _NullSpan()
+
+class Instrumentation:
+    """Process-wide latency histograms and counters for the frame loop, queryable while running."""
+    def __init__(self) -> None:
+        self.enabled: bool = InstrumentationConfig.ENABLED
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = {}
+        self.lock: threading.Lock = threading.Lock()
+        self.started: float = time.monotonic()
+
+        self.server: Optional[ThreadingHTTPServer] = None
+        self.stop_event: threading.Event = threading.Event()
+        self.logger: Optional[logging.Logger] = None
+
+    def span(self, name: str):
+        """Context manager timing a stage; costs nothing beyond the call when disabled."""
+        return _Span(self, name) if self.enabled else _NULL_SPAN
+
+    def record(self, name: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram()
+            histogram.observe(seconds * 1000)
+
+    def count(self, name: str, amount: int = 1) -> None:
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def snapshot(self) -> Dict:
+        with self.lock:
+            return {
+                "uptime_s": time.monotonic() - self.started,
+                "spans": {name: histogram.to_dict() for name, histogram in self.histograms.items()},
+                "counters": dict(self.counters),
+            }
+
+    def start_reporting(self) -> None:
+        """Start the local stats endpoint and the periodic log dump, if configured."""
+        if not self.enabled:
+            return
+
+        file_name = os.path.splitext(os.path.basename(__file__))[0]
+        setup_logger(file_name)
+        self.logger = logging.getLogger(file_name)
+        self.stop_event.clear()
+
+        if InstrumentationConfig.HTTP_PORT:
+            # A debug endpoint must never stop the vision pipeline, e.g. when a leftover process holds the port
+            try:
+                self.server = ThreadingHTTPServer(("127.0.0.1", InstrumentationConfig.HTTP_PORT), _StatsRequestHandler)
+            except OSError as e:
+                self.logger.warning(f"Stats endpoint disabled, cannot listen on port {InstrumentationConfig.HTTP_PORT}: {e}")
+            else:
+                self.server.daemon_threads = True
+                threading.Thread(target=self.server.serve_forever, name="stats-endpoint", daemon=True).start()
+                self.logger.info(f"Stats endpoint on http://127.0.0.1:{InstrumentationConfig.HTTP_PORT}/stats")
+
+        if InstrumentationConfig.DUMP_INTERVAL_IN_SECONDS > 0:
+            threading.Thread(target=self._dump_loop, name="stats-dump", daemon=True).start()
+
+    def stop_reporting(self) -> None:
+        self.stop_event.set()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+            self.server = None
+        if self.logger:
+            self.logger.info(json.dumps(self.snapshot()))
+
+    def _dump_loop(self) -> None:
+        while not self.stop_event.wait(InstrumentationConfig.DUMP_INTERVAL_IN_SECONDS):
+            self.logger.info(json.dumps(self.snapshot()))
+
+class _StatsRequestHandler(BaseHTTPRequestHandler):
+    def do_GET(self) -> None:
+        if self.path.rstrip("/") != "/stats":
+            self.send_error(404)
+            return
+
+        body = json.dumps(instrumentation.snapshot()).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args) -> None:
+        pass
+
+instrumentation = Instrumentation()
@@ -1,26 +1,168 @@
 import os
+import atexit
 import logging
+import threading
+import logging.handlers
+from collections import deque
+from typing import Deque, Dict, List, Optional, Set, Tuple
 from config import LoggingConfig
 
+LOG_DIR = "logs/files"
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+###############################################################
+
+class RateLimitFilter(logging.Filter):
+    """Lets through a fixed number of records per call site per window and counts the rest."""
+    def __init__(self) -> None:
+        super().__init__()
+        self.windows: Dict[Tuple[str, int], List] = {}
+        self.lock: threading.Lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if LoggingConfig.RATE_LIMIT_MESSAGES_PER_WINDOW <= 0 or record.levelno > LoggingConfig.RATE_LIMIT_MAX_LEVEL:
+            return True
+
+        key = (record.pathname, record.lineno)
+        with self.lock:
+            window = self.windows.get(key)
+            if window is None or record.created - window[0] >= LoggingConfig.RATE_LIMIT_WINDOW_IN_SECONDS:
+                suppressed = window[2] if window else 0
+                self.windows[key] = [record.created, 1, 0]
+                if suppressed:
+                    record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+                return True
+
+            if window[1] < LoggingConfig.RATE_LIMIT_MESSAGES_PER_WINDOW:
+                window[1] += 1
+                return True
+
+            window[2] += 1
+            return False
+
+class BatchedFileHandler(logging.FileHandler):
+    """File handler that leaves flushing to the writer thread instead of flushing every record."""
+    def emit(self, record: logging.LogRecord) -> None:
+        try:
+            if self.stream is None:
+                self.stream = self._open()
+            self.stream.write(self.format(record) + self.terminator)
+        except Exception:
+            self.handleError(record)
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue handler that drops records when the writer falls behind rather than blocking the caller."""
+    def __init__(self, writer: "AsyncLogWriter") -> None:
+        super().__init__(writer.records)
+        self.writer: AsyncLogWriter = writer
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Only merge the arguments here; formatting and tracebacks are left to the writer thread
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        self.writer.enqueue(record)
+
+class AsyncLogWriter:
+    """Background thread that wakes every flush interval to write queued records into per-module log files."""
+    def __init__(self, queue_size: int = LoggingConfig.LOG_QUEUE_SIZE) -> None:
+        self.records: Deque[logging.LogRecord] = deque()
+        self.queue_size: int = queue_size
+        self.handlers: Dict[str, BatchedFileHandler] = {}
+        # Guards the queue bound and the dropped count, which every logging thread updates
+        self.lock: threading.Lock = threading.Lock()
+        self.dropped: int = 0
+        self.stop_event: threading.Event = threading.Event()
+        self.thread: threading.Thread = threading.Thread(target=self._run, name="log-writer", daemon=True)
+        self.thread.start()
+
+    def add_file(self, logger_name: str, log_file_path: str) -> None:
+        if logger_name not in self.handlers:
+            handler = BatchedFileHandler(log_file_path)
+            handler.setFormatter(logging.Formatter(LOG_FORMAT))
+            self.handlers[logger_name] = handler
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Queue a record without waking the writer, dropping it if the writer has fallen behind."""
+        with self.lock:
+            if len(self.records) >= self.queue_size:
+                self.dropped += 1
+                return
+            self.records.append(record)
+
+    def stop(self) -> None:
+        """Write out everything already queued, then flush and close every file."""
+        self.stop_event.set()
+        self.thread.join()
+        for handler in self.handlers.values():
+            handler.close()
+
+    def _run(self) -> None:
+        while not self.stop_event.wait(LoggingConfig.FLUSH_INTERVAL_IN_SECONDS):
+            self._write_batch()
+        self._write_batch()
+
+    def _write_batch(self) -> None:
+        dirty: Set[BatchedFileHandler] = set()
+        while self.records:
+            record = self.records.popleft()
+            handler = self.handlers.get(record.name)
+            if handler is not None:
+                handler.handle(record)
+                dirty.add(handler)
+
+        with self.lock:
+            dropped, self.dropped = self.dropped, 0
+        if dropped:
+            for handler in dirty:
+                handler.stream.write(f"{dropped} log records dropped while the writer was behind{handler.terminator}")
+        for handler in dirty:
+            handler.flush()
+
+_writer: Optional[AsyncLogWriter] = None
+_writer_lock = threading.Lock()
+
+def get_writer() -> AsyncLogWriter:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = AsyncLogWriter()
+            atexit.register(shutdown_logging)
+        return _writer
+
+def shutdown_logging() -> None:
+    """Drain the background writer and close all log files; safe to call more than once."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.stop()
+    logging.shutdown()
+
 def setup_logger(file_name):
-    log_dir = "logs/files"
-    os.makedirs(log_dir, exist_ok=True)
-    
-    log_file_path = os.path.join(log_dir, f"{file_name}.log")
-    
+    os.makedirs(LOG_DIR, exist_ok=True)
+
+    log_file_path = os.path.join(LOG_DIR, f"{file_name}.log")
+
     if not os.path.exists(log_file_path):
         open(log_file_path, 'a').close()
 
     logger = logging.getLogger(file_name)
     logger.setLevel(LoggingConfig.LOG_LEVEL)
 
-    file_handler = logging.FileHandler(log_file_path)
-    file_handler.setLevel(LoggingConfig.LOG_LEVEL)
-
-    formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-    file_handler.setFormatter(formatter)
-
     if not logger.hasHandlers():
-        logger.addHandler(file_handler)
+        if LoggingConfig.ASYNC_LOGGING:
+            writer = get_writer()
+            writer.add_file(file_name, log_file_path)
+            handler = DroppingQueueHandler(writer)
+        else:
+            handler = logging.FileHandler(log_file_path)
+            handler.setFormatter(logging.Formatter(LOG_FORMAT))
+        handler.setLevel(LoggingConfig.LOG_LEVEL)
+
+        logger.addHandler(handler)
+        logger.addFilter(RateLimitFilter())
 
     return logger
@@ -1,21 +1,28 @@
 import os
 import cv2
-import logging
+import time
 import keyboard
-from typing import Optional, List
-from logs.logging_setup import setup_logger
+from typing import Optional
+from logs.logging_setup import setup_logger, shutdown_logging
+from logs.instrumentation import instrumentation
 
 from config import *
-from networking.rio_communication import RoboRio
+from networking.rio_communication import RoboRio, RobotState
 from camera_calculations.mono_video import MonoVision
-from vision_tracking.video_display import VideoDisplay
+from vision_tracking.video_display import VideoDisplay, Overlay
 from vision_tracking.video_processor import FrameProcessor
+from vision_tracking.frame_pipeline import FramePipeline, FramePacket
+from vision_tracking.frame_recorder import FrameRecorder, FrameReplay
+from vision_tracking.stream_grabber import StreamGrabber
+from vision_tracking.video_writer import BackgroundVideoWriter
+from vision_tracking.detection_batch import DetectionView
+from apriltags.pose_estimator import PoseEstimator, FieldPose
 from decision_engine.autoalgae import AlgaePickupCommand
 from decision_engine.autocoral import CoralPickupCommand
 from decision_engine.autoreef import ReefScoringCommand
 from decision_engine.autoprocessor import ProcessorScoringCommand
+from decision_engine.latency_compensation import LatencyCompensator
 from decision_engine.trackable_objects import *
-from robotpy_apriltag import AprilTagDetection
 
 ###############################################################
 
@@ -29,141 +36,184 @@ def main() -> None:
     autoreef = ReefScoringCommand()
     autoprocessor = ProcessorScoringCommand()
     frame_processor = FrameProcessor()
-
-    cap = cv2.VideoCapture(DisplayConfig.INPUT_VIDEO_PATH)
+    pose_estimator = PoseEstimator()
+    latency = LatencyCompensator()
+
+    replaying: bool = RecordingConfig.REPLAY_PATH is not None
+    live_stream: bool = isinstance(DisplayConfig.INPUT_VIDEO_PATH, int) or "://" in DisplayConfig.INPUT_VIDEO_PATH
+    if replaying:
+        cap = FrameReplay()
+    elif live_stream:
+        cap = StreamGrabber(DisplayConfig.INPUT_VIDEO_PATH)
+    else:
+        cap = cv2.VideoCapture(DisplayConfig.INPUT_VIDEO_PATH)
     if not cap.isOpened():
-        logger.error(f"Error opening video: {DisplayConfig.INPUT_VIDEO_PATH}")
+        logger.error(f"Error opening video: {RecordingConfig.REPLAY_PATH if replaying else DisplayConfig.INPUT_VIDEO_PATH}")
         return
-    
-    out: Optional[cv2.VideoWriter] = None
-    if DisplayConfig.SAVE_VIDEO:
-        fourcc: int = cv2.VideoWriter_fourcc(*'mp4v')
-        out = cv2.VideoWriter(DisplayConfig.OUTPUT_VIDEO_PATH, fourcc, 60.0, 
-                              (CameraConfig.FRAME_WIDTH, CameraConfig.FRAME_HEIGHT), True)
 
-    if DebugConfig.TESTING:
-        current_key: str = None
-
-    messages: List = []
+    recorder: Optional[FrameRecorder] = FrameRecorder() if RecordingConfig.RECORD and not replaying else None
     
-    try:
-        logger.info("Video stream opened successfully.")
-        while cap.isOpened():
-            ret, frame = cap.read()
-            if not ret:
-                logger.info("End of video stream.")
-                break
-
-            frame = frame_processor.transform_frame(frame)
-            processed_frame, game_pieces, apriltags = frame_processor.process_frame(frame)
-            frame_processor.calculate_frame_rate()
-            
-            task = roborio.get_data("task") if not DebugConfig.TESTING else DebugConfig.DEFAULT_TASK
-            if DebugConfig.TESTING:
-                for key in DebugConfig.TASK_KEYS:
-                    if keyboard.is_pressed(key):
-                        current_key = key
-                        break
-                if not current_key:
-                    current_key = DebugConfig.DEFAULT_KEY
-
-            processor_id = 3 if roborio.get_data("team_colour") == "red" else 16
-            processor_apriltag: Optional[AprilTagDetection] = next(
-                (tag for tag in apriltags if tag.getId() == processor_id), 
-                None
-            )
-            reef_ids = {6, 7, 8, 9, 10, 11} if roborio.get_data("team_colour") == "red" else {17, 18, 19, 20, 21, 22}
-            reef_apriltags: List[AprilTagDetection] = [
-                tag for tag in apriltags if tag.getId() in reef_ids
-            ]
-            
-            x = y = rot = 0.0
-            success = False
-
-            match task:
-                case "auto":
-                    if not roborio.get_data("has_algae"):
-                        algaes: List[Algae] = game_pieces.get(Algae, [])
-                        best_algae = autoalgae.compute_best_algae(algaes)
-                       
-                        if best_algae: 
-                            x, y, rot, success = autoalgae.get_algae_navigation_command(best_algae)
-                            if success:
-                                logger.info(f'[AUTO] Target Movement -  X: {x}, Y: {y}, ROT: {rot}')
-                                if not DebugConfig.TESTING:
-                                    roborio.send_data(x, y, rot, success)
-                            else:
-                                logger.warning("[AUTO] Cannot Pathfind to Algae")
-                    elif roborio.get_data("has_algae") and processor_apriltag:
-                        x, y, rot, success = autoprocessor.get_processor_navigation_command(processor_apriltag)
+    out: Optional[BackgroundVideoWriter] = None
+    if DisplayConfig.SAVE_VIDEO:
+        out = BackgroundVideoWriter(DisplayConfig.OUTPUT_VIDEO_PATH)
+
+    current_key: Optional[str] = None
+
+    def process(packet: FramePacket) -> FramePacket:
+        """Inference stage: detect, decide and send drive commands for one frame."""
+        nonlocal current_key
+
+        robot_state: RobotState = packet.robot_state or roborio.state
+
+        buffers = frame_processor.next_buffers(packet.frame)
+        frame = frame_processor.transform_frame(packet.frame, buffers.color)
+        frame, game_pieces, apriltags = frame_processor.process_frame(frame, packet.capture_time, buffers.gray,
+                                                                      packet.decision.detected if packet.decision else None)
+        frame_processor.calculate_frame_rate()
+        overlay = Overlay(game_pieces.boxes, game_pieces.class_id, apriltags)
+
+        decision_start = time.perf_counter()
+        task = robot_state.task if not DebugConfig.TESTING else DebugConfig.DEFAULT_TASK
+        if DebugConfig.TESTING:
+            for key in DebugConfig.TASK_KEYS:
+                if keyboard.is_pressed(key):
+                    current_key = key
+                    break
+            if not current_key:
+                current_key = DebugConfig.DEFAULT_KEY
+
+        # The state and time the command is computed against; a replay uses what the robot had when it decided
+        decision_state: RobotState = packet.decision.robot_state if packet.decision else roborio.state
+        decision_time: float = packet.decision.decision_time if packet.decision else time.time()
+
+        # One fused pose per frame, shared by every command below and moved to when the command will arrive
+        time_step = latency.time_step(packet.capture_time, decision_time)
+        with instrumentation.span("main.pose"):
+            pose: Optional[FieldPose] = pose_estimator.estimate(apriltags, packet.capture_time)
+            pose = latency.advance_pose(pose, decision_state, time_step)
+        # Only tags in view are targets; the pose still uses every known tag to place the camera
+        alliance = "red" if robot_state.team_colour == "red" else "blue"
+        visible_ids = frozenset(tag.id for tag in apriltags)
+        processor_id: Optional[int] = next(iter(pose_estimator.layout.ids(alliance, "processor") & visible_ids), None)
+        reef_ids = pose_estimator.layout.ids(alliance, "reef") & visible_ids
+        
+        x = y = rot = 0.0
+        success = False
+
+        match task:
+            case "auto":
+                if not robot_state.has_algae:
+                    algaes: DetectionView = game_pieces.of(Algae)
+                    best_algae = autoalgae.compute_best_algae(algaes)
+                   
+                    if best_algae: 
+                        latency.advance_object(best_algae, robot_state, decision_state, time_step)
+                        x, y, rot, success = autoalgae.get_algae_navigation_command(best_algae)
                         if success:
                             logger.info(f'[AUTO] Target Movement -  X: {x}, Y: {y}, ROT: {rot}')
                             if not DebugConfig.TESTING:
-                                roborio.send_data(x, y, rot, success)
+                                roborio.send_command(x, y, rot, success, packet.capture_time)
                         else:
-                            logger.warning("[AUTO] Cannot Pathfind to Processor")
-
-                case "teleop":
-                    corals: List[Coral] = game_pieces.get(Coral, [])
-                    if corals:
-                        target_coral = autocoral.compute_best_coral(corals)
-                        if target_coral:
-                            angle = MonoVision.get_angle_to_object_in_degrees(target_coral.x)
-                            VideoDisplay.draw_angle_line(frame, angle)
-                            logger.info(f'[TELEOP] Aligning to Coral — Angle: {angle:.2f}°')
-
-                    elif reef_apriltags:
-                        target_apriltag = autoreef.compute_best_apriltag(reef_apriltags)
-                        if target_apriltag:
-                            angle = MonoVision.get_angle_to_object_in_degrees(target_apriltag.getCenter().x)
-                            VideoDisplay.draw_angle_line(frame, angle)
-                            logger.info(f'[TELEOP] Aligning to Processor — Angle: {angle:.2f}°')
-
-                case "test":
-                    if current_key == "1":
-                        algaes: List[Algae] = game_pieces.get(Algae, [])
-                        best_algae = autoalgae.compute_best_algae(algaes)
-                        if best_algae:
-                            x, y, rot, success = autoalgae.get_algae_navigation_command(best_algae)
-                            if success:
-                                angle = MonoVision.get_angle_to_object_in_degrees(best_algae.x)
-                                VideoDisplay.draw_angle_line(frame, angle)
-                                logger.info(f'[TEST] Algae Nav → X: {x:.2f}, Y: {y:.2f}, ROT: {rot:.2f}')
-                                if not DebugConfig.TESTING:
-                                    roborio.send_data(x, y, rot, success)
-                            else:
-                                logger.warning("[TEST] Algae pathfinding failed.")
-                    elif current_key == "2" and processor_apriltag:
-                        x, y, rot, success = autoprocessor.get_processor_navigation_command(processor_apriltag) 
+                            logger.warning("[AUTO] Cannot Pathfind to Algae")
+                elif robot_state.has_algae and pose:
+                    x, y, rot, success = autoprocessor.get_processor_navigation_command(pose, processor_id)
+                    if success:
+                        logger.info(f'[AUTO] Target Movement -  X: {x}, Y: {y}, ROT: {rot}')
+                        if not DebugConfig.TESTING:
+                            roborio.send_command(x, y, rot, success, packet.capture_time)
+                    else:
+                        logger.warning("[AUTO] Cannot Pathfind to Processor")
+
+            case "teleop":
+                corals: DetectionView = game_pieces.of(Coral)
+                if corals:
+                    target_coral = autocoral.compute_best_coral(corals)
+                    if target_coral:
+                        angle = MonoVision.get_angle_to_object_in_degrees(target_coral.x)
+                        overlay.add_angle_line(angle)
+                        logger.info(f'[TELEOP] Aligning to Coral — Angle: {angle:.2f}°')
+
+                elif pose:
+                    target_apriltag = autoreef.compute_best_apriltag(pose, reef_ids)
+                    if target_apriltag is not None:
+                        # The driver is in control, so the command is only shown, not sent
+                        x, y, rot, success = autoreef.get_reef_navigation_command(pose, target_apriltag)
+                        _, angle = pose.target(target_apriltag)
+                        overlay.add_angle_line(angle)
+                        logger.info(f'[TELEOP] Aligning to Reef — Angle: {angle:.2f}°, X: {x:.2f}, Y: {y:.2f}, ROT: {rot:.2f}')
+
+            case "test":
+                if current_key == "1":
+                    algaes: DetectionView = game_pieces.of(Algae)
+                    best_algae = autoalgae.compute_best_algae(algaes)
+                    if best_algae:
+                        latency.advance_object(best_algae, robot_state, decision_state, time_step)
+                        x, y, rot, success = autoalgae.get_algae_navigation_command(best_algae)
                         if success:
-                            angle_to_processor = MonoVision.get_angle_to_object_in_degrees(processor_apriltag.getCenter().x)
-                            VideoDisplay.draw_angle_line(frame, angle_to_processor)
-                            logger.info(f'[TEST] Target Movement -  X: {x}, Y: {y}, ROT: {rot}')
+                            angle = MonoVision.get_angle_to_object_in_degrees(best_algae.x)
+                            overlay.add_angle_line(angle)
+                            logger.info(f'[TEST] Algae Nav → X: {x:.2f}, Y: {y:.2f}, ROT: {rot:.2f}')
                             if not DebugConfig.TESTING:
-                                roborio.send_data(x, y, rot, success)
+                                roborio.send_command(x, y, rot, success, packet.capture_time)
                         else:
-                            logger.warning("[TEST] Cannot Pathfind to Processor")
-                
-            if DisplayConfig.SHOW_VIDEO:
-                messages.append(current_key)
-                messages.append(task)
-                messages.append(f'X: {x}, Y: {y}, R: {rot}')
-                VideoDisplay.insert_text_onto_frame(frame, messages)
-                messages = []
-                VideoDisplay.show_frame(DisplayConfig.WINDOW_TITLE, processed_frame)
+                            logger.warning("[TEST] Algae pathfinding failed.")
+                elif current_key == "2" and pose:
+                    x, y, rot, success = autoprocessor.get_processor_navigation_command(pose, processor_id)
+                    if success:
+                        _, angle_to_processor = pose.target(processor_id)
+                        overlay.add_angle_line(angle_to_processor)
+                        logger.info(f'[TEST] Target Movement -  X: {x}, Y: {y}, ROT: {rot}')
+                        if not DebugConfig.TESTING:
+                            roborio.send_command(x, y, rot, success, packet.capture_time)
+                    else:
+                        logger.warning("[TEST] Cannot Pathfind to Processor")
             
-            if DisplayConfig.SAVE_VIDEO and out:
-                out.write(processed_frame)
+        instrumentation.record("main.decision", time.perf_counter() - decision_start)
+
+        # The raw frame is untouched until the output stage draws on it, so it can be recorded with the decision
+        if recorder:
+            recorder.record(packet.frame, packet.capture_time, robot_state, decision_time, decision_state,
+                            frame_processor.detected)
 
-            if DisplayConfig.SHOW_VIDEO and cv2.waitKey(1) & 0xFF == ord('q'):
-                break
+        if DisplayConfig.SHOW_VIDEO:
+            overlay.messages = [current_key, task, f'X: {x}, Y: {y}, R: {rot}']
+
+        packet.frame = frame
+        packet.result = overlay
+        return packet
+
+    def output(packet: FramePacket) -> bool:
+        """Output stage: display and record a processed frame, returning False to stop."""
+        if DisplayConfig.SHOW_VIDEO or DisplayConfig.SAVE_VIDEO:
+            with instrumentation.span("output.render"):
+                packet.result.render(packet.frame)
+
+        if DisplayConfig.SHOW_VIDEO:
+            VideoDisplay.show_frame(DisplayConfig.WINDOW_TITLE, packet.frame)
+
+        if DisplayConfig.SAVE_VIDEO and out:
+            out.write(packet.frame, packet.capture_time)
+
+        return not (DisplayConfig.SHOW_VIDEO and cv2.waitKey(1) & 0xFF == ord('q'))
+
+    try:
+        logger.info("Video stream opened successfully.")
+        instrumentation.start_reporting()
+        # A file decodes faster than real time, so dropping frames would only lose most of the recording, and its
+        # frames are timed by their position in the file rather than when processing got round to reading them
+        video_file = not replaying and not live_stream
+        FramePipeline(cap, process, output, lossless=replaying or video_file, media_clock=video_file).run()
     finally:
+        instrumentation.stop_reporting()
+        frame_processor.close()
         cap.release()
+        if recorder:
+            recorder.close()
         if DisplayConfig.SAVE_VIDEO and out:
-            out.release()
+            out.close()
             logger.info("Video file closed properly.")
         cv2.destroyAllWindows()
-        logging.shutdown()
+        shutdown_logging()
 
 ###############################################################
 
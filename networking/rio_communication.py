@@ -1,15 +1,80 @@
 import os
 import json
+import time
 import logging
+import threading
 from logs.logging_setup import setup_logger
-from typing import Optional, Dict, Any
+from logs.instrumentation import instrumentation
+from typing import Optional, Dict, Any, List, Tuple
 from config import NetworkingConfig
 
 from networktables import NetworkTables
 
 ##############################################################################
 
+class RobotState:
+    """Immutable snapshot of the robot state published by the RoboRio, replaced whole on every change."""
+    __slots__ = ('task', 'team_colour', 'has_algae', 'connected', 'version', 'updated', 'chassis_speeds')
+
+    def __init__(self, task: Optional[str] = None, team_colour: Optional[str] = None, has_algae: bool = False,
+                 connected: bool = False, version: int = 0, updated: float = 0.0,
+                 chassis_speeds: Tuple[float, float, float] = (0.0, 0.0, 0.0)) -> None:
+        self.task: Optional[str] = task
+        self.team_colour: Optional[str] = team_colour
+        self.has_algae: bool = has_algae
+        self.connected: bool = connected
+        self.version: int = version
+        self.updated: float = updated
+        self.chassis_speeds: Tuple[float, float, float] = chassis_speeds   # robot-relative vx, vy in m/s and omega in rad/s
+
+    def replace(self, **changes) -> "RobotState":
+        """Copy with the given fields changed and the version bumped."""
+        fields = {name: getattr(self, name) for name in self.__slots__}
+        fields.update(changes, version=self.version + 1, updated=time.monotonic())
+        return RobotState(**fields)
+
+    def age(self) -> float:
+        """Seconds since the last change."""
+        return time.monotonic() - self.updated
+
+    def is_stale(self, max_age: float) -> bool:
+        """True when disconnected or when nothing has changed for longer than max_age seconds."""
+        return not self.connected or self.age() > max_age
+
+class CommandThrottle:
+    """Decides which drive commands are worth publishing: caps the rate and skips ones that barely changed."""
+    def __init__(self) -> None:
+        self.last_command: Optional[Tuple[float, float, float, bool]] = None
+        self.last_publish: float = float('-inf')
+        self.next_publish: float = float('-inf')
+        self.rate_limited: int = 0
+        self.unchanged: int = 0
+
+    def accept(self, x: float, y: float, rot: float, success: bool, now: float) -> bool:
+        if now < self.next_publish:
+            self.rate_limited += 1
+            return False
+
+        since_publish = now - self.last_publish
+
+        last = self.last_command
+        if (last is not None and success == last[3] and since_publish < NetworkingConfig.COMMAND_HEARTBEAT_IN_SECONDS
+                and abs(x - last[0]) < NetworkingConfig.COMMAND_DEADBAND
+                and abs(y - last[1]) < NetworkingConfig.COMMAND_DEADBAND
+                and abs(rot - last[2]) < NetworkingConfig.COMMAND_DEADBAND):
+            self.unchanged += 1
+            return False
+
+        # Schedule against the previous slot rather than now so frame jitter doesn't lower the average rate
+        interval = 1 / NetworkingConfig.MAX_COMMAND_RATE_IN_HZ
+        self.next_publish = max(self.next_publish, now - interval) + interval
+        self.last_command = (x, y, rot, success)
+        self.last_publish = now
+        return True
+
 class RoboRio:
+    COMMAND_SCHEMA: Tuple[str, ...] = ("x", "y", "rot", "success", "capture_time", "sequence", "latency")
+
     def __init__(self) -> None:
         file_name = os.path.splitext(os.path.basename(__file__))[0]
         setup_logger(file_name)
@@ -20,34 +85,112 @@ class RoboRio:
         self.logger.info(
             f'NetworkTables initialized with server: {NetworkingConfig.ROBOT_IP_ADDRESS}')
 
-    def send_data(self, data: Dict[str, Any]) -> None:
-        """Posts JSON data to NetworkTables."""
-        if not self.network_tables_connection():
-            self.logger.warning(
-                "NetworkTables is not connected. Data not sent.")
+        # Both listener threads read-modify-write the snapshot; the frame loop only ever reads the reference
+        self.state_lock: threading.Lock = threading.Lock()
+        self.state: RobotState = RobotState()
+        self.command_throttle: CommandThrottle = CommandThrottle()
+        self.command_sequence: int = 0
+        NetworkTables.addConnectionListener(self.on_connection_changed, immediateNotify=True)
+        self.table.addEntryListener(self.on_entry_changed, immediateNotify=True)
+
+    def parse_field(self, key: str, value) -> Any:
+        """Decodes one state entry to its STATE_FIELDS type, raising TypeError or ValueError if it does not fit."""
+        parsed = json.loads(value) if isinstance(value, str) else value
+        return NetworkingConfig.STATE_FIELDS[key](parsed) if parsed is not None else None
+
+    def read_fields(self) -> Dict[str, Any]:
+        """Every state entry currently in the table, skipping ones that are missing or fail to decode."""
+        fields = {}
+        for key in NetworkingConfig.STATE_FIELDS:
+            value = self.table.getValue(key, None)
+            if value is None:
+                continue
+            try:
+                fields[key] = self.parse_field(key, value)
+            except (TypeError, ValueError) as e:
+                self.logger.error(f'Failed to decode {key} from NetworkTables: {e}')
+        return fields
+
+    def on_connection_changed(self, connected: bool, info) -> None:
+        """Clears the cached state on disconnect and rebuilds it from the table on reconnect."""
+        with self.state_lock:
+            if connected:
+                # Entry listeners only fire for values that changed while we were away, so reread all of them
+                self.state = RobotState(version=self.state.version).replace(connected=True, **self.read_fields())
+                self.logger.info(f'Connected to NetworkTables server: {info}')
+            else:
+                self.state = RobotState(version=self.state.version + 1, updated=time.monotonic())
+                instrumentation.count("roborio.disconnected")
+                self.logger.warning("NetworkTables disconnected. Robot state cleared.")
+
+    def on_entry_changed(self, table, key: str, value, is_new: bool) -> None:
+        """Parses a changed state entry once, off the frame loop, into a new snapshot."""
+        if key not in NetworkingConfig.STATE_FIELDS:
             return
 
         try:
-            json_data = json.dumps(data)
-            self.table.putString(NetworkingConfig.DATA_ENTRY_NAME, json_data)
-            self.logger.info(
-                f'Data successfully posted to NetworkTables: {json_data}')
+            parsed = self.parse_field(key, value)
         except (TypeError, ValueError) as e:
-            self.logger.error(f'Failed to serialize data to JSON: {e}')
+            self.logger.error(f'Failed to decode {key} from NetworkTables: {e}')
+            return
+
+        with self.state_lock:
+            self.state = self.state.replace(**{key: parsed}, connected=NetworkTables.isConnected())
+
+    def send_command(self, x: float, y: float, rot: float, success: bool, capture_time: float) -> bool:
+        """Publishes a drive command as a number array laid out as COMMAND_SCHEMA, returning False if it was held back."""
+        with instrumentation.span("roborio.send_command"):
+            if not self.state.connected:
+                instrumentation.count("roborio.disconnected")
+                return False
+
+            if not self.command_throttle.accept(x, y, rot, success, time.monotonic()):
+                instrumentation.count("roborio.commands_suppressed")
+                return False
+
+            # sequence lets the robot drop stale commands; latency is measured on this clock, so the robot can
+            # apply it without syncing to capture_time
+            self.command_sequence += 1
+            latency = time.time() - capture_time
+            instrumentation.record("roborio.command_latency", latency)
+            self.table.putNumberArray(NetworkingConfig.COMMAND_ENTRY_NAME,
+                                      (x, y, rot, float(success), capture_time, float(self.command_sequence), latency))
+            NetworkTables.flush()
+            self.logger.debug(f'Command {self.command_sequence} posted to NetworkTables: x={x:.1f}, y={y:.1f}, rot={rot:.1f}')
+            return True
+
+    def send_data(self, data: Dict[str, Any]) -> None:
+        """Posts JSON data to NetworkTables."""
+        with instrumentation.span("roborio.send_data"):
+            if not self.network_tables_connection():
+                instrumentation.count("roborio.disconnected")
+                self.logger.warning(
+                    "NetworkTables is not connected. Data not sent.")
+                return
+
+            try:
+                json_data = json.dumps(data)
+                self.table.putString(NetworkingConfig.DATA_ENTRY_NAME, json_data)
+                self.logger.info(
+                    f'Data successfully posted to NetworkTables: {json_data}')
+            except (TypeError, ValueError) as e:
+                self.logger.error(f'Failed to serialize data to JSON: {e}')
 
     def get_data(self, data) -> Optional[str]:
         """Pulls JSON data from NetworkTables and returns it as a dictionary."""
-        if not self.network_tables_connection():
-            self.logger.warning(
-                "NetworkTables is not connected. Returning None.")
-            return None
+        with instrumentation.span("roborio.get_data"):
+            if not self.network_tables_connection():
+                instrumentation.count("roborio.disconnected")
+                self.logger.warning(
+                    "NetworkTables is not connected. Returning None.")
+                return None
 
-        json_data = self.table.getString(data, "{}")
-        try:
-            return json.loads(json_data)
-        except json.JSONDecodeError as e:
-            self.logger.error(f'Error decoding JSON from NetworkTables: {e}')
-            return None
+            json_data = self.table.getString(data, "{}")
+            try:
+                return json.loads(json_data)
+            except json.JSONDecodeError as e:
+                self.logger.error(f'Error decoding JSON from NetworkTables: {e}')
+                return None
 
     @staticmethod
     def network_tables_connection() -> bool:
@@ -0,0 +1,87 @@
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict
+
+import cv2
+import numpy as np
+
+###############################################################
+
+FRAME_SIZE: int = 640
+BITS: int = 16
+BLOCK: int = FRAME_SIZE // BITS     # one black or white block per bit of the frame number, big enough to survive JPEG
+
+class MJPEGServer:
+    """Local stand-in for the Limelight stream: numbered JPEG frames at a fixed rate, with optional outages."""
+    def __init__(self, port: int = 0, fps: float = 30.0, outage_after_frames: int = 0, outage_seconds: float = 0.0) -> None:
+        self.fps: float = fps
+        self.outage_after_frames: int = outage_after_frames
+        self.outage_seconds: float = outage_seconds
+        self.sent_at: Dict[int, float] = {}
+        self.frame_number: int = 0
+        self.outage_until: float = 0.0
+        self.stopped: bool = False
+        self.lock: threading.Lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if time.time() < server.outage_until:
+                    self.send_error(503)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "multipart/x-mixed-replace; boundary=frame")
+                self.end_headers()
+                server.stream(self)
+
+            def log_message(self, format, *args) -> None:
+                pass
+
+        self.httpd: ThreadingHTTPServer = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.httpd.daemon_threads = True
+        # Port 0 picks a free one, which tests use so they never collide
+        self.url: str = f"http://127.0.0.1:{self.httpd.server_address[1]}/stream.mjpg"
+
+    @staticmethod
+    def encode_number(frame_number: int) -> np.ndarray:
+        frame = np.full((FRAME_SIZE, FRAME_SIZE, 3), 127, dtype=np.uint8)
+        for bit in range(BITS):
+            frame[:BLOCK, bit * BLOCK:(bit + 1) * BLOCK] = 255 if frame_number >> bit & 1 else 0
+        return frame
+
+    @staticmethod
+    def decode_number(frame: np.ndarray) -> int:
+        means = frame[BLOCK // 4:BLOCK * 3 // 4].reshape(BLOCK // 2, BITS, BLOCK, 3)[:, :, BLOCK // 4:BLOCK * 3 // 4].mean(axis=(0, 2, 3))
+        return int(sum(1 << bit for bit in range(BITS) if means[bit] > 127))
+
+    def stream(self, handler: BaseHTTPRequestHandler) -> None:
+        next_frame = time.perf_counter()
+        try:
+            while not self.stopped:
+                with self.lock:
+                    self.frame_number += 1
+                    frame_number = self.frame_number
+                if self.outage_after_frames and frame_number == self.outage_after_frames:
+                    self.outage_until = time.time() + self.outage_seconds
+                    return
+
+                jpeg = cv2.imencode(".jpg", self.encode_number(frame_number))[1].tobytes()
+                self.sent_at[frame_number] = time.time()
+                handler.wfile.write(b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: "
+                                    + str(len(jpeg)).encode() + b"\r\n\r\n" + jpeg + b"\r\n")
+
+                next_frame += 1 / self.fps
+                time.sleep(max(next_frame - time.perf_counter(), 0))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def start(self) -> None:
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def stop(self) -> None:
+        """Stop accepting connections and end the open streams, as if the camera went away."""
+        self.stopped = True
+        self.httpd.shutdown()
+        self.httpd.server_close()
@@ -0,0 +1,110 @@
+import time
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+import pytest
+
+from networking.rio_communication import RobotState
+from vision_tracking.video_processor import FrameProcessor
+from vision_tracking.frame_recorder import FrameRecorder, FrameReplay
+from decision_engine.autoalgae import AlgaePickupCommand
+from decision_engine.latency_compensation import LatencyCompensator
+from decision_engine.trackable_objects import Algae
+
+###############################################################
+
+FRAMES: int = 40
+FRAME_SHAPE: Tuple[int, int, int] = (480, 640, 3)
+
+class StandInDetector:
+    """Finds bright squares as algae, taking as long as it is told to so the scheduler's interval can be steered."""
+    def __init__(self, latency: float) -> None:
+        self.latency: float = latency
+
+    def detect(self, frame: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        time.sleep(self.latency)
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        contours, _ = cv2.findContours((gray > 128).astype(np.uint8), cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+        boxes = np.array([(x, y, x + w, y + h) for x, y, w, h in map(cv2.boundingRect, contours)], dtype=np.int32).reshape(-1, 4)
+        confidences = np.linspace(0.9, 0.8, len(boxes), dtype=np.float32)
+        return boxes, confidences, np.zeros(len(boxes), dtype=np.int32)
+
+def make_frames() -> List[np.ndarray]:
+    """Two textured squares drifting at different speeds, so optical flow and YOLO disagree slightly."""
+    rng = np.random.default_rng(0)
+    frames = []
+    for index in range(FRAMES):
+        frame = np.zeros(FRAME_SHAPE, dtype=np.uint8)
+        for x, y, size, speed in ((60, 200, 90, 5), (400, 120, 50, -3)):
+            left = x + speed * index
+            frame[y:y + size, left:left + size] = rng.integers(150, 256, (size, size, 3), dtype=np.uint8)
+        frames.append(frame)
+    return frames
+
+def decide(frame_processor: FrameProcessor, autoalgae: AlgaePickupCommand, latency: LatencyCompensator,
+           capture_state: RobotState, decision_state: RobotState, capture_time: float, decision_time: float) -> Tuple:
+    """Everything the frame loop hands on for one frame, as main does for the algae command."""
+    game_pieces = frame_processor.game_pieces
+    command = (0.0, 0.0, 0.0, False)
+    best_algae = autoalgae.compute_best_algae(game_pieces.of(Algae))
+    if best_algae:
+        latency.advance_object(best_algae, capture_state, decision_state, latency.time_step(capture_time, decision_time))
+        command = tuple(autoalgae.get_algae_navigation_command(best_algae))
+    return (game_pieces.boxes.tolist(), game_pieces.confidence.tolist(), game_pieces.track_id.tolist(),
+            frame_processor.detected, command)
+
+@pytest.fixture
+def frame_processor(monkeypatch):
+    def create(latency: float) -> FrameProcessor:
+        monkeypatch.setattr(FrameProcessor, "create_detector", staticmethod(lambda: StandInDetector(latency)))
+        processor = FrameProcessor()
+        processors.append(processor)
+        return processor
+
+    processors: List[FrameProcessor] = []
+    yield create
+    for processor in processors:
+        processor.close()
+
+def test_replay_reproduces_recorded_output(tmp_path, frame_processor) -> None:
+    frames = make_frames()
+
+    # Recording side: a slow detector, so the scheduler propagates boxes on most frames
+    processor = frame_processor(0.03)
+    autoalgae, latency = AlgaePickupCommand(), LatencyCompensator()
+    recorder = FrameRecorder(str(tmp_path / "match.ring"), FRAMES)
+    state = RobotState("auto", "red", False, True, 1, time.monotonic(), (0.5, 0.0, 0.0))
+    recorded = []
+    for index, frame in enumerate(frames):
+        capture_state = state
+        if index % 7 == 0:
+            state = state.replace(chassis_speeds=(0.5 + index / 10, 0.1 * index, 0.01 * index))
+        capture_time = time.time()
+        processor.process_frame(frame, capture_time)
+        decision_time = time.time()
+        recorded.append(decide(processor, autoalgae, latency, capture_state, state, capture_time, decision_time))
+        recorder.record(frame, capture_time, capture_state, decision_time, state, processor.detected)
+    recorder.close()
+
+    detected = [output[3] for output in recorded]
+    assert any(detected) and not all(detected)
+    assert all(output[4][3] for output in recorded)
+
+    # Replaying side: a fast detector, whose own schedule would run YOLO on every frame
+    processor = frame_processor(0.0)
+    autoalgae, latency = AlgaePickupCommand(), LatencyCompensator()
+    replay = FrameReplay(recorder.path)
+    replayed = []
+    while True:
+        ret, frame = replay.read()
+        if not ret:
+            break
+        decision = replay.decision
+        processor.process_frame(frame, replay.capture_time, detect=decision.detected)
+        replayed.append(decide(processor, autoalgae, latency, replay.robot_state, decision.robot_state,
+                               replay.capture_time, decision.decision_time))
+
+    assert len(replayed) == FRAMES
+    for index, (expected, actual) in enumerate(zip(recorded, replayed)):
+        assert actual == expected, f"frame {index}"
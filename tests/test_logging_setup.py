@@ -0,0 +1,35 @@
+import logging
+import threading
+
+from config import LoggingConfig
+from logs.logging_setup import AsyncLogWriter
+
+###############################################################
+
+THREADS: int = 8
+RECORDS_PER_THREAD: int = 20000
+QUEUE_SIZE: int = 1000
+
+def test_every_record_is_queued_or_counted_as_dropped(monkeypatch) -> None:
+    # Keep the writer asleep so nothing is drained while the threads fill the queue
+    monkeypatch.setattr(LoggingConfig, "FLUSH_INTERVAL_IN_SECONDS", 60.0)
+    writer = AsyncLogWriter(QUEUE_SIZE)
+    record = logging.LogRecord("test", logging.INFO, __file__, 0, "message", None, None)
+    start = threading.Barrier(THREADS)
+
+    def log() -> None:
+        start.wait()
+        for _ in range(RECORDS_PER_THREAD):
+            writer.enqueue(record)
+
+    threads = [threading.Thread(target=log) for _ in range(THREADS)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    try:
+        assert len(writer.records) == QUEUE_SIZE
+        assert writer.dropped == THREADS * RECORDS_PER_THREAD - QUEUE_SIZE
+    finally:
+        writer.stop()
@@ -0,0 +1,108 @@
+import time
+import socket
+from typing import Callable, Iterator
+
+import pytest
+from networktables import NetworkTables, NetworkTablesInstance
+
+from config import NetworkingConfig
+from networking.rio_communication import RoboRio
+
+###############################################################
+
+TIMEOUT_IN_SECONDS: float = 5.0
+
+def wait_for(condition: Callable[[], bool]) -> bool:
+    deadline = time.monotonic() + TIMEOUT_IN_SECONDS
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return condition()
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+class StandInServer:
+    """A NetworkTables server on localhost playing the RoboRio's side of the table."""
+    def __init__(self, port: int) -> None:
+        self.port: int = port
+        self.instance: NetworkTablesInstance = None
+
+    def start(self, **values) -> None:
+        self.instance = NetworkTablesInstance.create()
+        table = self.instance.getTable(NetworkingConfig.NETWORK_TABLE_NAME)
+        for key, value in values.items():
+            self.put(key, value, table)
+        self.instance.startServer(persistFilename="", listenAddress="127.0.0.1", port=self.port)
+
+    def put(self, key: str, value, table=None) -> None:
+        table = table or self.instance.getTable(NetworkingConfig.NETWORK_TABLE_NAME)
+        if isinstance(value, tuple):
+            table.putNumberArray(key, value)
+        else:
+            table.putString(key, value)
+        self.instance.flush()
+
+    def stop(self) -> None:
+        self.instance.stopServer()
+
+@pytest.fixture
+def server(monkeypatch) -> Iterator[StandInServer]:
+    port = free_port()
+    monkeypatch.setattr(NetworkingConfig, "ROBOT_IP_ADDRESS", ("127.0.0.1", port))
+    server = StandInServer(port)
+    yield server
+    NetworkTables.shutdown()
+    server.stop()
+
+INITIAL_VALUES = {"task": '"auto"', "team_colour": '"red"', "has_algae": "true", "chassis_speeds": (1.0, 0.5, 0.1)}
+
+def test_initial_values(server: StandInServer) -> None:
+    server.start(**INITIAL_VALUES)
+    roborio = RoboRio()
+
+    assert wait_for(lambda: roborio.state.connected and roborio.state.chassis_speeds == (1.0, 0.5, 0.1))
+    state = roborio.state
+    assert (state.task, state.team_colour, state.has_algae) == ("auto", "red", True)
+
+def test_change(server: StandInServer) -> None:
+    server.start(**INITIAL_VALUES)
+    roborio = RoboRio()
+    assert wait_for(lambda: roborio.state.task == "auto")
+    version = roborio.state.version
+
+    server.put("task", '"teleop"')
+    assert wait_for(lambda: roborio.state.task == "teleop")
+    assert roborio.state.version > version
+    assert roborio.state.team_colour == "red"
+
+def test_reconnect_restores_unchanged_values(server: StandInServer) -> None:
+    server.start(**INITIAL_VALUES)
+    roborio = RoboRio()
+    assert wait_for(lambda: roborio.state.task == "auto")
+
+    server.stop()
+    assert wait_for(lambda: not roborio.state.connected)
+    assert roborio.state.task is None
+
+    # The restarted server holds the same values, so no entry listener fires for them
+    server.start(**INITIAL_VALUES)
+    assert wait_for(lambda: roborio.state.connected and roborio.state.task == "auto")
+    state = roborio.state
+    assert (state.team_colour, state.has_algae, state.chassis_speeds) == ("red", True, (1.0, 0.5, 0.1))
+
+def test_reconnect_without_entry_notifications(server: StandInServer) -> None:
+    server.start(**INITIAL_VALUES)
+    roborio = RoboRio()
+    assert wait_for(lambda: roborio.state.task == "auto")
+
+    # A radio blip on ntcore only fires the connection listeners; the unchanged entries stay silent
+    roborio.on_connection_changed(False, None)
+    assert roborio.state.task is None
+    roborio.on_connection_changed(True, None)
+    state = roborio.state
+    assert state.connected
+    assert (state.task, state.team_colour, state.has_algae, state.chassis_speeds) == ("auto", "red", True, (1.0, 0.5, 0.1))
@@ -0,0 +1,123 @@
+import time
+from typing import Callable, Iterator, List
+
+import pytest
+
+from config import StreamConfig
+from vision_tracking.stream_grabber import StreamGrabber
+from tests.mjpeg_server import MJPEGServer
+
+###############################################################
+
+TIMEOUT_IN_SECONDS: float = 10.0
+
+def wait_for(condition: Callable[[], bool]) -> bool:
+    deadline = time.monotonic() + TIMEOUT_IN_SECONDS
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.02)
+    return condition()
+
+def read_frame(grabber: StreamGrabber):
+    deadline = time.monotonic() + TIMEOUT_IN_SECONDS
+    while time.monotonic() < deadline:
+        ret, frame = grabber.read()
+        if ret:
+            return frame
+    raise AssertionError("no frame from the stream")
+
+@pytest.fixture(autouse=True)
+def fast_reconnects(monkeypatch) -> None:
+    monkeypatch.setattr(StreamConfig, "MIN_RECONNECT_DELAY_IN_SECONDS", 0.05)
+    monkeypatch.setattr(StreamConfig, "MAX_RECONNECT_DELAY_IN_SECONDS", 0.2)
+    monkeypatch.setattr(StreamConfig, "CONNECTION_TIMEOUT_IN_SECONDS", 0.5)
+
+@pytest.fixture
+def servers() -> Iterator[Callable[..., MJPEGServer]]:
+    started: List[MJPEGServer] = []
+
+    def start(**options) -> MJPEGServer:
+        server = MJPEGServer(**options)
+        server.start()
+        started.append(server)
+        return server
+
+    yield start
+    for server in started:
+        if not server.stopped:
+            server.stop()
+
+def test_read_returns_newest_frame_and_counts_drops(servers) -> None:
+    server = servers(fps=30.0)
+    grabber = StreamGrabber(server.url)
+    try:
+        first = MJPEGServer.decode_number(read_frame(grabber))
+        time.sleep(0.3)
+        newest = MJPEGServer.decode_number(read_frame(grabber))
+
+        # Frames that arrived while nobody was reading are skipped, not queued
+        assert newest - first >= 5
+        assert server.frame_number - newest <= 2
+        assert grabber.dropped >= newest - first - 1
+
+        # A frame is handed out once; the next read waits for a new one
+        assert MJPEGServer.decode_number(read_frame(grabber)) > newest
+    finally:
+        grabber.release()
+
+def test_late_frames_are_counted(servers, monkeypatch) -> None:
+    monkeypatch.setattr(StreamConfig, "LATE_FRAME_THRESHOLD_IN_SECONDS", 0.05)
+    server = servers(fps=5.0)
+    grabber = StreamGrabber(server.url)
+    try:
+        # A read that waits for the frame gets it fresh
+        read_frame(grabber)
+        assert grabber.late == 0
+        # Frames come every 200 ms, so the newest one is about 100 ms old when read 300 ms later
+        for _ in range(3):
+            time.sleep(0.3)
+            read_frame(grabber)
+        assert grabber.late >= 2
+    finally:
+        grabber.release()
+
+def test_reconnects_with_backoff_after_an_outage(servers, monkeypatch) -> None:
+    attempts: List[float] = []
+    open_stream = StreamGrabber.open
+
+    def recording_open(grabber: StreamGrabber):
+        attempts.append(time.monotonic())
+        return open_stream(grabber)
+
+    monkeypatch.setattr(StreamGrabber, "open", recording_open)
+    server = servers(fps=30.0, outage_after_frames=10, outage_seconds=1.0)
+    grabber = StreamGrabber(server.url)
+    try:
+        assert wait_for(lambda: grabber.reconnects == 1)
+        # The last frame before the outage may still be waiting; frames after it must follow
+        assert wait_for(lambda: MJPEGServer.decode_number(read_frame(grabber)) > 10)
+
+        # The first open plus at least three failed retries over a one second outage
+        gaps = [later - earlier for earlier, later in zip(attempts[1:], attempts[2:])]
+        assert len(attempts) >= 4
+        assert all(later >= earlier * 0.9 for earlier, later in zip(gaps, gaps[1:]))
+        assert max(gaps) < StreamConfig.MAX_RECONNECT_DELAY_IN_SECONDS + StreamConfig.CONNECTION_TIMEOUT_IN_SECONDS + 0.2
+        assert grabber.isOpened()
+    finally:
+        grabber.release()
+
+def test_release_returns_on_a_dead_connection(servers) -> None:
+    server = servers(fps=30.0)
+    grabber = StreamGrabber(server.url)
+    read_frame(grabber)
+
+    server.stop()
+    assert wait_for(lambda: grabber.capture is None)
+
+    start = time.monotonic()
+    grabber.release()
+    assert time.monotonic() - start < StreamConfig.CONNECTION_TIMEOUT_IN_SECONDS * 2 + 0.5
+    assert not grabber.thread.is_alive()
+    assert not grabber.isOpened()
+    assert grabber.read() == (False, None)
@@ -0,0 +1,196 @@
+import os
+import time
+import logging
+import argparse
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from logs.logging_setup import setup_logger
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from config import BatchConfig, YOLOConfig
+from .video_processor import FrameProcessor
+from .object_tracker import ObjectTracker
+from decision_engine.autoalgae import AlgaePickupCommand
+from decision_engine.candidate_scorer import TargetLock
+from decision_engine.trackable_objects import Algae
+
+###############################################################
+
+# Set up once per worker process by init_worker
+_frame_processor: Optional[FrameProcessor] = None
+_autoalgae: Optional[AlgaePickupCommand] = None
+
+class BatchColumns:
+    """Per-frame results of one chunk, kept as columns keyed by frame index so chunks merge by concatenation."""
+    def __init__(self) -> None:
+        self.columns: Dict[str, List[np.ndarray]] = {}
+
+    def append(self, **values) -> None:
+        for name, value in values.items():
+            self.columns.setdefault(name, []).append(value)
+
+    def add_frame(self, frame_index: int, timestamp: float, game_pieces, apriltags: List,
+                  command: Tuple[float, float, float, bool], best_algae: int) -> None:
+        x, y, rot, success = command
+        self.append(frame_index=np.array([frame_index], dtype=np.int64),
+                    timestamp=np.array([timestamp], dtype=np.float64),
+                    algae_x=np.array([x], dtype=np.float32),
+                    algae_y=np.array([y], dtype=np.float32),
+                    algae_rot=np.array([rot], dtype=np.float32),
+                    algae_success=np.array([success], dtype=bool),
+                    best_algae_detection=np.array([best_algae], dtype=np.int64))
+
+        self.append(detection_frame=np.full(len(game_pieces), frame_index, dtype=np.int64),
+                    detection_box=game_pieces.boxes.reshape(-1, 4),
+                    detection_confidence=game_pieces.confidence,
+                    detection_class_id=game_pieces.class_id,
+                    detection_distance=game_pieces.distance,
+                    detection_angle=game_pieces.angle)
+
+        self.append(apriltag_frame=np.full(len(apriltags), frame_index, dtype=np.int64),
+                    apriltag_id=np.array([tag.id for tag in apriltags], dtype=np.int32),
+                    apriltag_center=np.array([tag.center for tag in apriltags], dtype=np.float32).reshape(-1, 2),
+                    apriltag_corners=np.array([tag.corners for tag in apriltags], dtype=np.float32).reshape(-1, 4, 2),
+                    apriltag_decision_margin=np.array([tag.decision_margin for tag in apriltags], dtype=np.float32),
+                    apriltag_hamming=np.array([tag.hamming for tag in apriltags], dtype=np.int32))
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        return {name: np.concatenate(values) for name, values in self.columns.items()}
+
+    @staticmethod
+    def merge(chunks: List[Dict[str, np.ndarray]]) -> Dict[str, np.ndarray]:
+        chunks = [chunk for chunk in chunks if chunk]
+        return {name: np.concatenate([chunk[name] for chunk in chunks]) for name in chunks[0]} if chunks else {}
+
+def init_worker(threads_per_worker: int) -> None:
+    """Load the detector once per process, splitting the cores evenly between workers."""
+    global _frame_processor, _autoalgae
+    cv2.setNumThreads(1)
+    YOLOConfig.NUM_THREADS = threads_per_worker
+    _frame_processor = FrameProcessor()
+    _autoalgae = AlgaePickupCommand()
+
+def seek(cap: cv2.VideoCapture, start: int) -> None:
+    """Position the capture so the next read returns frame start."""
+    if start == 0:
+        return
+    # Seeking is not frame accurate for every codec; when it lands elsewhere, decode forward from the first frame
+    cap.set(cv2.CAP_PROP_POS_FRAMES, start)
+    if int(cap.get(cv2.CAP_PROP_POS_FRAMES)) == start:
+        return
+    cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+    for _ in range(start):
+        if not cap.grab():
+            break
+
+def process_chunk(video_path: str, start: int, stop: int, batch_size: int, verify_frames: int) -> Tuple[Dict[str, np.ndarray], int]:
+    """Process frames [start, stop) of a video, returning its columns and how many frames failed verification."""
+    # Differences from the live path:
+    #  - every frame runs YOLO, with no scheduler or optical flow propagation
+    #  - AprilTags come from a decimated full-frame search, never the incremental ROI search
+    #  - the tracker and the algae target lock start afresh at each chunk, so tracks and target choices restart there
+    #  - there is no robot, so commands are for the frame as captured: no latency compensation and no robot state
+    # Algae selection itself goes through the same TargetLock as compute_best_algae
+    _frame_processor.tracker = ObjectTracker()
+    _autoalgae.target = TargetLock(_autoalgae.scorer)
+    cap = cv2.VideoCapture(video_path)
+    seek(cap, start)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 60.0
+    columns = BatchColumns()
+    mismatches = 0
+
+    frame_index = start
+    while frame_index < stop:
+        frames = []
+        while len(frames) < min(batch_size, stop - frame_index):
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(_frame_processor.transform_frame(frame))
+        if not frames:
+            break
+
+        for frame, (boxes, confidences, class_ids) in zip(frames, _frame_processor.detect_objects_batch(frames)):
+            if frame_index - start < verify_frames:
+                expected = _frame_processor.detect_objects(frame)
+                if not all(np.array_equal(a, b) for a, b in zip(expected, (boxes, confidences, class_ids))):
+                    mismatches += 1
+
+            apriltags = _frame_processor.apriltag_detector.search_full_frame(cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY))
+            timestamp = frame_index / fps
+            _frame_processor.update_game_pieces(boxes, confidences, class_ids, timestamp)
+
+            algaes = _frame_processor.game_pieces.of(Algae)
+            position = _autoalgae.target.select(algaes)
+            if position is not None:
+                command = _autoalgae.get_algae_navigation_command(algaes[position])
+                best_index = int(algaes.indices[position])
+            else:
+                command, best_index = (0.0, 0.0, 0.0, False), -1
+
+            columns.add_frame(frame_index, timestamp, _frame_processor.game_pieces, apriltags, command, best_index)
+            frame_index += 1
+
+    cap.release()
+    return columns.to_arrays() if frame_index > start else {}, mismatches
+
+def split_into_chunks(video_path: str, chunk_frames: int) -> List[Tuple[int, int]]:
+    cap = cv2.VideoCapture(video_path)
+    frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    return [(start, min(start + chunk_frames, frame_count)) for start in range(0, frame_count, chunk_frames)]
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Process match videos headlessly across a process pool. Unlike the live path, "
+                                                 "every frame runs YOLO and a full-frame AprilTag search, tracking and target "
+                                                 "locks restart at each chunk, and commands are not latency compensated.")
+    parser.add_argument("videos", nargs="+")
+    parser.add_argument("--output", default=BatchConfig.OUTPUT_DIRECTORY, help="directory for one .npz of columns per video")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--batch-size", type=int, default=BatchConfig.BATCH_SIZE)
+    parser.add_argument("--chunk-frames", type=int, default=BatchConfig.CHUNK_FRAMES)
+    parser.add_argument("--verify", type=int, default=0, help="frames per chunk to re-run through the single-frame detector")
+    args = parser.parse_args()
+
+    file_name = os.path.splitext(os.path.basename(__file__))[0]
+    logger = setup_logger(file_name)
+    os.makedirs(args.output, exist_ok=True)
+
+    threads_per_worker = max((os.cpu_count() or 1) // args.workers, 1)
+    start_time = time.perf_counter()
+    total_frames = total_mismatches = 0
+
+    # spawn rather than fork so each worker gets a clean torch / onnxruntime thread pool
+    with ProcessPoolExecutor(args.workers, multiprocessing.get_context("spawn"),
+                             initializer=init_worker, initargs=(threads_per_worker,)) as pool:
+        jobs: List[Tuple[str, List[Future]]] = [
+            (video_path, [pool.submit(process_chunk, video_path, start, stop, args.batch_size, args.verify)
+                          for start, stop in split_into_chunks(video_path, args.chunk_frames)])
+            for video_path in args.videos
+        ]
+
+        for video_path, futures in jobs:
+            chunks = []
+            for future in futures:
+                columns, mismatches = future.result()
+                chunks.append(columns)
+                total_mismatches += mismatches
+
+            columns = BatchColumns.merge(chunks)
+            frames = len(columns.get("frame_index", ()))
+            total_frames += frames
+            output_path = os.path.join(args.output, os.path.splitext(os.path.basename(video_path))[0] + ".npz")
+            np.savez_compressed(output_path, video=np.array(video_path), **columns)
+            logger.info(f"{video_path}: {frames} frames written to {output_path}")
+            print(f"{video_path}: {frames} frames -> {output_path}")
+
+    elapsed = time.perf_counter() - start_time
+    print(f"{total_frames} frames in {elapsed:.1f} s ({total_frames / elapsed:.1f} fps) with {args.workers} workers")
+    if args.verify:
+        print(f"Batched and single-frame detections differed on {total_mismatches} verified frames")
+
+if __name__ == "__main__":
+    main()
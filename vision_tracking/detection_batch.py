@@ -0,0 +1,131 @@
+from typing import Dict, Iterator, List, Optional, Tuple, Type
+
+import numpy as np
+
+from config import AutoAlgaeConfig, AutoHangConfig, AutoCoralConfig, AutoRobotConfig
+from camera_calculations.mono_video import MonoVision
+from decision_engine.trackable_objects import Object, ObjectPool, Algae, Cage, Coral, Robot
+
+###############################################################
+
+class DetectionBatch:
+    """Columnar detection data for one frame, computed in a single vectorized pass."""
+    OBJECT_TYPES: Tuple[Type[Object], ...] = (Algae, Cage, Coral, Robot)    # indexed by YOLO class ID
+    OBJECT_WIDTHS_IN_MM: np.ndarray = np.array([
+        AutoAlgaeConfig.ALGAE_SIZE_IN_MM,
+        AutoHangConfig.CAGE_WIDTH_IN_MM,
+        AutoCoralConfig.CORAL_SIZE_IN_MM,
+        AutoRobotConfig.AVERAGE_ROBOT_SIZE_IN_MM,
+    ], dtype=np.float32)
+
+    def __init__(self, boxes: np.ndarray, confidences: np.ndarray, class_ids: np.ndarray, timestamp: float,
+                 pools: Optional[Dict[Type[Object], ObjectPool]] = None) -> None:
+        known = (class_ids >= 0) & (class_ids < len(self.OBJECT_TYPES))
+        boxes = np.asarray(boxes, dtype=np.int32).reshape(-1, 4)[known]
+
+        x1, y1, x2, y2 = boxes.T
+        width = (x2 - x1).astype(np.float32)
+        height = (y2 - y1).astype(np.float32)
+
+        self.boxes: np.ndarray = boxes
+        self.center: np.ndarray = np.stack(((x1 + x2) // 2, (y1 + y2) // 2), axis=1)
+        self.scale: np.ndarray = (width + height) / 2
+        self.ratio: np.ndarray = np.divide(width, height, out=np.zeros_like(width), where=height != 0)
+        self.confidence: np.ndarray = np.asarray(confidences, dtype=np.float32)[known]
+        self.class_id: np.ndarray = np.asarray(class_ids, dtype=np.int32)[known]
+        self.distance, self.angle = MonoVision.find_distance_and_angle(
+            self.center[:, 0], self.OBJECT_WIDTHS_IN_MM[self.class_id], self.scale)
+        self.track_id: np.ndarray = np.full(len(self.class_id), -1, dtype=np.int32)
+        self.velocity: np.ndarray = np.full((len(self.class_id), 2), np.nan, dtype=np.float32)   # mm/s, filled in by the tracker
+        self.acceleration: np.ndarray = np.full((len(self.class_id), 2), np.nan, dtype=np.float32)   # mm/s², likewise
+        self.timestamp: float = timestamp
+        self.pools: Optional[Dict[Type[Object], ObjectPool]] = pools
+
+        self._views: Dict[Type[Object], "DetectionView"] = {}
+
+    @classmethod
+    def empty(cls, timestamp: float) -> "DetectionBatch":
+        return cls(np.empty((0, 4), dtype=np.int32), np.empty(0, dtype=np.float32), np.empty(0, dtype=np.int32), timestamp)
+
+    def __len__(self) -> int:
+        return len(self.class_id)
+
+    def of(self, object_type: Type[Object]) -> "DetectionView":
+        """Return the detections of one class, e.g. batch.of(Algae)."""
+        view = self._views.get(object_type)
+        if view is None:
+            class_id = self.OBJECT_TYPES.index(object_type)
+            view = DetectionView(self, np.flatnonzero(self.class_id == class_id), object_type)
+            self._views[object_type] = view
+        return view
+
+class DetectionView:
+    """Per-class slice of a DetectionBatch that only builds trackable objects when they are accessed."""
+    def __init__(self, batch: DetectionBatch, indices: np.ndarray, object_type: Type[Object]) -> None:
+        self.batch: DetectionBatch = batch
+        self.indices: np.ndarray = indices
+        self.object_type: Type[Object] = object_type
+        self._objects: List[Optional[Object]] = [None] * len(indices)
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def __bool__(self) -> bool:
+        return len(self.indices) > 0
+
+    def __iter__(self) -> Iterator[Object]:
+        for i in range(len(self.indices)):
+            yield self[i]
+
+    def __getitem__(self, i: int) -> Object:
+        trackable = self._objects[i]
+        if trackable is not None:
+            return trackable
+
+        row = self.indices[i]
+        batch = self.batch
+
+        if batch.pools is not None:
+            trackable = batch.pools[self.object_type].acquire()
+        else:
+            trackable = self.object_type()
+        trackable.update_frame_location(
+            int(batch.center[row, 0]), int(batch.center[row, 1]), float(batch.scale[row]), float(batch.ratio[row]), batch.timestamp)
+        trackable.update_confidence(float(batch.confidence[row]))
+        trackable.update_relative_location(float(batch.distance[row]), float(batch.angle[row]))
+        velocity_x, velocity_y = batch.velocity[row]
+        if np.isfinite(velocity_x):
+            trackable.update_velocity(float(velocity_x), float(velocity_y))
+        acceleration_x, acceleration_y = batch.acceleration[row]
+        if np.isfinite(acceleration_x):
+            trackable.update_acceleration(float(acceleration_x), float(acceleration_y))
+        self._objects[i] = trackable
+        return trackable
+
+    @property
+    def center(self) -> np.ndarray:
+        return self.batch.center[self.indices]
+
+    @property
+    def confidence(self) -> np.ndarray:
+        return self.batch.confidence[self.indices]
+
+    @property
+    def distance(self) -> np.ndarray:
+        return self.batch.distance[self.indices]
+
+    @property
+    def angle(self) -> np.ndarray:
+        return self.batch.angle[self.indices]
+
+    @property
+    def track_id(self) -> np.ndarray:
+        return self.batch.track_id[self.indices]
+
+    @property
+    def velocity(self) -> np.ndarray:
+        return self.batch.velocity[self.indices]
+
+    @property
+    def acceleration(self) -> np.ndarray:
+        return self.batch.acceleration[self.indices]
@@ -0,0 +1,97 @@
+import os
+import logging
+from logs.logging_setup import setup_logger
+from typing import List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from config import CameraConfig, DisplayConfig, PipelineConfig
+
+###############################################################
+
+# Every combination of 90 degree rotations and flips is one of these, each a single OpenCV call except the last
+# (step, code) pairs, applied in order; the first writes into the destination and the rest work in place on it
+FUSED_TRANSFORMS: List[List[Tuple[str, Optional[int]]]] = [
+    [],
+    [("flip", 1)],
+    [("flip", 0)],
+    [("flip", -1)],
+    [("rotate", cv2.ROTATE_90_CLOCKWISE)],
+    [("rotate", cv2.ROTATE_90_COUNTERCLOCKWISE)],
+    [("transpose", None)],
+    [("transpose", None), ("flip", -1)],
+]
+
+def _apply_step(step: str, code: Optional[int], src: np.ndarray, dst: Optional[np.ndarray]) -> np.ndarray:
+    if step == "flip":
+        return cv2.flip(src, code, dst=dst)
+    if step == "rotate":
+        return cv2.rotate(src, code, dst=dst)
+    return cv2.transpose(src, dst=dst)
+
+class FrameTransform:
+    """The configured rotation and flips reduced to one pass that can write into a preallocated buffer."""
+    def __init__(self, rotate: bool = DisplayConfig.ROTATE_IMAGE, flip_horizontally: bool = DisplayConfig.FLIP_IMAGE_HORIZONTALLY,
+                 flip_vertically: bool = DisplayConfig.FLIP_IMAGE_VERTICALLY) -> None:
+        # Run the configured sequence on a small non-square probe and keep the fused transform that matches it
+        probe = np.arange(6, dtype=np.uint8).reshape(2, 3)
+        expected = probe
+        if rotate:
+            expected = cv2.rotate(expected, cv2.ROTATE_90_CLOCKWISE)
+        if flip_horizontally:
+            expected = cv2.flip(expected, 1)
+        if flip_vertically:
+            expected = cv2.flip(expected, 0)
+
+        self.steps: List[Tuple[str, Optional[int]]] = next(
+            steps for steps in FUSED_TRANSFORMS if np.array_equal(self.apply(probe, None, steps), expected))
+        self.transposes: bool = expected.shape != probe.shape
+
+    def output_shape(self, input_shape: Tuple[int, ...]) -> Tuple[int, ...]:
+        return (input_shape[1], input_shape[0], *input_shape[2:]) if self.transposes else tuple(input_shape)
+
+    def apply(self, frame: np.ndarray, dst: Optional[np.ndarray] = None,
+              steps: Optional[List[Tuple[str, Optional[int]]]] = None) -> np.ndarray:
+        """Transform the frame into dst, or return it untouched when there is nothing to do."""
+        steps = self.steps if steps is None else steps
+        for index, (step, code) in enumerate(steps):
+            frame = _apply_step(step, code, frame if index == 0 else dst, dst)
+            dst = frame
+        return frame
+
+class FrameBuffers:
+    """One ring slot: a colour frame and its grayscale plane, shared by every stage that reads the frame."""
+    __slots__ = ('color', 'gray')
+
+    def __init__(self, color: np.ndarray, gray: np.ndarray) -> None:
+        self.color: np.ndarray = color
+        self.gray: np.ndarray = gray
+
+class FrameBufferRing:
+    """Preallocated frame buffers handed out round-robin, so the per-frame transforms allocate nothing."""
+    def __init__(self, slots: int = PipelineConfig.FRAME_BUFFER_SLOTS,
+                 frame_shape: Tuple[int, int, int] = (CameraConfig.FRAME_HEIGHT, CameraConfig.FRAME_WIDTH, 3)) -> None:
+        file_name = os.path.splitext(os.path.basename(__file__))[0]
+        setup_logger(file_name)
+        self.logger = logging.getLogger(file_name)
+
+        self.slot_count: int = slots
+        self.index: int = 0
+        self.allocate(frame_shape)
+
+    def allocate(self, frame_shape: Tuple[int, int, int]) -> None:
+        self.frame_shape: Tuple[int, int, int] = tuple(frame_shape)
+        self.color: np.ndarray = np.empty((self.slot_count, *frame_shape), dtype=np.uint8)
+        self.gray: np.ndarray = np.empty((self.slot_count, *frame_shape[:2]), dtype=np.uint8)
+        self.slots: List[FrameBuffers] = [FrameBuffers(self.color[i], self.gray[i]) for i in range(self.slot_count)]
+
+    def next(self, frame_shape: Tuple[int, int, int]) -> FrameBuffers:
+        """The next slot for a frame of this shape; a slot is only reused after slot_count more frames."""
+        if tuple(frame_shape) != self.frame_shape:
+            self.logger.warning(f"Frames are {tuple(frame_shape)}, not {self.frame_shape}; reallocating the frame buffers")
+            self.allocate(frame_shape)
+
+        buffers = self.slots[self.index]
+        self.index = (self.index + 1) % self.slot_count
+        return buffers
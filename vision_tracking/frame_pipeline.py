@@ -0,0 +1,216 @@
+import os
+import time
+import queue
+import logging
+import threading
+from logs.logging_setup import setup_logger
+from logs.instrumentation import instrumentation
+from typing import Any, Callable, Optional
+
+import cv2
+import numpy as np
+
+from config import PipelineConfig, LoggingConfig
+
+###############################################################
+
+class FramePacket:
+    """A captured frame and its results as it travels through the pipeline stages."""
+    def __init__(self, frame: np.ndarray, index: int, capture_time: float, robot_state: Any = None, decision: Any = None) -> None:
+        self.frame: np.ndarray = frame
+        self.index: int = index
+        self.capture_time: float = capture_time
+        self.robot_state: Any = robot_state     # only set when replaying a recording
+        self.decision: Any = decision           # only set when replaying, what the recorded command was computed against
+        self.result: Any = None
+
+class StageQueue:
+    """Bounded hand-off between two pipeline stages with a configurable drop policy."""
+    DROP_OLDEST: str = "drop_oldest"
+    DROP_NEWEST: str = "drop_newest"
+    BLOCK: str = "block"
+
+    def __init__(self, name: str, maxsize: int, drop_policy: str) -> None:
+        if drop_policy not in (self.DROP_OLDEST, self.DROP_NEWEST, self.BLOCK):
+            raise ValueError(f"Unknown drop policy for {name} queue: {drop_policy}")
+
+        self.name: str = name
+        self.drop_policy: str = drop_policy
+        self.queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self.dropped: int = 0
+        self.max_depth: int = 0
+
+    def put(self, item: FramePacket, stop_event: threading.Event) -> bool:
+        """Queue an item according to the drop policy, returning False if it was discarded."""
+        if self.drop_policy == self.BLOCK:
+            while not stop_event.is_set():
+                try:
+                    self.queue.put(item, timeout=PipelineConfig.QUEUE_TIMEOUT)
+                    break
+                except queue.Full:
+                    continue
+            else:
+                return False
+        elif self.drop_policy == self.DROP_NEWEST:
+            try:
+                self.queue.put_nowait(item)
+            except queue.Full:
+                self.dropped += 1
+                instrumentation.count(f"pipeline.dropped.{self.name}")
+                return False
+        else:
+            while True:
+                try:
+                    self.queue.put_nowait(item)
+                    break
+                except queue.Full:
+                    try:
+                        self.queue.get_nowait()
+                        self.dropped += 1
+                        instrumentation.count(f"pipeline.dropped.{self.name}")
+                    except queue.Empty:
+                        pass
+
+        self.max_depth = max(self.max_depth, self.queue.qsize())
+        return True
+
+    def get(self) -> Optional[FramePacket]:
+        """Take the next item, or None if nothing arrived within the queue timeout."""
+        try:
+            return self.queue.get(timeout=PipelineConfig.QUEUE_TIMEOUT)
+        except queue.Empty:
+            return None
+
+    def depth(self) -> int:
+        return self.queue.qsize()
+
+class FramePipeline:
+    """Runs capture, inference and output as separate stages joined by bounded queues."""
+    def __init__(self, capture, process: Callable[[FramePacket], Optional[FramePacket]], output: Callable[[FramePacket], bool],
+                 lossless: bool = False, media_clock: bool = False) -> None:
+        file_name = os.path.splitext(os.path.basename(__file__))[0]
+        setup_logger(file_name)
+        self.logger = logging.getLogger(file_name)
+
+        self.capture = capture
+        self.process = process
+        self.output = output
+
+        # lossless runs every frame through every stage, for video files and for replays that must match what the robot did
+        self.inference_queue: StageQueue = StageQueue(
+            "inference", PipelineConfig.INFERENCE_QUEUE_SIZE, StageQueue.BLOCK if lossless else PipelineConfig.INFERENCE_DROP_POLICY)
+        self.output_queue: StageQueue = StageQueue(
+            "output", PipelineConfig.OUTPUT_QUEUE_SIZE, StageQueue.BLOCK if lossless else PipelineConfig.OUTPUT_DROP_POLICY)
+
+        # media_clock stamps frames with their position in a video file, since reads are paced by processing, not the camera
+        self.media_clock: bool = media_clock
+
+        self.stop_event: threading.Event = threading.Event()
+        self.capture_done: threading.Event = threading.Event()
+        self.inference_done: threading.Event = threading.Event()
+
+        self.frames_output: int = 0
+        self.total_latency: float = 0.0
+
+    def run(self) -> None:
+        """Start the capture and inference threads and run the output stage on the calling thread."""
+        threads = [
+            threading.Thread(target=self._capture_loop, name="capture", daemon=True),
+            threading.Thread(target=self._inference_loop, name="inference", daemon=True),
+        ]
+        for thread in threads:
+            thread.start()
+
+        try:
+            self._output_loop()
+        finally:
+            self.stop_event.set()
+            for thread in threads:
+                thread.join()
+            self.log_queue_depths()
+
+    def _capture_loop(self) -> None:
+        """Read frames as fast as the source allows and hand the newest one to inference."""
+        index = 0
+        media_start: Optional[float] = None
+        try:
+            while not self.stop_event.is_set() and self.capture.isOpened():
+                with instrumentation.span("pipeline.capture"):
+                    ret, frame = self.capture.read()
+                capture_time = time.time()
+                if not ret:
+                    # Live sources come back empty-handed while waiting or reconnecting, not only at the end
+                    if getattr(self.capture, "live", False):
+                        continue
+                    self.logger.info("End of video stream.")
+                    break
+
+                if self.media_clock:
+                    # Anchored to the first read so the times stay comparable with the wall clock
+                    position = self.capture.get(cv2.CAP_PROP_POS_MSEC) / 1000
+                    if media_start is None:
+                        media_start = capture_time - position
+                    capture_time = media_start + position
+
+                # Replay sources report the recorded capture time, robot state and decision for the frame they returned
+                packet = FramePacket(frame, index, getattr(self.capture, "capture_time", None) or capture_time,
+                                     getattr(self.capture, "robot_state", None), getattr(self.capture, "decision", None))
+                self.inference_queue.put(packet, self.stop_event)
+                index += 1
+        except Exception:
+            self.logger.exception("Capture stage failed")
+            self.stop_event.set()
+        finally:
+            self.capture_done.set()
+
+    def _inference_loop(self) -> None:
+        """Run detection and decisions on each frame and pass the results to the output stage."""
+        try:
+            while not self.stop_event.is_set():
+                packet = self.inference_queue.get()
+                if packet is None:
+                    if self.capture_done.is_set() and self.inference_queue.depth() == 0:
+                        break
+                    continue
+
+                with instrumentation.span("pipeline.inference"):
+                    packet = self.process(packet)
+                if packet is not None:
+                    self.output_queue.put(packet, self.stop_event)
+        except Exception:
+            self.logger.exception("Inference stage failed")
+            self.stop_event.set()
+        finally:
+            self.inference_done.set()
+
+    def _output_loop(self) -> None:
+        """Display and record processed frames until the stream ends or output asks to stop."""
+        while not self.stop_event.is_set():
+            packet = self.output_queue.get()
+            if packet is None:
+                if self.inference_done.is_set() and self.output_queue.depth() == 0:
+                    break
+                continue
+
+            with instrumentation.span("pipeline.output"):
+                keep_running = self.output(packet)
+            if not keep_running:
+                break
+
+            latency = time.time() - packet.capture_time
+            instrumentation.record("pipeline.end_to_end", latency)
+            self.frames_output += 1
+            self.total_latency += latency
+            if self.frames_output % LoggingConfig.FPS_LOGGING_RATE == 0:
+                self.log_queue_depths()
+
+    def log_queue_depths(self) -> None:
+        """Log the depth, high-water mark and drop count of each stage queue."""
+        for stage_queue in (self.inference_queue, self.output_queue):
+            self.logger.info(
+                f"{stage_queue.name} queue: depth={stage_queue.depth()}, "
+                f"max={stage_queue.max_depth}, dropped={stage_queue.dropped}")
+
+        if self.frames_output:
+            average_latency = self.total_latency / self.frames_output
+            self.logger.info(f"Average end-to-end latency: {average_latency * 1000:.1f} ms over {self.frames_output} frames")
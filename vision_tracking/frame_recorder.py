@@ -0,0 +1,221 @@
+import os
+import time
+import logging
+from logs.logging_setup import setup_logger
+from typing import Dict, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from config import RecordingConfig
+from networking.rio_communication import RobotState
+
+###############################################################
+
+# File layout: one header, then a metadata record per slot, then the raw frames, each section page aligned
+MAGIC: bytes = b"JONRING4"
+PAGE_SIZE: int = 4096
+HEADER_DTYPE = np.dtype([
+    ('magic', 'S8'), ('capacity', '<u4'), ('height', '<u4'), ('width', '<u4'), ('channels', '<u4'),
+    ('count', '<u8'),
+])
+STATE_DTYPE = np.dtype([
+    ('version', '<u8'), ('task', 'S16'), ('team_colour', 'S8'), ('has_algae', '?'), ('connected', '?'),
+    ('chassis_speeds', '<f8', (3,)),
+])
+# The state when the frame reached inference, the state and time the drive command was computed against, and
+# whether YOLO ran on the frame, so a replay follows the recorded schedule instead of its own latency
+SLOT_DTYPE = np.dtype([
+    ('sequence', '<u8'), ('capture_time', '<f8'), ('decision_time', '<f8'), ('detected', '?'),
+    ('capture_state', STATE_DTYPE), ('decision_state', STATE_DTYPE),
+])
+
+def _align(offset: int) -> int:
+    return (offset + PAGE_SIZE - 1) // PAGE_SIZE * PAGE_SIZE
+
+def _layout(capacity: int) -> Tuple[int, int]:
+    """Byte offsets of the slot metadata and the frame data."""
+    slots_offset = _align(HEADER_DTYPE.itemsize)
+    return slots_offset, _align(slots_offset + capacity * SLOT_DTYPE.itemsize)
+
+class RecordedDecision:
+    """What a recorded frame's drive command was computed against, handed to the inference stage during replay."""
+    __slots__ = ('decision_time', 'robot_state', 'detected')
+
+    def __init__(self, decision_time: float, robot_state: RobotState, detected: bool) -> None:
+        self.decision_time: float = decision_time
+        self.robot_state: RobotState = robot_state
+        self.detected: bool = detected
+
+class FrameRecorder:
+    """Appends raw frames, capture timestamps and robot state to a preallocated, memory-mapped ring file."""
+    def __init__(self, path: str = RecordingConfig.RECORDING_PATH, capacity: int = RecordingConfig.CAPACITY_IN_FRAMES,
+                 frame_shape: Optional[Tuple[int, int, int]] = None) -> None:
+        file_name = os.path.splitext(os.path.basename(__file__))[0]
+        setup_logger(file_name)
+        self.logger = logging.getLogger(file_name)
+
+        # Stamp the file name so a restart never truncates the previous match's ring
+        base, extension = os.path.splitext(path)
+        self.path: str = f"{base}-{time.strftime('%Y%m%d-%H%M%S')}{extension}"
+        self.capacity: int = capacity
+        self.frame_shape: Optional[Tuple[int, int, int]] = None
+        self.count: int = 0
+        self.state_records: Dict[int, Tuple] = {}
+        self.skipped: int = 0
+
+        if frame_shape is not None:
+            self.allocate(frame_shape)
+
+    def allocate(self, frame_shape: Tuple[int, int, int]) -> None:
+        """Create and map the ring file for frames of this shape."""
+        slots_offset, frames_offset = _layout(self.capacity)
+        size = frames_offset + self.capacity * int(np.prod(frame_shape))
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        with open(self.path, 'wb') as ring_file:
+            ring_file.truncate(size)
+            if hasattr(os, 'posix_fallocate'):
+                os.posix_fallocate(ring_file.fileno(), 0, size)
+
+        self.header: np.memmap = np.memmap(self.path, HEADER_DTYPE, 'r+', 0, (1,))
+        self.slots: np.memmap = np.memmap(self.path, SLOT_DTYPE, 'r+', slots_offset, (self.capacity,))
+        self.frames: np.memmap = np.memmap(self.path, np.uint8, 'r+', frames_offset, (self.capacity, *frame_shape))
+        self.header[0] = (MAGIC, self.capacity, *frame_shape, 0)
+        self.frame_shape = tuple(frame_shape)
+
+        self.logger.info(f"Recording the last {self.capacity} frames of {self.frame_shape} to {self.path} ({size / 1e9:.1f} GB)")
+
+    def record(self, frame: np.ndarray, capture_time: float, capture_state: RobotState, decision_time: float,
+               decision_state: RobotState, detected: bool) -> None:
+        """Copy a frame and its metadata into the next slot; each state is only encoded once per version."""
+        if self.frame_shape is None:
+            self.allocate(frame.shape)
+        if frame.shape != self.frame_shape:
+            if not self.skipped:
+                self.logger.warning(f"Frame of {frame.shape} not recorded, the ring holds {self.frame_shape}")
+            self.skipped += 1
+            return
+
+        slot_index = self.count % self.capacity
+        np.copyto(self.frames[slot_index], frame)
+
+        self.slots[slot_index] = (self.count, capture_time, decision_time, detected,
+                                  self.state_record(capture_state), self.state_record(decision_state))
+
+        # Bump the count last so a reader never sees a slot that is still being written
+        self.count += 1
+        self.header['count'] = self.count
+
+    def state_record(self, state: RobotState) -> Tuple:
+        record = self.state_records.get(state.version)
+        if record is None:
+            # The capture and decision states are usually the same few versions, so keep only the recent ones
+            if len(self.state_records) > 4:
+                self.state_records.clear()
+            record = self.state_records[state.version] = (
+                state.version, (state.task or "").encode(), (state.team_colour or "").encode(),
+                state.has_algae, state.connected, state.chassis_speeds or (0.0, 0.0, 0.0))
+        return record
+
+    def close(self) -> None:
+        if self.frame_shape is None:
+            self.logger.info("Nothing recorded")
+            return
+        for mapping in (self.frames, self.slots, self.header):
+            mapping.flush()
+        if self.skipped:
+            self.logger.warning(f"{self.skipped} frames skipped because they were not {self.frame_shape}")
+        self.logger.info(f"Recorded {self.count} frames, {min(self.count, self.capacity)} kept in {self.path}")
+
+class FrameReplay:
+    """Plays a ring recording back in place of cv2.VideoCapture, handing out views into the mapped file."""
+    def __init__(self, path: str = RecordingConfig.REPLAY_PATH, real_time: bool = RecordingConfig.REPLAY_IN_REAL_TIME) -> None:
+        file_name = os.path.splitext(os.path.basename(__file__))[0]
+        setup_logger(file_name)
+        self.logger = logging.getLogger(file_name)
+
+        header = np.memmap(path, HEADER_DTYPE, 'r', 0, (1,))[0]
+        if header['magic'] != MAGIC:
+            raise ValueError(f"{path} is not a frame recording")
+
+        capacity = int(header['capacity'])
+        frame_shape = (int(header['height']), int(header['width']), int(header['channels']))
+        slots_offset, frames_offset = _layout(capacity)
+        self.slots: np.memmap = np.memmap(path, SLOT_DTYPE, 'r', slots_offset, (capacity,))
+        # Copy-on-write, so drawing on a replayed frame never touches the recording
+        self.frames: np.memmap = np.memmap(path, np.uint8, 'c', frames_offset, (capacity, *frame_shape))
+
+        self.capacity: int = capacity
+        self.count: int = int(header['count'])
+        self.position: int = max(self.count - capacity, 0)
+        self.real_time: bool = real_time
+        self.opened: bool = True
+        self.replay_start: Optional[float] = None
+        self.first_capture_time: float = 0.0
+
+        self.capture_time: Optional[float] = None
+        self.robot_state: Optional[RobotState] = None
+        self.decision: Optional[RecordedDecision] = None
+        self.states: Dict[int, RobotState] = {}
+
+        self.logger.info(f"Replaying {self.count - self.position} frames from {path}")
+
+    def isOpened(self) -> bool:
+        return self.opened
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """Return the next frame, oldest first, and set capture_time, robot_state and decision to what was recorded with it."""
+        if not self.opened or self.position >= self.count:
+            return False, None
+
+        slot_index = self.position % self.capacity
+        slot = self.slots[slot_index]
+        self.capture_time = float(slot['capture_time'])
+        self.robot_state = self.replay_state(slot['capture_state'])
+        self.decision = RecordedDecision(float(slot['decision_time']), self.replay_state(slot['decision_state']),
+                                         bool(slot['detected']))
+
+        if self.real_time:
+            self.wait_until_due()
+        self.position += 1
+        return True, self.frames[slot_index]
+
+    def replay_state(self, record: np.void) -> RobotState:
+        """The RobotState for a recorded state, built once per version."""
+        version = int(record['version'])
+        state = self.states.get(version)
+        if state is None:
+            if len(self.states) > 4:
+                self.states.clear()
+            # updated is on the monotonic clock staleness checks use, so the replayed change counts as happening now
+            state = self.states[version] = RobotState(
+                record['task'].decode() or None, record['team_colour'].decode() or None, bool(record['has_algae']),
+                bool(record['connected']), version, time.monotonic(), tuple(float(speed) for speed in record['chassis_speeds']))
+        return state
+
+    def wait_until_due(self) -> None:
+        now = time.monotonic()
+        if self.replay_start is None:
+            self.replay_start, self.first_capture_time = now, self.capture_time
+            return
+        delay = (self.capture_time - self.first_capture_time) - (now - self.replay_start)
+        if delay > 0:
+            time.sleep(delay)
+
+    def get(self, property_id: int) -> float:
+        """The few cv2.CAP_PROP_* values the pipeline asks for."""
+        if property_id == cv2.CAP_PROP_FRAME_COUNT:
+            return float(min(self.count, self.capacity))
+        if property_id == cv2.CAP_PROP_FRAME_HEIGHT:
+            return float(self.frames.shape[1])
+        if property_id == cv2.CAP_PROP_FRAME_WIDTH:
+            return float(self.frames.shape[2])
+        if property_id == cv2.CAP_PROP_FPS:
+            first = self.slots[max(self.count - self.capacity, 0) % self.capacity]['capture_time']
+            last = self.slots[(self.count - 1) % self.capacity]['capture_time']
+            frames = min(self.count, self.capacity)
+            return float((frames - 1) / (last - first)) if frames > 1 and last > first else 0.0
+        return 0.0
+
+    def release(self) -> None:
+        self.opened = False
@@ -0,0 +1,87 @@
+import math
+import warnings
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from config import SchedulerConfig
+
+###############################################################
+
+class InferenceScheduler:
+    """Decides on which frames to run the detector, spacing detections by the measured inference latency."""
+    def __init__(self) -> None:
+        self.detection_interval: int = SchedulerConfig.MIN_DETECTION_INTERVAL
+        self.frames_since_detection: int = 0
+        self.inference_latency: Optional[float] = None
+        self.force_detection: bool = True
+        self.tracked_objects: int = 0
+
+    def should_detect(self) -> bool:
+        """Advance one frame and report whether the detector should run on it."""
+        self.frames_since_detection += 1
+        interval = self.detection_interval
+        if not self.tracked_objects:
+            interval = min(interval, SchedulerConfig.EMPTY_SCENE_DETECTION_INTERVAL)
+        return (not SchedulerConfig.ENABLED
+                or self.force_detection
+                or self.frames_since_detection >= interval)
+
+    def record_detection(self, latency: float) -> None:
+        """Update the smoothed inference latency and the number of frames between detections."""
+        if self.inference_latency is None:
+            self.inference_latency = latency
+        else:
+            self.inference_latency += SchedulerConfig.LATENCY_SMOOTHING * (latency - self.inference_latency)
+
+        frames_per_inference = math.ceil(self.inference_latency * SchedulerConfig.TARGET_FPS)
+        self.detection_interval = min(max(frames_per_inference, SchedulerConfig.MIN_DETECTION_INTERVAL),
+                                      SchedulerConfig.MAX_DETECTION_INTERVAL)
+        self.frames_since_detection = 0
+        self.force_detection = False
+
+    def record_tracking_quality(self, quality: float) -> None:
+        """Request a detection on the next frame once propagated boxes stop being trustworthy."""
+        if quality < SchedulerConfig.MIN_TRACKING_QUALITY:
+            self.force_detection = True
+
+    def record_tracked_objects(self, count: int) -> None:
+        """Note how many objects this frame ended with; an empty scene is searched more often than a tracked one."""
+        self.tracked_objects = count
+
+class BoxPropagator:
+    """Moves the previous frame's boxes onto the current frame with sparse Lucas-Kanade optical flow."""
+    GRID: np.ndarray = np.linspace(0.25, 0.75, SchedulerConfig.FLOW_POINTS_PER_SIDE, dtype=np.float32)
+
+    def __init__(self) -> None:
+        grid_x, grid_y = np.meshgrid(self.GRID, self.GRID)
+        self.offsets: np.ndarray = np.stack([grid_x.ravel(), grid_y.ravel()], axis=1)
+
+    def propagate(self, previous_gray: np.ndarray, gray: np.ndarray, boxes: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """Return the shifted boxes and, per box, the fraction of flow points that were tracked."""
+        if len(boxes) == 0:
+            return boxes, np.empty(0, dtype=np.float32)
+
+        boxes_float = boxes.astype(np.float32)
+        sizes = boxes_float[:, 2:] - boxes_float[:, :2]
+        points = boxes_float[:, None, :2] + self.offsets[None, :, :] * sizes[:, None, :]
+
+        next_points, status, _ = cv2.calcOpticalFlowPyrLK(
+            previous_gray, gray, points.reshape(-1, 1, 2), None,
+            winSize=(SchedulerConfig.FLOW_WINDOW_SIZE, SchedulerConfig.FLOW_WINDOW_SIZE),
+            maxLevel=SchedulerConfig.FLOW_PYRAMID_LEVELS)
+
+        status = status.reshape(len(boxes), -1).astype(bool)
+        flow = next_points.reshape(points.shape) - points
+        flow[~status] = np.nan
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)
+            shift = np.nan_to_num(np.nanmedian(flow, axis=1))
+
+        height, width = gray.shape[:2]
+        shifted = boxes_float + np.tile(shift, 2)
+        shifted[:, 0::2] = np.clip(shifted[:, 0::2], 0, width - 1)
+        shifted[:, 1::2] = np.clip(shifted[:, 1::2], 0, height - 1)
+        return np.rint(shifted).astype(np.int32), status.mean(axis=1)
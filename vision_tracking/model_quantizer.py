@@ -0,0 +1,86 @@
+import os
+import logging
+from logs.logging_setup import setup_logger
+from typing import Dict, Iterator, List, Optional
+
+import cv2
+import onnx
+import numpy as np
+from onnxruntime.quantization import (CalibrationDataReader, CalibrationMethod, QuantFormat, QuantType,
+                                      quantize_static)
+from onnxruntime.quantization.shape_inference import quant_pre_process
+from onnxruntime.transformers.float16 import convert_float_to_float16
+
+from config import YOLOConfig, QuantizationConfig
+from .onnx_detector import ONNXDetector
+
+###############################################################
+
+class VideoCalibrationReader(CalibrationDataReader):
+    """Feeds letterboxed frames sampled from recorded match video to the INT8 calibrator."""
+    def __init__(self, detector: ONNXDetector, video_paths: List[str]) -> None:
+        self.detector: ONNXDetector = detector
+        self.input_name: str = detector.session.get_inputs()[0].name
+        self.frames: Iterator[np.ndarray] = self.sample_frames(video_paths)
+
+    @staticmethod
+    def sample_frames(video_paths: List[str]) -> Iterator[np.ndarray]:
+        frames_per_video = max(QuantizationConfig.CALIBRATION_FRAMES // max(len(video_paths), 1), 1)
+        for video_path in video_paths:
+            cap = cv2.VideoCapture(video_path)
+            sampled = index = 0
+            while cap.isOpened() and sampled < frames_per_video:
+                ret, frame = cap.read()
+                if not ret:
+                    break
+                if index % QuantizationConfig.CALIBRATION_FRAME_STRIDE == 0:
+                    sampled += 1
+                    yield frame
+                index += 1
+            cap.release()
+
+    def get_next(self) -> Optional[Dict[str, np.ndarray]]:
+        frame = next(self.frames, None)
+        if frame is None:
+            return None
+        self.detector.letterbox(frame)
+        return {self.input_name: self.detector.input_buffer.copy()}
+
+class ModelQuantizer:
+    """Produces FP16 and INT8 variants of the FP32 detector for the onnxruntime backend."""
+    def __init__(self) -> None:
+        file_name = os.path.splitext(os.path.basename(__file__))[0]
+        setup_logger(file_name)
+        self.logger = logging.getLogger(file_name)
+
+    def convert_fp16(self, source_path: str, output_path: str) -> None:
+        """Store weights and activations in half precision, keeping float32 inputs and outputs."""
+        model = convert_float_to_float16(onnx.load(source_path), keep_io_types=True)
+        onnx.save(model, output_path)
+        self.logger.info(f"FP16 model written to {output_path}")
+
+    def quantize_int8(self, source_path: str, output_path: str, video_paths: List[str]) -> None:
+        """Statically quantize to INT8, calibrating activation ranges on recorded match frames."""
+        preprocessed_path = os.path.splitext(output_path)[0] + "_preprocessed.onnx"
+        quant_pre_process(source_path, preprocessed_path, skip_symbolic_shape=True)
+
+        reader = VideoCalibrationReader(ONNXDetector(source_path, YOLOConfig.CONFIDENCE_THRESHOLD), video_paths)
+        quantize_static(
+            preprocessed_path, output_path, reader,
+            quant_format=QuantFormat.QDQ,
+            per_channel=True,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            calibrate_method=CalibrationMethod[QuantizationConfig.CALIBRATION_METHOD],
+        )
+        os.remove(preprocessed_path)
+        self.logger.info(f"INT8 model written to {output_path}")
+
+def main() -> None:
+    quantizer = ModelQuantizer()
+    quantizer.convert_fp16(YOLOConfig.WEIGHTS_LOCATION, YOLOConfig.WEIGHTS_BY_PRECISION["fp16"])
+    quantizer.quantize_int8(YOLOConfig.WEIGHTS_LOCATION, YOLOConfig.WEIGHTS_BY_PRECISION["int8"],
+                            QuantizationConfig.CALIBRATION_VIDEO_PATHS)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+import os
+import time
+import logging
+from logs.logging_setup import setup_logger
+from typing import List, Tuple
+
+import numpy as np
+
+from config import TrackerConfig, LoggingConfig
+from decision_engine.trackable_objects import Object
+from .detection_batch import DetectionBatch
+
+###############################################################
+
+class Track:
+    """A detection followed across frames under a stable ID."""
+    __slots__ = ('track_id', 'class_id', 'box', 'trackable', 'hits', 'misses')
+
+    def __init__(self, track_id: int, class_id: int, box: np.ndarray, trackable: Object) -> None:
+        self.track_id: int = track_id
+        self.class_id: int = class_id
+        self.box: np.ndarray = box
+        self.trackable: Object = trackable
+        self.hits: int = 1
+        self.misses: int = 0
+
+class ObjectTracker:
+    """Associates each frame's detections with existing tracks using IoU and centroid gating."""
+    def __init__(self) -> None:
+        file_name = os.path.splitext(os.path.basename(__file__))[0]
+        setup_logger(file_name)
+        self.logger = logging.getLogger(file_name)
+
+        self.tracks: List[Track] = []
+        self.next_track_id: int = 0
+
+        self.update_count: int = 0
+        self.update_time: float = 0.0
+
+    def current_detections(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Boxes, confidences and class IDs of the tracks that were matched in the last frame."""
+        tracks = [track for track in self.tracks if track.misses == 0]
+        boxes = np.array([track.box for track in tracks], dtype=np.int32).reshape(-1, 4)
+        confidences = np.array([track.trackable.confidence for track in tracks], dtype=np.float32)
+        class_ids = np.array([track.class_id for track in tracks], dtype=np.int32)
+        return boxes, confidences, class_ids
+
+    def update(self, batch: DetectionBatch) -> None:
+        """Match the batch against the current tracks and write the track IDs into batch.track_id."""
+        start = time.perf_counter()
+
+        track_ids = np.full(len(batch), -1, dtype=np.int32)
+        matched_tracks = np.zeros(len(self.tracks), dtype=bool)
+        matched_detections = np.zeros(len(batch), dtype=bool)
+
+        if self.tracks and len(batch):
+            rows, cols = self.assign(batch)
+            for row, col in zip(rows, cols):
+                track = self.tracks[row]
+                self.update_track(track, batch, col)
+                track_ids[col] = track.track_id
+                matched_tracks[row] = True
+                matched_detections[col] = True
+
+        for track, matched in zip(self.tracks, matched_tracks):
+            if not matched:
+                track.misses += 1
+
+        for col in np.flatnonzero(~matched_detections):
+            track_ids[col] = self.create_track(batch, col)
+
+        self.tracks = [track for track in self.tracks if track.misses <= TrackerConfig.MAX_MISSED_FRAMES]
+
+        batch.track_id = track_ids
+
+        self.update_time += time.perf_counter() - start
+        self.update_count += 1
+        if self.update_count % LoggingConfig.FPS_LOGGING_RATE == 0:
+            self.logger.debug(
+                f"Tracker: {len(self.tracks)} tracks, {self.update_time / self.update_count * 1000:.3f} ms per update")
+            self.update_time = 0.0
+            self.update_count = 0
+
+    def assign(self, batch: DetectionBatch) -> Tuple[np.ndarray, np.ndarray]:
+        """Greedily pair tracks and detections in order of increasing gated cost."""
+        track_boxes = np.array([track.box for track in self.tracks], dtype=np.float32)
+        track_classes = np.array([track.class_id for track in self.tracks], dtype=np.int32)
+        detection_boxes = batch.boxes.astype(np.float32)
+
+        iou = self.iou_matrix(track_boxes, detection_boxes)
+        track_centers = (track_boxes[:, :2] + track_boxes[:, 2:]) / 2
+        centroid_distance = np.linalg.norm(track_centers[:, None, :] - batch.center[None, :, :], axis=2)
+
+        gated = (track_classes[:, None] == batch.class_id[None, :]) & (
+            (iou >= TrackerConfig.IOU_GATE) | (centroid_distance <= TrackerConfig.CENTROID_GATE_IN_PIXELS))
+        rows, cols = np.nonzero(gated)
+        if len(rows) == 0:
+            return rows, cols
+
+        cost = (1 - iou[rows, cols]) + centroid_distance[rows, cols] / TrackerConfig.CENTROID_GATE_IN_PIXELS
+        order = np.argsort(cost, kind='stable')
+
+        used_rows = np.zeros(len(self.tracks), dtype=bool)
+        used_cols = np.zeros(len(batch), dtype=bool)
+        keep = np.zeros(len(order), dtype=bool)
+        for i in order:
+            row, col = rows[i], cols[i]
+            if used_rows[row] or used_cols[col]:
+                continue
+            used_rows[row] = used_cols[col] = keep[i] = True
+
+        return rows[keep], cols[keep]
+
+    @staticmethod
+    def iou_matrix(boxes_a: np.ndarray, boxes_b: np.ndarray) -> np.ndarray:
+        """Intersection-over-union of every box in boxes_a against every box in boxes_b."""
+        top_left = np.maximum(boxes_a[:, None, :2], boxes_b[None, :, :2])
+        bottom_right = np.minimum(boxes_a[:, None, 2:], boxes_b[None, :, 2:])
+        intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+
+        area_a = np.prod(boxes_a[:, 2:] - boxes_a[:, :2], axis=1)
+        area_b = np.prod(boxes_b[:, 2:] - boxes_b[:, :2], axis=1)
+        union = area_a[:, None] + area_b[None, :] - intersection
+        return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
+
+    def update_track(self, track: Track, batch: DetectionBatch, row: int) -> None:
+        x, y = int(batch.center[row, 0]), int(batch.center[row, 1])
+        distance, angle = float(batch.distance[row]), float(batch.angle[row])
+        trackable = track.trackable
+        position_x, position_y = Object.floor_position(distance, angle)
+        if position_x is not None:
+            trackable.set_velocity(position_x, position_y, batch.timestamp)
+            if trackable.velocity_x is not None:
+                batch.velocity[row] = (trackable.velocity_x, trackable.velocity_y)
+            if trackable.acceleration_x is not None:
+                batch.acceleration[row] = (trackable.acceleration_x, trackable.acceleration_y)
+
+        trackable.update_frame_location(x, y, float(batch.scale[row]), float(batch.ratio[row]), batch.timestamp)
+        trackable.update_confidence(float(batch.confidence[row]))
+        trackable.update_relative_location(distance, angle)
+
+        track.box = batch.boxes[row]
+        track.hits += 1
+        track.misses = 0
+
+    def create_track(self, batch: DetectionBatch, row: int) -> int:
+        class_id = int(batch.class_id[row])
+        track = Track(self.next_track_id, class_id, batch.boxes[row], DetectionBatch.OBJECT_TYPES[class_id]())
+        self.next_track_id += 1
+
+        self.update_track(track, batch, row)
+        track.hits = 1
+        self.tracks.append(track)
+        return track.track_id
@@ -0,0 +1,115 @@
+import os
+import logging
+from logs.logging_setup import setup_logger
+from typing import List, Tuple
+
+import cv2
+import numpy as np
+import onnxruntime as ort
+
+###############################################################
+
+class ONNXDetector:
+    """Runs the exported YOLO graph directly in ONNX Runtime with preallocated input and output buffers."""
+    PREDICT_IOU_THRESHOLD: float = 0.7      # ultralytics predict() default, kept so both backends agree
+    LETTERBOX_COLOUR: int = 114
+    CLASS_OFFSET: float = 4096.0            # separates classes for per-class NMS in a single call
+
+    def __init__(self, weights_location: str, confidence_threshold: float, num_threads: int = 0) -> None:
+        file_name = os.path.splitext(os.path.basename(__file__))[0]
+        setup_logger(file_name)
+        self.logger = logging.getLogger(file_name)
+
+        session_options = ort.SessionOptions()
+        session_options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if num_threads > 0:
+            session_options.intra_op_num_threads = num_threads
+
+        providers = [provider for provider in ('CUDAExecutionProvider', 'CPUExecutionProvider')
+                     if provider in ort.get_available_providers()]
+        self.session: ort.InferenceSession = ort.InferenceSession(weights_location, session_options, providers=providers)
+        self.confidence_threshold: float = confidence_threshold
+
+        model_input = self.session.get_inputs()[0]
+        model_output = self.session.get_outputs()[0]
+        _, _, self.input_height, self.input_width = model_input.shape
+
+        self.input_buffer: np.ndarray = np.empty((1, 3, self.input_height, self.input_width), dtype=np.float32)
+        self.output_buffer: np.ndarray = np.empty(model_output.shape, dtype=np.float32)
+        self.letterbox_buffer: np.ndarray = np.full(
+            (self.input_height, self.input_width, 3), self.LETTERBOX_COLOUR, dtype=np.uint8)
+        self.resized_buffer: np.ndarray = np.empty(0, dtype=np.uint8)
+        self.frame_shape: Tuple[int, ...] = ()
+        self.scale: float = 1.0
+        self.pad_x: int = 0
+        self.pad_y: int = 0
+
+        self.binding = self.session.io_binding()
+        self.binding.bind_input(model_input.name, 'cpu', 0, np.float32, self.input_buffer.shape, self.input_buffer.ctypes.data)
+        self.binding.bind_output(model_output.name, 'cpu', 0, np.float32, self.output_buffer.shape, self.output_buffer.ctypes.data)
+
+        self.logger.info(f'ONNX model {weights_location} loaded with {self.session.get_providers()}')
+
+    def detect(self, frame: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Run detection on a frame and return processed results."""
+        self.letterbox(frame)
+        self.session.run_with_iobinding(self.binding)
+        return self.decode(self.output_buffer[0])
+
+    def detect_batch(self, frames: List[np.ndarray]) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """Run detection on several frames; the exported graph has a fixed batch of one, so they run back to back."""
+        return [self.detect(frame) for frame in frames]
+
+    def letterbox(self, frame: np.ndarray) -> None:
+        """Resize and pad the frame into the reused input buffer the way ultralytics does."""
+        if frame.shape != self.frame_shape:
+            self.update_letterbox_geometry(frame.shape)
+
+        resized_height, resized_width = self.resized_buffer.shape[:2]
+        cv2.resize(frame, (resized_width, resized_height), dst=self.resized_buffer, interpolation=cv2.INTER_LINEAR)
+        self.letterbox_buffer[self.pad_y:self.pad_y + resized_height, self.pad_x:self.pad_x + resized_width] = self.resized_buffer
+
+        # BGR HWC uint8 -> RGB CHW float in [0, 1], written straight into the bound input
+        np.multiply(self.letterbox_buffer[:, :, ::-1].transpose(2, 0, 1), np.float32(1 / 255), out=self.input_buffer[0])
+
+    def update_letterbox_geometry(self, frame_shape: Tuple[int, ...]) -> None:
+        frame_height, frame_width = frame_shape[:2]
+        self.scale = min(self.input_height / frame_height, self.input_width / frame_width)
+        resized_width, resized_height = round(frame_width * self.scale), round(frame_height * self.scale)
+        self.pad_x = round((self.input_width - resized_width) / 2 - 0.1)
+        self.pad_y = round((self.input_height - resized_height) / 2 - 0.1)
+
+        self.resized_buffer = np.empty((resized_height, resized_width, 3), dtype=np.uint8)
+        self.letterbox_buffer[:] = self.LETTERBOX_COLOUR
+        self.frame_shape = frame_shape
+
+    def decode(self, output: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Turn the (4 + classes, anchors) output into thresholded, per-class NMS'd detections in frame pixels."""
+        class_scores = output[4:]
+        class_ids = class_scores.argmax(axis=0)
+        confidences = class_scores[class_ids, np.arange(class_scores.shape[1])]
+
+        keep = confidences >= self.confidence_threshold
+        if not keep.any():
+            return (np.empty((0, 4), dtype=np.int32),
+                    np.empty(0, dtype=np.float32),
+                    np.empty(0, dtype=np.int32))
+
+        center_x, center_y, width, height = output[:4, keep]
+        confidences, class_ids = confidences[keep], class_ids[keep]
+
+        boxes = np.stack([center_x - width / 2, center_y - height / 2, center_x + width / 2, center_y + height / 2], axis=1)
+        boxes -= np.array([self.pad_x, self.pad_y, self.pad_x, self.pad_y], dtype=np.float32)
+        boxes /= self.scale
+        frame_height, frame_width = self.frame_shape[:2]
+        np.clip(boxes[:, 0::2], 0, frame_width, out=boxes[:, 0::2])
+        np.clip(boxes[:, 1::2], 0, frame_height, out=boxes[:, 1::2])
+
+        offset_boxes = boxes + (class_ids[:, None] * self.CLASS_OFFSET).astype(np.float32)
+        offset_boxes[:, 2:] -= offset_boxes[:, :2]
+        indices = np.asarray(cv2.dnn.NMSBoxes(
+            offset_boxes, confidences, self.confidence_threshold, self.PREDICT_IOU_THRESHOLD), dtype=np.int64).reshape(-1)
+
+        return (np.ascontiguousarray(boxes[indices], dtype=np.int32),
+                np.ascontiguousarray(confidences[indices], dtype=np.float32),
+                np.ascontiguousarray(class_ids[indices], dtype=np.int32))
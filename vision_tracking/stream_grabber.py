@@ -0,0 +1,125 @@
+import os
+import time
+import logging
+import threading
+from logs.logging_setup import setup_logger
+from logs.instrumentation import instrumentation
+from typing import Any, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from config import StreamConfig
+
+###############################################################
+
+class StreamGrabber:
+    """Decodes a live stream on a background thread and hands out only the newest frame, in place of cv2.VideoCapture."""
+    def __init__(self, source: Any) -> None:
+        file_name = os.path.splitext(os.path.basename(__file__))[0]
+        setup_logger(file_name)
+        self.logger = logging.getLogger(file_name)
+
+        self.source: Any = source
+        self.condition: threading.Condition = threading.Condition()
+        self.frame: Optional[np.ndarray] = None
+        self.frame_time: float = 0.0
+        self.sequence: int = 0
+        self.read_sequence: int = 0
+
+        # Set by read() for the frame it returned, so the pipeline uses the grab time instead of the read time
+        self.capture_time: Optional[float] = None
+
+        self.grabbed: int = 0
+        self.dropped: int = 0
+        self.late: int = 0
+        self.reconnects: int = 0
+
+        self.capture: Optional[cv2.VideoCapture] = self.open()
+        self.live: bool = True
+        self.thread: threading.Thread = threading.Thread(target=self._grab_loop, name="stream-grabber", daemon=True)
+        self.thread.start()
+
+    def open(self) -> Optional[cv2.VideoCapture]:
+        timeout_ms = int(StreamConfig.CONNECTION_TIMEOUT_IN_SECONDS * 1000)
+        capture = cv2.VideoCapture(self.source, cv2.CAP_ANY,
+                                   [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, timeout_ms, cv2.CAP_PROP_READ_TIMEOUT_MSEC, timeout_ms])
+        if not capture.isOpened():
+            capture.release()
+            return None
+        capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        return capture
+
+    def isOpened(self) -> bool:
+        return self.live
+
+    def read(self) -> Tuple[bool, Optional[np.ndarray]]:
+        """Return the newest frame not handed out yet, or nothing if none arrives within the read timeout."""
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.sequence > self.read_sequence or not self.live,
+                                           StreamConfig.READ_TIMEOUT_IN_SECONDS) or self.sequence == self.read_sequence:
+                return False, None
+
+            self.read_sequence = self.sequence
+            frame, self.capture_time = self.frame, self.frame_time
+
+        if time.time() - self.capture_time > StreamConfig.LATE_FRAME_THRESHOLD_IN_SECONDS:
+            self.late += 1
+            instrumentation.count("stream.late")
+        return True, frame
+
+    def get(self, property_id: int) -> float:
+        return self.capture.get(property_id) if self.capture else 0.0
+
+    def release(self) -> None:
+        with self.condition:
+            self.live = False
+            self.condition.notify_all()
+        self.thread.join(StreamConfig.CONNECTION_TIMEOUT_IN_SECONDS * 2)
+        self.logger.info(f"Stream closed: grabbed={self.grabbed}, dropped={self.dropped}, "
+                         f"late={self.late}, reconnects={self.reconnects}")
+
+    def _grab_loop(self) -> None:
+        """Read frames as they arrive, reconnecting with exponential backoff whenever the stream fails."""
+        delay = StreamConfig.MIN_RECONNECT_DELAY_IN_SECONDS
+        attempts = 0
+        while self.live:
+            if self.capture is None:
+                if StreamConfig.MAX_RECONNECT_ATTEMPTS and attempts >= StreamConfig.MAX_RECONNECT_ATTEMPTS:
+                    self.logger.error(f"Giving up on {self.source} after {attempts} reconnect attempts")
+                    break
+
+                time.sleep(delay)
+                attempts += 1
+                self.capture = self.open()
+                if self.capture is None:
+                    delay = min(delay * 2, StreamConfig.MAX_RECONNECT_DELAY_IN_SECONDS)
+                    continue
+                self.reconnects += 1
+                instrumentation.count("stream.reconnects")
+                self.logger.info(f"Reconnected to {self.source} after {attempts} attempts")
+
+            ret, frame = self.capture.read()
+            frame_time = time.time()
+            if not ret:
+                self.logger.warning(f"Lost stream {self.source}, reconnecting")
+                self.capture.release()
+                self.capture = None
+                continue
+
+            delay = StreamConfig.MIN_RECONNECT_DELAY_IN_SECONDS
+            attempts = 0
+            with self.condition:
+                if self.sequence > self.read_sequence:
+                    self.dropped += 1
+                    instrumentation.count("stream.dropped")
+                self.frame, self.frame_time = frame, frame_time
+                self.sequence += 1
+                self.grabbed += 1
+                self.condition.notify()
+
+        with self.condition:
+            self.live = False
+            self.condition.notify_all()
+        if self.capture:
+            self.capture.release()
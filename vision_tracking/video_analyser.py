@@ -1,6 +1,6 @@
 import os
 import logging
-from typing import Tuple, List
+from typing import List, Tuple
 from logs.logging_setup import setup_logger
 
 import torch
@@ -10,13 +10,15 @@ from ultralytics import YOLO
 ###############################################################
 
 class YOLODetector:
-    def __init__(self, weights_location: str, confidence_threshold: float) -> None:
+    def __init__(self, weights_location: str, confidence_threshold: float, num_threads: int = 0) -> None:
         file_name = os.path.splitext(os.path.basename(__file__))[0]
         setup_logger(file_name)
         self.logger = logging.getLogger(file_name)
 
         self.device: torch.device = torch.device(
             'cuda' if torch.cuda.is_available() else 'cpu')
+        if num_threads > 0:
+            torch.set_num_threads(num_threads)
         self.model: YOLO = YOLO(weights_location, task='detect')
         self.confidence_threshold: float = confidence_threshold
 
@@ -28,19 +30,28 @@ class YOLODetector:
             results = self.model.predict(frame)[0]
         return self.extract_detections(results)
 
+    def detect_batch(self, frames: List[np.ndarray]) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """Run detection on several frames in a single forward pass."""
+        with torch.no_grad():
+            results = self.model.predict(frames, verbose=False)
+        return [self.extract_detections(result) for result in results]
+
     def extract_detections(self, results) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         """Extract bounding boxes, confidences, and class IDs."""
-        boxes: List[List[int]] = []
-        confidences: List[float] = []
-        class_ids: List[int] = []
-
-        for box in results.boxes:
-            x1, y1, x2, y2 = map(int, box.xyxy[0].cpu().numpy())
-            confidence: float = float(box.conf[0])
-
-            if confidence >= self.confidence_threshold:
-                boxes.append([x1, y1, x2, y2])
-                confidences.append(confidence)
-                class_ids.append(int(box.cls[0]))
-
-        return np.array(boxes), np.array(confidences), np.array(class_ids)
+        detections: np.ndarray = results.boxes.data.cpu().numpy()
+        return self.filter_detections(detections, self.confidence_threshold)
+
+    @staticmethod
+    def filter_detections(detections: np.ndarray, confidence_threshold: float) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Split an (N, 6) xyxy/conf/cls array into thresholded int32 boxes, float32 confidences and int32 class IDs."""
+        if len(detections) == 0:
+            return (np.empty((0, 4), dtype=np.int32),
+                    np.empty(0, dtype=np.float32),
+                    np.empty(0, dtype=np.int32))
+
+        detections = detections[detections[:, -2] >= confidence_threshold]
+
+        boxes: np.ndarray = np.ascontiguousarray(detections[:, :4], dtype=np.int32)
+        confidences: np.ndarray = np.ascontiguousarray(detections[:, -2], dtype=np.float32)
+        class_ids: np.ndarray = np.ascontiguousarray(detections[:, -1], dtype=np.int32)
+        return boxes, confidences, class_ids
@@ -1,7 +1,7 @@
 import cv2
 import math
 import numpy as np
-from typing import List, Tuple
+from typing import List, Optional, Tuple
 from config import DisplayConfig
 
 class VideoDisplay:
@@ -42,18 +42,36 @@ class VideoDisplay:
     @staticmethod
     def draw_apriltag(frame, detection):
         """Draws the tag's bounding box, center, and ID on the frame."""
-        for i in range(4):
-            j = (i + 1) % 4
-            point1 = (int(detection.getCorner(i).x), int(detection.getCorner(i).y))
-            point2 = (int(detection.getCorner(j).x), int(detection.getCorner(j).y))
-            cv2.line(frame, point1, point2, (0, 255, 0), 2)
+        cv2.polylines(frame, [detection.corners.astype(np.int32)], True, (0, 255, 0), 2)
 
-        center_x = int(detection.getCenter().x)
-        center_y = int(detection.getCenter().y)
+        center_x, center_y = int(detection.center[0]), int(detection.center[1])
 
         cv2.line(frame, (center_x - DisplayConfig.APRILTAG_CROSSHAIR_LINE_LENGTH, center_y), (center_x + DisplayConfig.APRILTAG_CROSSHAIR_LINE_LENGTH, center_y), (0, 0, 255), 2)
         cv2.line(frame, (center_x, center_y - DisplayConfig.APRILTAG_CROSSHAIR_LINE_LENGTH), (center_x, center_y + DisplayConfig.APRILTAG_CROSSHAIR_LINE_LENGTH), (0, 0, 255), 2)
 
         cv2.putText(frame, str(detection.getId()), (center_x + DisplayConfig.APRILTAG_CROSSHAIR_LINE_LENGTH, center_y), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 0, 255), 3)
 
-        return frame
\ No newline at end of file
+        return frame
+
+class Overlay:
+    """What to draw for one frame, recorded during inference and only rendered if the frame is shown or saved."""
+    __slots__ = ('boxes', 'class_ids', 'apriltags', 'angles', 'messages')
+
+    def __init__(self, boxes: np.ndarray, class_ids: np.ndarray, apriltags: List) -> None:
+        self.boxes: np.ndarray = boxes
+        self.class_ids: np.ndarray = class_ids
+        self.apriltags: List = apriltags
+        self.angles: List[float] = []
+        self.messages: Optional[List[str]] = None
+
+    def add_angle_line(self, angle: float) -> None:
+        self.angles.append(angle)
+
+    def render(self, frame: np.ndarray) -> np.ndarray:
+        """Draw everything recorded onto the frame in place."""
+        VideoDisplay.annotate_frame(frame, self.boxes, self.class_ids, self.apriltags)
+        for angle in self.angles:
+            VideoDisplay.draw_angle_line(frame, angle)
+        if self.messages:
+            VideoDisplay.insert_text_onto_frame(frame, self.messages)
+        return frame
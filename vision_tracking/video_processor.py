@@ -1,20 +1,21 @@
 import os
 import time
 import logging
+from concurrent.futures import Future, ThreadPoolExecutor
 from logs.logging_setup import setup_logger
-from typing import Tuple, Dict, List, Type, Union
+from logs.instrumentation import instrumentation
+from typing import Tuple, Dict, List, Optional, Type
 
 import cv2
-import torch
-import torchvision
 import numpy as np
 
 from config import *
-from .video_analyser import YOLODetector
-from .video_display import VideoDisplay
+from .detection_batch import DetectionBatch
+from .object_tracker import ObjectTracker
+from .inference_scheduler import InferenceScheduler, BoxPropagator
+from .frame_buffers import FrameTransform, FrameBuffers, FrameBufferRing
 from apriltags.apriltag_finder import AprilTagFinder
-from decision_engine.trackable_objects import Algae, Cage, Coral, Robot
-from camera_calculations.mono_video import MonoVision
+from decision_engine.trackable_objects import Object, ObjectPool
 
 ###############################################################
 
@@ -25,128 +26,154 @@ class FrameProcessor:
         setup_logger(file_name)
         self.logger = logging.getLogger(file_name)
 
-        self.logger.info(
-            f'Using device: {"GPU" if torch.cuda.is_available() else "CPU"}')
-        self.yolo_detector: YOLODetector = YOLODetector(
-            YOLOConfig.WEIGHTS_LOCATION, YOLOConfig.CONFIDENCE_THRESHOLD)
+        self.yolo_detector = self.create_detector()
+        self.logger.info(f'Using {YOLOConfig.BACKEND} detector backend')
         self.apriltag_detector: AprilTagFinder = AprilTagFinder()
         self.start_time: float = time.time()
         self.frame_count: int = 0
-        self.game_pieces: Dict[Type[Union[Algae, Cage, Coral, Robot]], List] = {
-            obj: [] for obj in (Algae, Cage, Coral, Robot)
+        self.object_pools: Dict[Type[Object], ObjectPool] = {
+            obj: ObjectPool(obj) for obj in DetectionBatch.OBJECT_TYPES
         }
+        self.game_pieces: DetectionBatch = DetectionBatch.empty(self.start_time)
+        self.tracker: ObjectTracker = ObjectTracker()
+        self.scheduler: InferenceScheduler = InferenceScheduler()
+        self.box_propagator: BoxPropagator = BoxPropagator()
+        self.previous_gray_frame: Optional[np.ndarray] = None
+        self.detected: bool = False     # whether the last frame ran YOLO, recorded so a replay follows the same schedule
+        self.frame_transform: FrameTransform = FrameTransform()
+        self.frame_buffers: FrameBufferRing = FrameBufferRing(
+            PipelineConfig.FRAME_BUFFER_SLOTS,
+            self.frame_transform.output_shape((CameraConfig.FRAME_HEIGHT, CameraConfig.FRAME_WIDTH, 3)))
+
+        self.detector_pool: ThreadPoolExecutor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="apriltag")
+        self.object_detection_time: float = 0.0
+        self.apriltag_time: float = 0.0
+        self.detection_wall_time: float = 0.0
+
+    @staticmethod
+    def create_detector():
+        """Load the detector backend selected in YOLOConfig; each backend only imports its own runtime."""
+        if YOLOConfig.BACKEND == "onnxruntime":
+            from .onnx_detector import ONNXDetector
+            return ONNXDetector(YOLOConfig.WEIGHTS_BY_PRECISION[YOLOConfig.PRECISION],
+                                YOLOConfig.CONFIDENCE_THRESHOLD, YOLOConfig.NUM_THREADS)
+        if YOLOConfig.BACKEND == "ultralytics":
+            from .video_analyser import YOLODetector
+            return YOLODetector(YOLOConfig.WEIGHTS_LOCATION, YOLOConfig.CONFIDENCE_THRESHOLD, YOLOConfig.NUM_THREADS)
+        raise ValueError(f"Unknown detector backend: {YOLOConfig.BACKEND}")
+
+    def next_buffers(self, frame: np.ndarray) -> FrameBuffers:
+        """The ring slot the transformed frame and its grayscale plane should be written into."""
+        return self.frame_buffers.next(self.frame_transform.output_shape(frame.shape))
+
+    def transform_frame(self, frame: np.ndarray, dst: Optional[np.ndarray] = None) -> np.ndarray:
+        """Rotate and flip the frame in one pass, into dst when given."""
+        with instrumentation.span("frame.transform"):
+            return self.frame_transform.apply(frame, dst)
+
+    def process_frame(self, frame: np.ndarray, capture_time: Optional[float] = None, gray_frame: Optional[np.ndarray] = None,
+                      detect: Optional[bool] = None) -> Tuple[np.ndarray, DetectionBatch, List]:
+        """Processes a single frame for detections; detect pins the YOLO-or-optical-flow choice, as a replay does."""
+        if capture_time is None:
+            capture_time = time.time()
+
+        start = time.perf_counter()
+        # One grayscale plane for the AprilTag search and optical flow, written into the ring slot when there is one
+        gray_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=gray_frame)
+
+        apriltag_future: Optional[Future] = None
+        if PipelineConfig.CONCURRENT_DETECTORS:
+            apriltag_future = self.detector_pool.submit(self.find_apriltags, frame, gray_frame)
+
+        if detect is None:
+            detect = self.scheduler.should_detect() or self.previous_gray_frame is None
+        self.detected = detect
+        if detect:
+            boxes, confidences, class_ids = self.detect_objects(frame)
+        else:
+            boxes, confidences, class_ids = self.propagate_objects(gray_frame)
+        self.previous_gray_frame = gray_frame
+        self.object_detection_time += time.perf_counter() - start
+
+        apriltags = apriltag_future.result() if apriltag_future else self.find_apriltags(frame, gray_frame)
+        self.detection_wall_time += time.perf_counter() - start
+
+        self.update_game_pieces(boxes, confidences, class_ids, capture_time)
 
-    def transform_frame(self, frame: np.ndarray) -> np.ndarray:
-        if DisplayConfig.ROTATE_IMAGE:
-            frame = cv2.rotate(frame, cv2.ROTATE_90_CLOCKWISE)
-        if DisplayConfig.FLIP_IMAGE_HORIZONTALLY:
-            frame = cv2.flip(frame, 1)
-        if DisplayConfig.FLIP_IMAGE_VERTICALLY:
-            frame = cv2.flip(frame, 0)
-
-        return frame
-
-    def process_frame(self, frame: np.ndarray) -> Tuple[np.ndarray, Dict[Type[Union[Algae, Cage, Coral, Robot]], List]]:
-        """Processes a single frame for detections and annotations."""
-        boxes, confidences, class_ids = self.yolo_detector.detect(frame)
-        apriltags = self.apriltag_detector.find_apriltags(frame)
+        return frame, self.game_pieces, apriltags
 
+    def find_apriltags(self, frame: np.ndarray, gray_frame: Optional[np.ndarray] = None) -> List:
+        """Run the AprilTag detector and accumulate its run time."""
+        start = time.perf_counter()
+        apriltags = self.apriltag_detector.find_apriltags(frame, gray_frame)
+        elapsed = time.perf_counter() - start
+        self.apriltag_time += elapsed
+        instrumentation.record("frame.apriltags", elapsed)
+        return apriltags
+
+    def detect_objects(self, frame: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Run YOLO and NMS on the frame and feed the latency back to the scheduler."""
+        start = time.perf_counter()
+        with instrumentation.span("frame.yolo"):
+            boxes, confidences, class_ids = self.yolo_detector.detect(frame)
+
+        boxes, confidences, class_ids = self.suppress_overlaps(boxes, confidences, class_ids)
+
+        self.scheduler.record_detection(time.perf_counter() - start)
+        instrumentation.count("frame.yolo_runs")
+        return boxes, confidences, class_ids
+
+    def detect_objects_batch(self, frames: List[np.ndarray]) -> List[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+        """Run YOLO on several frames in one call, then NMS each frame the same way detect_objects does."""
+        with instrumentation.span("frame.yolo_batch"):
+            results = self.yolo_detector.detect_batch(frames)
+        instrumentation.count("frame.yolo_runs", len(frames))
+        return [self.suppress_overlaps(*result) for result in results]
+
+    def suppress_overlaps(self, boxes: np.ndarray, confidences: np.ndarray, class_ids: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
         if boxes.size > 0:
-            indices = self.apply_nms(boxes, confidences)
+            with instrumentation.span("frame.nms"):
+                indices = self.apply_nms(boxes, confidences)
 
-            boxes_filtered, confidences_filtered, class_ids_filtered = boxes[
+            boxes, confidences, class_ids = boxes[
                 indices], confidences[indices], class_ids[indices]
 
-            frame = VideoDisplay.annotate_frame(
-                frame, boxes_filtered, class_ids_filtered, apriltags)
-            self.update_game_pieces(
-                boxes_filtered, confidences_filtered, class_ids_filtered)
+        return boxes, confidences, class_ids
 
-        return frame, self.game_pieces, apriltags
+    def propagate_objects(self, gray_frame: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Carry the tracked boxes over to this frame with optical flow instead of running YOLO."""
+        with instrumentation.span("frame.propagate"):
+            boxes, confidences, class_ids = self.tracker.current_detections()
+            boxes, quality = self.box_propagator.propagate(self.previous_gray_frame, gray_frame, boxes)
 
-    def extract_features(self, box: List[int]) -> Tuple[int, int, float, float]:
-        """Extract object features."""
-        x1, y1, x2, y2 = box
-        center_x: int = (x1 + x2) // 2
-        center_y: int = (y1 + y2) // 2
-        scale: float = ((x2 - x1) + (y2 - y1)) / 2
-        ratio: float = (x2 - x1) / (y2 - y1)
-        return center_x, center_y, scale, ratio
+        if len(quality):
+            self.scheduler.record_tracking_quality(float(quality.min()))
+        tracked = quality >= SchedulerConfig.MIN_TRACKING_QUALITY
+        # The tracker stores the decayed confidence, so it compounds until YOLO sees the object again
+        confidences = confidences * SchedulerConfig.PROPAGATED_CONFIDENCE_DECAY
+        return boxes[tracked], confidences[tracked], class_ids[tracked]
 
-    def update_game_pieces(self, boxes: np.ndarray, confidences: np.ndarray, class_ids: np.ndarray) -> None:
+    def update_game_pieces(self, boxes: np.ndarray, confidences: np.ndarray, class_ids: np.ndarray, timestamp: float) -> None:
         """Update game pieces with detection data for game piece selection."""
-        for key in self.game_pieces:
-            self.game_pieces[key] = []
-
-        for box, conf, class_id in zip(boxes, confidences, class_ids):
-            match class_id:
-                case 0:  # Algae
-                    center_x, center_y, scale, ratio = self.extract_features(
-                        box)
-
-                    algae = Algae()
-                    algae.update_frame_location(
-                        center_x, center_y, scale, ratio, time.time())
-                    algae.update_confidence(conf)
-                    distance, angle = MonoVision.find_distance_and_angle(
-                        center_x, AutoAlgaeConfig.ALGAE_SIZE_IN_MM, scale)
-                    algae.update_relative_location(distance, angle)
-                    self.game_pieces[Algae].append(algae)
-
-                case 1:  # Cage
-                    center_x, center_y, scale, ratio = self.extract_features(
-                        box)
-
-                    cage = Cage()
-                    cage.update_frame_location(
-                        center_x, center_y, scale, ratio, time.time())
-                    cage.update_confidence(conf)
-                    distance, angle = MonoVision.find_distance_and_angle(
-                        center_x, AutoHangConfig.CAGE_WIDTH_IN_MM, scale)
-                    cage.update_relative_location(distance, angle)
-                    self.game_pieces[Cage].append(cage)
-
-                case 2:  # Coral
-                    center_x, center_y, scale, ratio = self.extract_features(
-                        box)
-
-                    coral = Coral()
-                    coral.update_frame_location(
-                        center_x, center_y, scale, ratio, time.time())
-                    coral.update_confidence(conf)
-                    distance, angle = MonoVision.find_distance_and_angle(
-                        center_x, AutoCoralConfig.CORAL_SIZE_IN_MM, scale)
-                    coral.update_relative_location(distance, angle)
-                    self.game_pieces[Coral].append(coral)
-
-                case 3:  # Robot
-                    center_x, center_y, scale, ratio = self.extract_features(
-                        box)
-
-                    robot = Robot()
-                    robot.update_frame_location(
-                        center_x, center_y, scale, ratio, time.time())
-                    robot.update_confidence(conf)
-                    distance, angle = MonoVision.find_distance_and_angle(
-                        center_x, AutoRobotConfig.AVERAGE_ROBOT_SIZE_IN_MM, scale)
-                    robot.update_relative_location(distance, angle)
-                    self.game_pieces[Robot].append(robot)
-
-                case _: continue
+        with instrumentation.span("frame.update_game_pieces"):
+            for pool in self.object_pools.values():
+                pool.release_all()
+
+            self.game_pieces = DetectionBatch(boxes, confidences, class_ids, timestamp, self.object_pools)
+            self.tracker.update(self.game_pieces)
+        self.scheduler.record_tracked_objects(len(self.game_pieces))
+        instrumentation.count("frame.detections", len(self.game_pieces))
 
     def apply_nms(self, boxes: np.ndarray, confidences: np.ndarray) -> np.ndarray:
         """Apply Non-Maximum Suppression to filter bounding boxes."""
         if len(boxes) == 0:
-            return np.array([])
+            return np.array([], dtype=np.int64)
 
-        boxes_tensor = torch.tensor(
-            boxes, dtype=torch.float32, device=self.yolo_detector.device)
-        confidences_tensor = torch.tensor(
-            confidences, dtype=torch.float32, device=self.yolo_detector.device)
+        boxes_xywh = boxes.astype(np.float32)
+        boxes_xywh[:, 2:] -= boxes_xywh[:, :2]
 
-        indices = torchvision.ops.nms(boxes_tensor.to(self.yolo_detector.device), confidences_tensor.to(
-            self.yolo_detector.device), YOLOConfig.IOU_THRESHOLD)
-        return indices.cpu().numpy()
+        indices = cv2.dnn.NMSBoxes(boxes_xywh, confidences.astype(np.float32), 0.0, YOLOConfig.IOU_THRESHOLD)
+        return np.asarray(indices, dtype=np.int64).reshape(-1)
 
     def calculate_frame_rate(self) -> None:
         """Calculate and log the frame processing rate."""
@@ -155,5 +182,22 @@ class FrameProcessor:
             elapsed_time = time.time() - self.start_time
             fps = self.frame_count / elapsed_time
             self.logger.info(f"Processing FPS: {fps:.2f}")
+            self.log_detector_timing()
             self.start_time = time.time()
-            self.frame_count = 0
\ No newline at end of file
+            self.frame_count = 0
+
+    def log_detector_timing(self) -> None:
+        """Log the average object and AprilTag detection times and how much of the shorter one was hidden."""
+        object_time = self.object_detection_time / self.frame_count
+        apriltag_time = self.apriltag_time / self.frame_count
+        wall_time = self.detection_wall_time / self.frame_count
+        overlap = (object_time + apriltag_time - wall_time) / max(min(object_time, apriltag_time), 1e-9)
+
+        self.logger.info(
+            f"Detection timing: objects={object_time * 1000:.1f} ms, apriltags={apriltag_time * 1000:.1f} ms, "
+            f"wall={wall_time * 1000:.1f} ms, overlap={max(overlap, 0.0) * 100:.0f}%")
+        self.object_detection_time = self.apriltag_time = self.detection_wall_time = 0.0
+
+    def close(self) -> None:
+        """Stop the detector worker pool."""
+        self.detector_pool.shutdown(wait=True)
@@ -0,0 +1,153 @@
+import os
+import queue
+import logging
+import multiprocessing
+from multiprocessing import shared_memory
+from logs.logging_setup import setup_logger, shutdown_logging
+from logs.instrumentation import instrumentation
+from typing import Optional, Tuple
+
+import cv2
+import numpy as np
+
+from config import DisplayConfig, PipelineConfig
+
+###############################################################
+
+class BackgroundVideoWriter:
+    """Encodes frames in a separate process, handing them over through shared memory slots."""
+    DROP_NEWEST: str = "drop_newest"
+    BLOCK: str = "block"
+
+    def __init__(self, path: str, slots: int = DisplayConfig.VIDEO_WRITER_QUEUE_SIZE,
+                 drop_policy: str = DisplayConfig.VIDEO_WRITER_DROP_POLICY) -> None:
+        if drop_policy not in (self.DROP_NEWEST, self.BLOCK):
+            raise ValueError(f"Unknown drop policy for the video writer: {drop_policy}")
+
+        file_name = os.path.splitext(os.path.basename(__file__))[0]
+        setup_logger(file_name)
+        self.logger = logging.getLogger(file_name)
+
+        self.path: str = path
+        self.slot_count: int = slots
+        self.drop_policy: str = drop_policy
+        self.context = multiprocessing.get_context("spawn")
+
+        # Created on the first frame, once the frame shape is known
+        self.memory: Optional[shared_memory.SharedMemory] = None
+        self.slots: Optional[np.ndarray] = None
+        self.free_slots = None
+        self.frames = None
+        self.process = None
+
+        self.written: int = 0
+        self.dropped: int = 0
+        self.encoder_lost: bool = False
+
+    def start(self, frame_shape: Tuple[int, ...]) -> None:
+        self.memory = shared_memory.SharedMemory(create=True, size=self.slot_count * int(np.prod(frame_shape)))
+        self.slots = np.ndarray((self.slot_count, *frame_shape), dtype=np.uint8, buffer=self.memory.buf)
+        self.free_slots = self.context.Queue()
+        self.frames = self.context.Queue()
+        for slot in range(self.slot_count):
+            self.free_slots.put(slot)
+
+        self.process = self.context.Process(
+            target=encode_frames, name="video-writer", daemon=True,
+            args=(self.path, self.memory.name, (self.slot_count, *frame_shape), self.frames, self.free_slots))
+        self.process.start()
+        self.logger.info(f"Writing video to {self.path} from a background process with {self.slot_count} slots")
+
+    def write(self, frame: np.ndarray, capture_time: float) -> bool:
+        """Copy the frame into a free slot for the encoder, returning False if it was dropped."""
+        if self.process is None:
+            self.start(frame.shape)
+        if frame.shape != self.slots.shape[1:]:
+            self.dropped += 1
+            return False
+
+        slot = self.free_slot()
+        if slot is None:
+            self.dropped += 1
+            instrumentation.count("video_writer.dropped")
+            return False
+
+        np.copyto(self.slots[slot], frame)
+        self.frames.put((slot, capture_time))
+        self.written += 1
+        return True
+
+    def free_slot(self) -> Optional[int]:
+        """A slot the encoder is done with, or None when all are busy under drop_newest or the encoder has died."""
+        while True:
+            try:
+                return self.free_slots.get(self.drop_policy == self.BLOCK, PipelineConfig.QUEUE_TIMEOUT)
+            except queue.Empty:
+                # A dead encoder never hands slots back, so blocking on one would stall the output stage for good
+                if not self.process.is_alive():
+                    if not self.encoder_lost:
+                        self.logger.error(f"Video encoder exited with code {self.process.exitcode}; dropping frames")
+                        self.encoder_lost = True
+                    return None
+                if self.drop_policy != self.BLOCK:
+                    return None
+
+    def close(self) -> None:
+        """Let the encoder finish everything queued, then release the shared memory."""
+        if self.process is None:
+            return
+
+        self.frames.put(None)
+        self.process.join()
+        self.slots = None
+        self.memory.close()
+        self.memory.unlink()
+        self.logger.info(f"Video writer closed: {self.written} frames queued, {self.dropped} dropped")
+
+def encode_frames(path: str, memory_name: str, slots_shape: Tuple[int, ...], frames, free_slots) -> None:
+    """Writer process: encode frames at a constant rate, repeating or skipping them so playback follows the capture times."""
+    file_name = os.path.splitext(os.path.basename(__file__))[0]
+    logger = setup_logger(file_name)
+
+    memory = shared_memory.SharedMemory(name=memory_name)
+    slots = np.ndarray(slots_shape, dtype=np.uint8, buffer=memory.buf)
+    height, width = slots_shape[1:3]
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), DisplayConfig.OUTPUT_FPS, (width, height), True)
+    frame = np.empty(slots_shape[1:], dtype=np.uint8)
+
+    # Capture times go alongside the video so analysis can use the exact timing, not just the resampled one
+    timestamps = open(os.path.splitext(path)[0] + "_timestamps.csv", 'w')
+    timestamps.write("frame,capture_time\n")
+
+    first_time: Optional[float] = None
+    encoded = received = 0
+    while True:
+        item = frames.get()
+        if item is None:
+            break
+
+        slot, capture_time = item
+        if first_time is None:
+            first_time = capture_time
+        else:
+            # Hold the previous frame on screen until this one was captured
+            due = round((capture_time - first_time) * DisplayConfig.OUTPUT_FPS)
+            while encoded < due:
+                out.write(frame)
+                encoded += 1
+
+        np.copyto(frame, slots[slot])
+        free_slots.put(slot)
+        timestamps.write(f"{received},{capture_time:.6f}\n")
+        received += 1
+
+    if received:
+        out.write(frame)
+        encoded += 1
+
+    out.release()
+    timestamps.close()
+    slots = None
+    memory.close()
+    logger.info(f"Encoded {received} frames as {encoded} frames at {DisplayConfig.OUTPUT_FPS} fps to {path}")
+    shutdown_logging()